@@ -0,0 +1,245 @@
+import csv
+import io
+import pandas as pd
+from Controllers.Kickoff import kickoffSeries
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+# "incremental" only writes the rows that changed, "replace" empties the table and loads the CSV again
+IMPORT_MODES = ("incremental", "replace")
+
+# natural keys used to match CSV rows against stored rows in an incremental import
+MATCH_KEY = ["team_name", "date", "opponent"]
+PLAYER_KEY = ["name", "team_name"]
+TEAM_KEY = ["name"]
+
+# how each CSV column maps onto a model column: (model column, CSV column, kind)
+# str columns keep the old str(value) behaviour, so missing values are stored as "nan"
+# int and float columns default to 0 when the value or the whole column is missing
+# optional and goals columns stay NULL when missing, kickoff is built from the Date and Time columns
+MATCH_COLUMNS = [
+    ("kickoff", ("Date", "Time"), "kickoff"),
+    ("date", "Date", "str"),
+    ("time", "Time", "str"),
+    ("round", "Round", "str"),
+    ("day", "Day", "str"),
+    ("venue", "Venue", "str"),
+    ("result", "Result", "optional"),
+    ("gf", "GF", "goals"),
+    ("ga", "GA", "goals"),
+    ("opponent", "Opponent", "str"),
+    ("xg", "xG", "float"),
+    ("xga", "xGA", "float"),
+    ("poss", "Poss", "float"),
+    ("attendance", "Attendance", "int"),
+    ("captain", "Captain", "str"),
+    ("formation", "Formation", "str"),
+    ("oppFormation", "Opp Formation", "str"),
+    ("referee", "Referee", "str"),
+    ("team_name", "Team", "str"),
+]
+
+PLAYER_COLUMNS = [
+    ("name", "Player", "str"),
+    ("nation", "Nation", "str"),
+    ("position", "Pos", "str"),
+    ("age", "Age", "age"),
+    ("matchesPlayed", "MP", "int"),
+    ("starts", "Starts", "int"),
+    ("minutes", "Min", "int"),
+    ("minutesPerMatch", "90s", "float"),
+    ("goals", "Gls", "int"),
+    ("assists", "Ast", "int"),
+    ("goalsAndAssists", "G+A", "float"),
+    ("nonPenaltyGoals", "G-PK", "int"),
+    ("penaltyGoals", "PK", "int"),
+    ("penaltyAttempts", "PKatt", "int"),
+    ("yellowCards", "CrdY", "int"),
+    ("redCards", "CrdR", "int"),
+    ("expectedGoals", "xG", "float"),
+    ("expectedNonPenaltyGoals", "npxG", "float"),
+    ("expectedAssists", "xAG", "float"),
+    ("expectedNonPenaltyGoalsAndAssists", "npxG+xAG", "float"),
+    ("progressiveCarries", "PrgC", "int"),
+    ("progessivePasses", "PrgP", "int"),
+    ("progessivePassesReceived", "PrgR", "int"),
+    ("goalsPer90", "Gls", "float"),
+    ("assistsPer90", "Ast", "float"),
+    ("goalsAndAssistsPer90", "G+A", "float"),
+    ("nonPenaltyGoalsPer90", "G-PK", "float"),
+    ("nonPenaltyGoalsAndAssistsPer90", "G+A-PK", "float"),
+    ("expectedGoalsPer90", "xG", "float"),
+    ("expectedAssistsPer90", "xAG", "float"),
+    ("expectedGoalsAndAssistsPer90", "xG+xAG", "float"),
+    ("expectedNonPenaltyGoalsPer90", "npxG", "float"),
+    ("expectedNonPenaltyGoalsAndAssistsPer90", "npxG+xAG", "float"),
+    ("team_name", "Team", "str"),
+]
+
+TEAM_COLUMNS = [
+    ("rank", "Rk", "int"),
+    ("name", "Squad", "str"),
+    ("matchesPlayed", "MP", "int"),
+    ("wins", "W", "int"),
+    ("draws", "D", "int"),
+    ("losses", "L", "int"),
+    ("goalsFor", "GF", "int"),
+    ("goalsAgainst", "GA", "int"),
+    ("goalDifference", "GD", "int"),
+    ("points", "Pts", "int"),
+    ("goalsPer90", "GF/90", "float"),
+    ("expectedGoals", "xG", "float"),
+    ("expectedGoalsAllowed", "xGA", "float"),
+    ("expectedGoalsDifference", "xGD", "float"),
+    ("expectedGoalsDifferencePer90", "xGD/90", "float"),
+    ("last5Wins", "Last 5", "str"),
+    ("attendance", "Attendance", "int"),
+    ("topTeamScorer", "Top Team Scorer", "str"),
+    ("goalkeeper", "Goalkeeper", "str"),
+]
+
+
+def cleanColumn(df, source, kind):
+    """Converts one CSV column in a single vectorized pass"""
+    if kind == "kickoff":
+        dates, times = source
+        if dates not in df.columns:
+            return pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns]")
+        return kickoffSeries(df[dates], df[times] if times in df.columns else pd.Series("", index=df.index))
+
+    if source not in df.columns:
+        if kind == "str":
+            return pd.Series("", index=df.index, dtype=object)
+        if kind in ("optional", "goals"):
+            return pd.Series(None, index=df.index, dtype=object if kind == "optional" else "Int64")
+        return pd.Series(0, index=df.index, dtype="int64" if kind == "int" else "float64")
+
+    column = df[source]
+    if kind == "str":
+        return column.astype(str)
+    if kind == "optional":
+        text = column.astype(str).str.strip()
+        return text.where(column.notna() & (text != ""), None)
+    if kind == "goals":
+        # the leading number, so "2 (4)" after penalties is 2 and unplayed matches stay NULL
+        goals = column.astype(str).str.extract(r"^\s*(\d+)", expand=False)
+        return pd.to_numeric(goals).astype("Int64")
+    if kind == "age":
+        # fbref ages look like "25-123" (years-days), anything not starting with a digit counts as 0
+        raw = column.astype(str)
+        years = raw.str.split("-").str[0].where(raw.str[0].str.isdigit().fillna(False), "0")
+        return pd.to_numeric(years).astype("float64")
+
+    numbers = pd.to_numeric(column).fillna(0)
+    # astype truncates towards zero, the same as int() did on each value
+    return numbers.astype("int64") if kind == "int" else numbers.astype("float64")
+
+
+def cleanFrame(df, columns):
+    """Builds a frame with the model's column names from a raw CSV frame"""
+    return pd.DataFrame({target: cleanColumn(df, source, kind) for target, source, kind in columns}, index=df.index)
+
+
+def nullsToNone(frame):
+    """Object frame with None wherever pandas has NaN, NA or NaT, ready for the database driver"""
+    return frame.astype(object).where(frame.notna(), None)
+
+
+def copyInsert(db: Session, table, frame):
+    connection = db.connection().connection
+    if db.get_bind().dialect.driver == "asyncpg":
+        # binary COPY of the row tuples, None arrives as NULL and strings are never reinterpreted
+        records = list(nullsToNone(frame).itertuples(index=False, name=None))
+        await_only(connection.driver_connection.copy_records_to_table(table.name, records=records, columns=list(frame.columns)))
+        return
+
+    # psycopg2: stream the rows as CSV through COPY, quoting strings so "" stays an empty string and not NULL
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_NONNUMERIC)
+    buffer.seek(0)
+    column_list = ", ".join(f'"{name}"' for name in frame.columns)
+    options = "FORMAT csv"
+    # missing values are written as a quoted "", FORCE_NULL turns them back into NULL for the columns that have any
+    nullable = [f'"{name}"' for name in frame.columns[frame.isna().any().to_numpy()]]
+    if nullable:
+        options += f", FORCE_NULL ({', '.join(nullable)})"
+    cursor = connection.cursor()
+    try:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN WITH ({options})', buffer)
+    finally:
+        cursor.close()
+
+
+def bulkInsert(db: Session, model, frame):
+    """
+    Inserts every row of `frame` into the model's table in one statement.
+    Uses COPY on PostgreSQL and a single executemany everywhere else (SQLite in tests).
+    Runs inside the session's transaction, the caller commits.
+    """
+    if frame.empty:
+        return 0
+    table = model.__table__
+    if db.get_bind().dialect.name == "postgresql":
+        copyInsert(db, table, frame)
+    else:
+        db.execute(insert(table), nullsToNone(frame).to_dict("records"))
+    return len(frame)
+
+
+def diffImport(db: Session, model, frame, key, scope=()):
+    """
+    Brings the model's table in line with `frame` by only touching the rows that differ.
+
+    Rows are matched on the natural `key` columns: CSV rows without a stored match
+    are inserted, stored rows missing from the CSV are deleted and matched rows are
+    updated only when a value changed. Unchanged rows keep their primary keys.
+    `scope` limits the stored rows that are compared (and so can be deleted) to a filter.
+    Runs inside the session's transaction, the caller commits.
+    Returns the number of inserted, updated, deleted and unchanged rows.
+    """
+    table = model.__table__
+    primary_key = table.primary_key.columns.values()[0].name
+    value_columns = [column for column in frame.columns if column not in key]
+
+    # the CSV should not repeat a key, if it does the last row wins like it would on a re-scrape
+    incoming = frame.drop_duplicates(subset=key, keep="last").set_index(key, drop=False)
+    selected = [table.c[column] for column in dict.fromkeys([primary_key] + list(frame.columns))]
+    stored = pd.DataFrame(db.execute(select(*selected).where(*scope)).all(), columns=[column.name for column in selected])
+    stored = stored.drop_duplicates(subset=key, keep="first").set_index(key, drop=False)
+
+    new_keys = incoming.index.difference(stored.index)
+    gone_keys = stored.index.difference(incoming.index)
+    common_keys = incoming.index.intersection(stored.index)
+
+    # a stored row changed when any of its non key columns differs from the CSV, NULLs compare as None
+    incoming_values = nullsToNone(incoming.loc[common_keys, value_columns]).to_numpy()
+    stored_values = nullsToNone(stored.loc[common_keys, value_columns]).to_numpy()
+    changed_keys = common_keys[(incoming_values != stored_values).any(axis=1)] if value_columns else common_keys[:0]
+
+    bulkInsert(db, model, incoming.loc[new_keys].reset_index(drop=True))
+    if len(changed_keys):
+        changed = nullsToNone(incoming.loc[changed_keys, value_columns].reset_index(drop=True))
+        changed[primary_key] = stored.loc[changed_keys, primary_key].to_numpy()
+        db.execute(update(model), changed.to_dict("records"))
+    if len(gone_keys):
+        db.execute(delete(table).where(table.c[primary_key].in_(stored.loc[gone_keys, primary_key].tolist())))
+
+    return {
+        "inserted": len(new_keys),
+        "updated": len(changed_keys),
+        "deleted": len(gone_keys),
+        "unchanged": len(common_keys) - len(changed_keys),
+    }
+
+
+def importFrame(db: Session, model, frame, key, mode="incremental"):
+    """
+    Writes a cleaned CSV frame with the given import mode, returns the changed row counts.
+    Blocking Session code, the controllers run it with `await db.run_sync(importFrame, ...)`.
+    """
+    if mode == "replace":
+        deleted = db.query(model).delete()
+        inserted = bulkInsert(db, model, frame)
+        return {"inserted": inserted, "updated": 0, "deleted": deleted, "unchanged": 0}
+    return diffImport(db, model, frame, key)
@@ -0,0 +1,270 @@
+import os
+import threading
+from bisect import bisect_left
+import joblib
+import pandas as pd
+from MachineLearning.RollingStats import RollingStatsEngine, rollingFrame, ROLLING_COLS, ROLLING_FEATURES
+
+# opponent code used when a team isn't in the 2020-2022 training data
+DEFAULT_OPPONENT_CODE = 10
+
+# other names the same clubs go by (2025-26 schedule, fbref squad pages, full names)
+# mapped to the opponent names the model was trained on
+OPPONENT_ALIASES = {
+    "Brighton and Hove Albion": "Brighton",
+    "Brighton & Hove Albion": "Brighton",
+    "Manchester United": "Manchester Utd",
+    "Man United": "Manchester Utd",
+    "Man City": "Manchester City",
+    "Newcastle United": "Newcastle Utd",
+    "Sheffield United": "Sheffield Utd",
+    "Tottenham Hotspur": "Tottenham",
+    "Spurs": "Tottenham",
+    "West Bromwich Albion": "West Brom",
+    "West Ham United": "West Ham",
+    "Wolverhampton Wanderers": "Wolves",
+    "Leeds": "Leeds United",
+    "Leicester": "Leicester City",
+    "Norwich": "Norwich City",
+    "Nottingham Forest": "Nott'ham Forest",
+    "AFC Bournemouth": "Bournemouth",
+}
+
+# finds the first path that exists so this works both in Docker and locally
+def findDataFile(possible_paths, file_name):
+    for path in possible_paths:
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"{file_name} not found in expected locations. Tried: {possible_paths}")
+
+
+#function to load the 2020-2022 matches.csv used for training
+def loadHistoricalMatches():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # Try multiple paths in case running in Docker or locally
+    matches_path = findDataFile([
+        os.path.join(script_dir, "../../MachineLearning/matches.csv"),
+        os.path.join(script_dir, "../MachineLearning/matches.csv"),
+        "/app/MachineLearning/matches.csv",
+        "MachineLearning/matches.csv"
+    ], "matches.csv")
+
+    matches = pd.read_csv(matches_path, index_col=0)
+
+    # Preprocess 2020-2022 data
+    matches["date"] = pd.to_datetime(matches["date"])
+    matches["h/a"] = matches["venue"].astype("category").cat.codes
+    matches["opp"] = matches["opponent"].astype("category").cat.codes
+    matches["hour"] = matches["time"].str.replace(":.+", "", regex=True).astype("int")
+    matches["day"] = matches["date"].dt.dayofweek
+    matches["target"] = (matches["result"] == "W").astype("int")
+    return matches
+
+
+#function to load the opponent -> category code mapping saved with the models
+def loadOpponentCodes(matches):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        codes_path = findDataFile([
+            "/app/MachineLearning/models/opponent_codes.pkl",  # Docker path
+            os.path.join(script_dir, "../../MachineLearning/models/opponent_codes.pkl"),  # Local relative path
+            os.path.join(script_dir, "../MachineLearning/models/opponent_codes.pkl"),
+            "MachineLearning/models/opponent_codes.pkl"
+        ], "opponent_codes.pkl")
+        codes = joblib.load(codes_path)
+    except FileNotFoundError:
+        # same codes the training scripts get from astype("category").cat.codes
+        categories = matches["opponent"].astype("category").cat.categories
+        codes = {name: code for code, name in enumerate(categories)}
+
+    # lookups are case insensitive and also accept every alias of a name
+    lookup = {name.casefold(): int(code) for name, code in codes.items()}
+    for alias, name in OPPONENT_ALIASES.items():
+        if name.casefold() in lookup:
+            lookup.setdefault(alias.casefold(), lookup[name.casefold()])
+    return lookup
+
+
+#function to load the 2025-2026 schedule
+def load2025Schedule():
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    # Try multiple paths in case running in Docker or locally
+    schedule_path = findDataFile([
+        "/app/WebScraper/schedules_2025_2026.csv",  # Docker path
+        os.path.join(script_dir, "../../WebScraper/schedules_2025_2026.csv"),  # Local relative path
+        os.path.join(script_dir, "../WebScraper/schedules_2025_2026.csv"),
+        "WebScraper/schedules_2025_2026.csv"
+    ], "schedules_2025_2026.csv")
+
+    schedule_df = pd.read_csv(schedule_path)
+
+    # Filter completed matches only
+    completed = schedule_df[schedule_df['Result'].notna()].copy()
+    completed['date'] = pd.to_datetime(completed['Date'])
+    completed['venue'] = completed['Venue']
+    completed['result'] = completed['Result']
+    completed['gf'] = completed['GF']
+    completed['ga'] = completed['GA']
+    completed['opponent'] = completed['Opponent']
+    completed['team'] = completed['Team']
+
+    # Fix time format
+    completed['time'] = (
+        completed['Time']
+        .str.split('(').str[0]
+        .str.strip()
+        .str.split(' ').str[0]
+    )
+
+    # Add placeholder stats if missing, most new matches does not have detailed stats
+    for stat in ['sh', 'sot', 'dist', 'fk', 'pk', 'pkatt']:
+        if stat not in completed.columns:
+            completed[stat] = 0  # Average placeholder
+
+    return completed
+
+
+class FeatureStore:
+    """
+    Holds the rolling feature rows for every team so the predict path does not
+    re-read the CSVs and recompute rolling averages on every request.
+
+    The store is built once (at startup or on first use) with the vectorized
+    rollingFrame() and a RollingStatsEngine seeded with each team's latest
+    matches, so new results can be added with appendResult() in constant time.
+    invalidate() forces a full rebuild on the next lookup, e.g. when
+    /matches/import loads a new schedule.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.historical = None
+        self.historical_rolling = None
+        self.opponent_codes = {}
+        self.engine = RollingStatsEngine(ROLLING_COLS)
+        self.teams = set()
+        # team -> sorted list of completed match dates
+        self._completed_dates = {}
+        # team -> (sorted dates of rolling rows, rolling feature row per date)
+        self._rolling = {}
+        self.version = 0
+
+    @staticmethod
+    def _addResult(engine, completed_dates, rolling, team, date, values):
+        row = engine.append(team, values)
+        completed_dates.setdefault(team, []).append(date)
+        if row is not None:
+            dates, rows = rolling.setdefault(team, ([], []))
+            # readers don't take the lock and only read as many rows as there are dates,
+            # so the row goes in before its date
+            rows.append(row)
+            dates.append(date)
+
+    def build(self):
+        """Loads the CSVs and recomputes every team's rolling features"""
+        with self._lock:
+            self._build()
+
+    def _build(self):
+        # the 2020-2022 data never changes between imports so only load it once
+        if self.historical is None:
+            self.historical = loadHistoricalMatches()
+            self.historical_rolling = rollingFrame(self.historical)
+            self.opponent_codes = loadOpponentCodes(self.historical)
+
+        completed = load2025Schedule().sort_values(["team", "date"], kind="mergesort")
+
+        # build into fresh structures and swap them in so lookups never see a half built store
+        completed_dates = {
+            team: list(group["date"])
+            for team, group in completed.groupby("team", sort=False)
+        }
+        rolling = {
+            team: (list(group["date"]), list(group[ROLLING_FEATURES].to_numpy(dtype=float)))
+            for team, group in rollingFrame(completed).groupby("team", sort=False)
+        }
+        # only the last few results per team are needed to keep appending
+        engine = RollingStatsEngine(ROLLING_COLS)
+        engine.seed(completed)
+
+        self.engine, self._completed_dates, self._rolling = engine, completed_dates, rolling
+        self.teams = set(completed_dates)
+        self._loaded = True
+        self.version += 1
+
+    def invalidate(self):
+        """Marks the schedule features as stale so the next lookup rebuilds them"""
+        with self._lock:
+            self._loaded = False
+
+    def ensureLoaded(self):
+        if not self._loaded:
+            with self._lock:
+                # another request may have rebuilt it while we waited for the lock
+                if not self._loaded:
+                    self._build()
+
+    def appendResult(self, team, date, stats):
+        """
+        Adds a newly completed match for a team without rebuilding the store.
+        `stats` maps the names in ROLLING_COLS to values. A result on the team's
+        latest match date is already in the store and is skipped. Results older
+        than that, or without every stat, can't be appended to the window so the
+        store is rebuilt instead.
+        """
+        if not self._loaded:
+            return
+        date = pd.Timestamp(date)
+        with self._lock:
+            dates = self._completed_dates.get(team)
+            if dates and date == dates[-1]:
+                return
+            if (dates and date < dates[-1]) or any(stats.get(c) is None for c in ROLLING_COLS):
+                self._loaded = False
+                return
+            values = [float(stats[c]) for c in ROLLING_COLS]
+            self._addResult(self.engine, self._completed_dates, self._rolling, team, date, values)
+            self.teams.add(team)
+            self.version += 1
+
+    def getLatestFeatures(self, team, before):
+        """
+        Returns the most recent rolling feature row for a team dated strictly
+        before `before` as a dict, or None if the team has no such row.
+        Upcoming fixtures hit the O(1) fast path (latest row), past fixtures bisect.
+        """
+        self.ensureLoaded()
+        entry = self._rolling.get(team)
+        if entry is None:
+            return None
+        dates, rows = entry
+        # an append may land while we read, the first `count` dates all have their row
+        count = len(dates)
+        if count == 0:
+            return None
+        before = pd.Timestamp(before)
+        if dates[count - 1] < before:
+            idx = count - 1
+        else:
+            idx = bisect_left(dates, before, 0, count) - 1
+            if idx < 0:
+                return None
+        return dict(zip(ROLLING_FEATURES, rows[idx]))
+
+    def getOpponentCode(self, team):
+        """Category code the model knows a team by, exact name or alias match"""
+        self.ensureLoaded()
+        return self.opponent_codes.get(team.strip().casefold(), DEFAULT_OPPONENT_CODE)
+
+    def countCompletedBefore(self, team, before):
+        """Number of completed matches a team played before a given date"""
+        self.ensureLoaded()
+        dates = self._completed_dates.get(team)
+        if dates is None:
+            return 0
+        return bisect_left(dates, pd.Timestamp(before))
+
+
+featureStore = FeatureStore()
@@ -0,0 +1,188 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from fastapi import HTTPException
+import database
+from Controllers.BulkImport import IMPORT_MODES
+
+# finished jobs kept for GET /jobs/{id}, the oldest are forgotten first
+JOB_HISTORY_SIZE = int(os.getenv('JOB_HISTORY_SIZE', '100'))
+
+# the phases each import goes through, in order, used for the progress fraction
+IMPORT_PHASES = {
+    "teams": ["read", "clean", "write", "commit"],
+    "players": ["read", "clean", "write", "commit"],
+    "matches": ["read", "clean", "write", "standings", "commit", "predictions"],
+}
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+
+def utcNow():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class ImportJob:
+    """One submitted import: its state, the time spent in each phase and the row counts"""
+
+    def __init__(self, dataset, mode):
+        self.id = uuid.uuid4().hex
+        self.dataset = dataset
+        self.mode = mode
+        self.status = QUEUED
+        self.submitted_at = utcNow()
+        self.started_at = None
+        self.finished_at = None
+        self.coalesced = 0  # later submissions answered with this job
+        self.current_phase = None
+        self.phases = []
+        self.rows = {}
+        self.result = None
+        self.error = None
+        # problems in steps after the data was committed, the import itself still succeeded
+        self.warnings = []
+        self._started = None
+        self._finished = None
+
+    @contextmanager
+    def phase(self, name):
+        # times one step of the import, shown as the current phase while it runs
+        self.current_phase = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "seconds": round(time.perf_counter() - start, 4)})
+            self.current_phase = None
+
+    def toDict(self):
+        total = len(IMPORT_PHASES.get(self.dataset, [])) or 1
+        elapsed = None
+        if self._started is not None:
+            elapsed = round((self._finished or time.perf_counter()) - self._started, 4)
+        return {
+            "id": self.id,
+            "dataset": self.dataset,
+            "mode": self.mode,
+            "status": self.status,
+            "coalesced": self.coalesced,
+            "progress": {
+                "phase": self.current_phase,
+                "completed_phases": len(self.phases),
+                "total_phases": total,
+                "fraction": 1.0 if self.status == SUCCEEDED else round(min(len(self.phases) / total, 1.0), 2),
+            },
+            "rows": self.rows,
+            "phases": self.phases,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "seconds": elapsed,
+            "result": self.result,
+            "error": self.error,
+            "warnings": self.warnings,
+        }
+
+
+class ImportJobQueue:
+    """
+    Runs the CSV imports as background jobs on the event loop.
+
+    Each dataset has its own lane with at most one running and one waiting job.
+    Submitting while a job is waiting returns that job instead of queueing
+    another one, so a burst of scraper runs turns into a single import that
+    reads the newest CSV. A running job is never joined, its CSV may be older
+    than the one that was just written. Different datasets import side by side.
+    """
+
+    def __init__(self, history=JOB_HISTORY_SIZE):
+        self.history = history
+        self._jobs = OrderedDict()
+        self._waiting = {}
+        self._lanes = {}
+
+    def submit(self, dataset, mode, runner):
+        """
+        Queues `runner(db, job)` for the dataset, or returns the job already waiting for it.
+        """
+        if mode not in IMPORT_MODES:
+            raise HTTPException(status_code=400, detail=f"Invalid import mode '{mode}'. Available: {list(IMPORT_MODES)}")
+
+        waiting = self._waiting.get(dataset)
+        if waiting is not None:
+            waiting.coalesced += 1
+            # a replace leaves the table the same as an incremental import would, so it covers both
+            if mode == "replace":
+                waiting.mode = mode
+            return waiting
+
+        job = ImportJob(dataset, mode)
+        self._waiting[dataset] = job
+        self._remember(job)
+        lane = self._lanes.get(dataset)
+        if lane is None or lane.done():
+            self._lanes[dataset] = asyncio.create_task(self._drain(dataset, runner))
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def recent(self):
+        return [job.toDict() for job in reversed(self._jobs.values())]
+
+    async def shutdown(self):
+        # lets running and waiting imports finish so a restart never cuts a transaction short
+        lanes = [lane for lane in self._lanes.values() if not lane.done()]
+        if lanes:
+            await asyncio.gather(*lanes, return_exceptions=True)
+
+    def _remember(self, job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (QUEUED, RUNNING):
+                break
+            del self._jobs[oldest_id]
+
+    async def _drain(self, dataset, runner):
+        while dataset in self._waiting:
+            await self._run(self._waiting.pop(dataset), runner)
+
+    async def _run(self, job, runner):
+        job.status = RUNNING
+        job.started_at = utcNow()
+        job._started = time.perf_counter()
+        try:
+            async with database.AsyncSessionLocal() as db:
+                job.result = await runner(db, job)
+            job.status = SUCCEEDED
+        except HTTPException as e:
+            job.status, job.error = FAILED, e.detail
+        except Exception as e:
+            job.status, job.error = FAILED, str(e)
+            print(f" Import job {job.id} ({job.dataset}) failed: {e}")
+        finally:
+            job.current_phase = None
+            job.finished_at = utcNow()
+            job._finished = time.perf_counter()
+
+
+importJobs = ImportJobQueue()
+
+
+# the body of a 202 for an accepted import, Location is where to poll it
+def acceptedJob(response, job):
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job.toDict()
+
+
+# API call get request to get one import job
+def readJob(job_id: str):
+    job = importJobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import job {job_id} not found")
+    return job.toDict()
@@ -0,0 +1,49 @@
+from functools import lru_cache
+from typing import List
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+
+def jsonDefault(value):
+    # anything orjson can't encode on its own (dates are handled natively)
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+class FastJSONResponse(ORJSONResponse):
+    """
+    The app's default response class. Bodies that are already encoded bytes are
+    sent as they are, anything else goes through orjson instead of json.dumps.
+    """
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, default=jsonDefault, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def encodeRows(keys, rows):
+    """JSON array of row objects built straight from result tuples, no ORM instances or jsonable_encoder"""
+    return orjson.dumps([dict(zip(keys, row)) for row in rows], default=jsonDefault)
+
+
+def encodeColumns(keys, rows):
+    """{column: [values]} built from result tuples"""
+    values = list(zip(*rows)) if rows else [()] * len(keys)
+    return orjson.dumps({key: list(column) for key, column in zip(keys, values)}, default=jsonDefault)
+
+
+def encodeLines(keys, rows):
+    """One JSON object per line for NDJSON streams"""
+    return b"".join(orjson.dumps(dict(zip(keys, row)), default=jsonDefault) + b"\n" for row in rows)
+
+
+@lru_cache(maxsize=None)
+def listAdapter(model):
+    return TypeAdapter(List[model])
+
+
+def encodeModels(model, objects):
+    """Serializes ORM objects through a pydantic response model, read by attribute in pydantic-core"""
+    adapter = listAdapter(model)
+    return adapter.dump_json(adapter.validate_python(objects, from_attributes=True))
@@ -0,0 +1,63 @@
+import os
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+
+# fbref lists kickoffs in the venue's local time ("16:30 (08:30)" is 16:30 UK time)
+KICKOFF_TIMEZONE = ZoneInfo(os.getenv('KICKOFF_TIMEZONE', 'Europe/London'))
+# used when a fixture has no time yet, the same default the predictor always used
+DEFAULT_KICKOFF_TIME = "12:00"
+# how long after kickoff fbref has the final result, a fixture older than this without one is finished but not scraped yet
+MATCH_RESULT_DELAY = timedelta(hours=float(os.getenv('MATCH_RESULT_DELAY_HOURS', '2.5')))
+# fbref writes unplayed results as an empty cell, which pandas turned into "nan"
+UNPLAYED_RESULTS = (None, "", "nan")
+
+
+def utcNow():
+    """The current time as naive UTC, the way kickoffs are stored"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def isPlayed(result):
+    return result not in UNPLAYED_RESULTS
+
+
+def cleanKickoffTime(raw_time):
+    """Takes the local "HH:MM" out of values like "16:30 (08:30)", noon when missing"""
+    clean_time = raw_time.split("(")[0].strip() if raw_time else ""
+    if " " in clean_time:
+        clean_time = clean_time.split(" ")[0]
+    if not clean_time or ":" not in clean_time:
+        clean_time = DEFAULT_KICKOFF_TIME
+    return clean_time
+
+
+def toUtcKickoff(date, raw_time):
+    """Local fbref date and time strings to a naive UTC datetime, raises ValueError when unparseable"""
+    local = pd.to_datetime(f"{date} {cleanKickoffTime(raw_time)}").to_pydatetime()
+    return local.replace(tzinfo=KICKOFF_TIMEZONE).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def toLocalKickoff(kickoff):
+    """Naive UTC kickoff back to the naive local time the models were trained on"""
+    return kickoff.replace(tzinfo=timezone.utc).astimezone(KICKOFF_TIMEZONE).replace(tzinfo=None)
+
+
+def localDayStartUtc(day):
+    """Midnight at the start of a local calendar day, as naive UTC"""
+    return datetime.combine(day, time()).replace(tzinfo=KICKOFF_TIMEZONE).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def localDayRangeUtc(first_day, last_day):
+    """Half open UTC range covering the local days first_day..last_day"""
+    return localDayStartUtc(first_day), localDayStartUtc(last_day + timedelta(days=1))
+
+
+def kickoffSeries(dates, times):
+    """Vectorized toUtcKickoff for whole CSV columns, NaT where the date is missing or invalid"""
+    clean_times = times.astype(str).str.extract(r"^\s*(\d{1,2}:\d{2})", expand=False).fillna(DEFAULT_KICKOFF_TIME)
+    local = pd.to_datetime(dates.astype(str) + " " + clean_times, format="%Y-%m-%d %H:%M", errors="coerce")
+    # kickoffs never fall in the repeated hour when the clocks go back, take standard time if one ever does
+    utc = local.dt.tz_localize(KICKOFF_TIMEZONE, ambiguous=np.zeros(len(local), dtype=bool), nonexistent="shift_forward")
+    return utc.dt.tz_convert("UTC").dt.tz_localize(None)
@@ -0,0 +1,115 @@
+import os
+from fastapi import HTTPException, Response
+from fastapi.responses import StreamingResponse
+from Controllers.JsonEncoding import FastJSONResponse, encodeRows, encodeColumns, encodeLines
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# largest page a client can ask for with ?limit=
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+# rows fetched from the server side cursor per chunk when streaming NDJSON
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', '500'))
+
+# json: list of row objects, columns: {column: [values]}, ndjson: one row object per line, streamed
+LIST_FORMATS = ("json", "columns", "ndjson")
+
+
+def parseFields(model, fields):
+    """Turns ?fields=a,b,c into table columns, the primary key is always included for the cursor"""
+    table = model.__table__
+    primary_key = table.primary_key.columns.values()[0]
+    if not fields:
+        return list(table.columns)
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in table.columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}. Available: {list(table.columns.keys())}")
+    return [primary_key] + [table.columns[name] for name in dict.fromkeys(names) if name != primary_key.name]
+
+
+def parseCursor(column, after):
+    try:
+        return column.type.python_type(after)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid cursor '{after}'")
+
+
+def pageQuery(model, filters=(), fields=None, limit=None, after=None):
+    """Builds the select for one page, ordered by the primary key"""
+    columns = parseFields(model, fields)
+    primary_key = model.__table__.primary_key.columns.values()[0]
+
+    query = select(*columns).where(*filters).order_by(primary_key)
+    if after is not None:
+        query = query.where(primary_key > parseCursor(primary_key, after))
+    if limit is not None:
+        # one extra row tells us whether there is a next page
+        query = query.limit(limit + 1)
+    return query, primary_key
+
+
+async def streamRows(db: AsyncSession, query, limit=None):
+    """Yields NDJSON lines from a server side cursor, a partition at a time"""
+    result = await db.stream(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+    keys = list(result.keys())
+    remaining = limit
+    try:
+        async for partition in result.partitions():
+            if remaining is not None:
+                partition = partition[:remaining]
+                remaining -= len(partition)
+            yield encodeLines(keys, partition)
+            if remaining == 0:
+                break
+    finally:
+        # also runs when the client disconnects half way, so the cursor is never left open
+        await result.close()
+
+
+async def readPage(db: AsyncSession, model, filters=(), fields=None, limit=None, after=None, format="json"):
+    """
+    Keyset paginated read ordered by the primary key.
+
+    Only the requested columns are selected and the filters are applied in SQL.
+    `after` is the primary key of the last row of the previous page, so every page
+    is an index range scan no matter how deep the client pages.
+
+    format="json" encodes a list of row objects, "columns" a dict of column name to
+    values, both straight from the result tuples into bytes. "ndjson" returns a
+    StreamingResponse fed from a server side cursor, NDJSON clients page with the
+    key of the last line they received.
+    Returns the body and the cursor for the next page (None on the last page).
+    """
+    if format not in LIST_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format '{format}'. Available: {list(LIST_FORMATS)}")
+    query, primary_key = pageQuery(model, filters, fields, limit, after)
+
+    if format == "ndjson":
+        # fastapi 0.104 closes yield dependencies after the response is sent, so `db` stays open while streaming
+        return StreamingResponse(streamRows(db, query, limit), media_type="application/x-ndjson"), None
+
+    result = await db.execute(query)
+    keys = list(result.keys())
+    rows = result.all()
+    next_after = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_after = rows[-1]._mapping[primary_key.name]
+
+    if format == "columns":
+        return encodeColumns(keys, rows), next_after
+    return encodeRows(keys, rows), next_after
+
+
+def pageHeaders(next_after):
+    # the body stays a plain list, the next cursor travels in a header
+    return {"X-Next-Cursor": str(next_after)} if next_after is not None else {}
+
+
+def pageResponse(body, next_after):
+    """Wraps what readPage returned in a response carrying the next cursor"""
+    if isinstance(body, Response):
+        body.headers.update(pageHeaders(next_after))
+        return body
+    return FastJSONResponse(body, headers=pageHeaders(next_after))
@@ -1,12 +1,19 @@
-from fastapi import HTTPException, Depends
-from pydantic import BaseModel
-from Models.team import Team  
-from Models.player import Player
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
 from Models.match import Match
-from database import get_db
+from Controllers.FeatureStore import featureStore, ROLLING_COLS
+from Controllers.ResponseCache import tableVersions
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from Controllers.Kickoff import isPlayed, toUtcKickoff, localDayStartUtc, localDayRangeUtc, utcNow, UNPLAYED_RESULTS, MATCH_RESULT_DELAY
+from Controllers.ListQuery import readPage
+from Controllers.ImportJobs import ImportJob
+from Controllers.BulkImport import importFrame, cleanFrame, MATCH_COLUMNS, MATCH_KEY, IMPORT_MODES
+from Controllers.StandingsController import refreshStandings, bumpStandingVersions
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 class MatchBase(BaseModel):
     date: str
@@ -14,9 +21,9 @@ class MatchBase(BaseModel):
     round: str
     day: str
     venue: str
-    result: str
-    gf: int = 0
-    ga: int = 0
+    result: Optional[str] = None
+    gf: Optional[int] = 0
+    ga: Optional[int] = 0
     opponent: str
     xg: float = 0.00
     xga: float = 0.00
@@ -27,37 +34,86 @@ class MatchBase(BaseModel):
     oppFormation: str
     referee: str
     team_name: str
+    # shooting stats only feed the rolling features, they aren't stored on the match
+    sh: Optional[float] = None
+    sot: Optional[float] = None
+    dist: Optional[float] = None
+    fk: Optional[float] = None
+    pk: Optional[float] = None
+    pkatt: Optional[float] = None
 
-# API call get request to get all matches
-def readAllMatches (db:Session):
-    matches = db.query(Match).all()
-    if matches is None:
-        raise HTTPException(status_code=404, detail="No matches found")
-    return matches
+# what the match routes send back, read straight off the ORM row
+class MatchResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    match_id: int
+    kickoff: Optional[datetime] = None
+    date: Optional[str] = None
+    time: Optional[str] = None
+    round: Optional[str] = None
+    day: Optional[str] = None
+    venue: Optional[str] = None
+    result: Optional[str] = None
+    gf: Optional[int] = None
+    ga: Optional[int] = None
+    opponent: Optional[str] = None
+    xg: Optional[float] = None
+    xga: Optional[float] = None
+    poss: Optional[float] = None
+    attendance: Optional[int] = None
+    captain: Optional[str] = None
+    formation: Optional[str] = None
+    oppFormation: Optional[str] = None
+    referee: Optional[str] = None
+    team_name: Optional[str] = None
+
+def parseDay(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date '{value}', expected YYYY-MM-DD")
+
+# API call get request to get all matches, optionally filtered, projected and paged
+async def readAllMatches(db: AsyncSession, team: str = None, round: str = None, venue: str = None, date_from: str = None,
+                   date_to: str = None, fields: str = None, limit: int = None, after: str = None, format: str = "json"):
+    filters = []
+    if team:
+        filters.append(Match.team_name == team)
+    if round:
+        # ?round=5 is short for ?round=Matchweek 5
+        filters.append(Match.round == (f"Matchweek {round}" if round.isdigit() else round))
+    if venue:
+        filters.append(Match.venue == venue)
+    # the range is in local calendar days and runs over the kickoff index
+    if date_from:
+        filters.append(Match.kickoff >= localDayStartUtc(parseDay(date_from)))
+    if date_to:
+        filters.append(Match.kickoff < localDayStartUtc(parseDay(date_to) + timedelta(days=1)))
+    return await readPage(db, Match, filters, fields, limit, after, format)
 
 # API call get request to get a single match by match_id
-def readMatchById(match_id: int, db: Session):
-    match = db.query(Match).filter(Match.match_id == match_id).first()
+async def readMatchById(match_id: int, db: AsyncSession):
+    match = await db.get(Match, match_id)
     if not match:
         raise HTTPException(status_code=404, detail=f"Match with id {match_id} not found")
     return match
 
 # API call get request to get all matches for a team
-async def readMatchesPerTeam(team_name: str, db:Session):
-    matches = db.query(Match).filter(Match.team_name == team_name).all()
+async def readMatchesPerTeam(team_name: str, db: AsyncSession):
+    matches = (await db.scalars(select(Match).where(Match.team_name == team_name).order_by(Match.kickoff))).all()
     if not matches:
         raise HTTPException(status_code=404, detail=f"No matches found for team: {team_name}")
     return matches
 
 # API call get request to get all matches for a specific week
-async def getMatchesPerWeek(weekNumber: int, db:Session):
-    matches = db.query(Match).filter(Match.round == f"Matchweek {weekNumber}", Match.venue == "Home").all()
+async def getMatchesPerWeek(weekNumber: int, db: AsyncSession):
+    matches = (await db.scalars(select(Match).where(Match.round == f"Matchweek {weekNumber}", Match.venue == "Home"))).all()
     if matches is None:
         raise HTTPException(status_code=404, detail="No Matches found this week")
     return matches
 
 # API call get request to get matches for current week
-async def matchesCurrentWeek(db: Session):
+async def matchesCurrentWeek(db: AsyncSession):
     today = datetime.now().date()  
 
     # Calculate start of current week (Monday)
@@ -66,63 +122,81 @@ async def matchesCurrentWeek(db: Session):
     # Calculate end of current week (Sunday)
     endOfWeek = startOfWeek + timedelta(days=6)
     
-    # Query matches within the current week
-    matches = db.query(Match).filter(Match.date >= str(startOfWeek), Match.date <= str(endOfWeek), Match.venue == "Home", Match.result == "nan").all()
+    # Query unplayed home matches kicking off within the current week
+    weekStart, weekEnd = localDayRangeUtc(startOfWeek, endOfWeek)
+    matches = (await db.scalars(
+        select(Match).where(Match.kickoff >= weekStart, Match.kickoff < weekEnd, Match.venue == "Home", Match.result.is_(None)).order_by(Match.kickoff)
+    )).all()
     if not matches:
         raise HTTPException(status_code=404, detail="No matches found for current week")
     return matches
 
+# API call get request to get the teams with finished fixtures that have no result in the database yet
+# the scraper only fetches these teams' pages between matchdays
+async def readTeamsAwaitingResults(db: AsyncSession, now: datetime = None):
+    finished_before = (now or utcNow()) - MATCH_RESULT_DELAY
+    rows = (await db.execute(
+        select(Match.team_name, func.count().label("fixtures"), func.min(Match.kickoff).label("oldest_kickoff"))
+        .where(Match.kickoff < finished_before, Match.result.is_(None))
+        .group_by(Match.team_name)
+        .order_by(Match.team_name)
+    )).all()
+    return {"finished_before": finished_before, "teams": [dict(row._mapping) for row in rows]}
+
 # Import league table from CSV and insert into database
-async def importMatches(csv_path: str, db: Session):
+async def importMatches(csv_path: str, db: AsyncSession, mode: str = "incremental", job: ImportJob = None):
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid import mode '{mode}'. Available: {list(IMPORT_MODES)}")
+    # outside the job queue the phases are still timed, they just aren't reported
+    if job is None:
+        job = ImportJob("matches", mode)
     try:
         # Read CSV file
-        df = pd.read_csv(csv_path)
-        
-        # Clear existing data
-        db.query(Match).delete()
-        db.commit()
+        with job.phase("read"):
+            df = pd.read_csv(csv_path)
+        job.rows["read"] = len(df)
+        with job.phase("clean"):
+            frame = cleanFrame(df, MATCH_COLUMNS)
 
-        # Insert each row into database
-        for _, row in df.iterrows():
-            tableEntry = Match(
-                date=str(row.get('Date', '')),
-                time=str(row.get('Time', '')),
-                round=str(row.get('Round', '')),
-                day=str(row.get('Day', '')),
-                venue=str(row.get('Venue', '')),
-                result=str(row.get('Result', '')),
-                gf=int(row.get('GF', 0)) if pd.notna(row.get('GF', 0)) else 0,
-                ga=int(row.get('GA', 0)) if pd.notna(row.get('GA', 0)) else 0,
-                opponent=str(row.get('Opponent', '')),
-                xg=float(row.get('xG', 0.00)) if pd.notna(row.get('xG', 0.00)) else 0.00,
-                xga=float(row.get('xGA', 0.00)) if pd.notna(row.get('xGA', 0.00)) else 0.00,
-                poss=float(row.get('Poss', 0.00)) if pd.notna(row.get('Poss', 0.00)) else 0.00,
-                attendance=int(row.get('Attendance', 0)) if pd.notna(row.get('Attendance', 0)) else 0,
-                captain=str(row.get('Captain', '')),
-                formation=str(row.get('Formation', '')),
-                oppFormation=str(row.get('Opp Formation', '')),
-                referee=str(row.get('Referee', '')),
-                team_name=str(row.get('Team', ''))
-            )
-            db.add(tableEntry)
-        
-        db.commit()
-        return {"message": f"Successfully imported {len(df)} teams into database"}
+        # Clean every column at once, then write only the rows that changed (or everything
+        # in replace mode) in a single transaction so readers never see an empty table
+        with job.phase("write"):
+            changes = await db.run_sync(importFrame, Match, frame, MATCH_KEY, mode)
+        job.rows.update(changes)
+        # new results move the table, the snapshots are updated in the same transaction
+        with job.phase("standings"):
+            standings = await db.run_sync(refreshStandings)
+        with job.phase("commit"):
+            await db.commit()
+        bumpStandingVersions(standings)
+
+        # the schedule changed so the cached rolling features and responses are stale
+        if changes["inserted"] or changes["updated"] or changes["deleted"]:
+            featureStore.invalidate()
+            tableVersions.bump(Match.__tablename__)
+        return {"message": f"Successfully imported {len(df)} teams into database", "mode": mode, **changes, "standings": standings}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error importing table: {str(e)}")
 
 # API call post request to add a match to the database
-async def createMatch(match: MatchBase, db: Session):
+async def createMatch(match: MatchBase, db: AsyncSession):
+    try:
+        kickoff = toUtcKickoff(match.date, match.time)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid date or time: '{match.date} {match.time}'")
+    played = isPlayed(match.result)
+
     dbMatch = Match(
+        kickoff=kickoff,
         date=match.date,
         time=match.time,
         round=match.round,
         day=match.day,
         venue=match.venue,
-        result=match.result,
-        gf=match.gf,
-        ga=match.ga,
+        result=match.result if played else None,
+        gf=match.gf if played else None,
+        ga=match.ga if played else None,
         opponent=match.opponent,
         xg=match.xg,
         xga=match.xga,
@@ -135,6 +209,38 @@ async def createMatch(match: MatchBase, db: Session):
         team_name=match.team_name
     )
     db.add(dbMatch)
-    db.commit()
-    db.refresh(dbMatch)
-    return dbMatch
\ No newline at end of file
+    standings = None
+    if played:
+        await db.flush()
+        standings = await db.run_sync(refreshStandings)
+    await db.commit()
+    await db.refresh(dbMatch)
+    tableVersions.bump(Match.__tablename__)
+    if standings:
+        bumpStandingVersions(standings)
+
+    # a finished match only moves that team's rolling window forward by one
+    if played:
+        featureStore.appendResult(match.team_name, match.date, {c: getattr(match, c) for c in ROLLING_COLS})
+    return dbMatch
+
+# rows stored before the kickoff column existed get their kickoff filled in and the old
+# "nan" result sentinel replaced by NULL, runs at startup and does nothing once migrated
+def backfillMatchColumns(bind):
+    with Session(bind) as db:
+        cleared = db.query(Match).filter(Match.result.in_([r for r in UNPLAYED_RESULTS if r is not None])).update(
+            {Match.result: None, Match.gf: None, Match.ga: None}, synchronize_session=False)
+
+        kickoffs = []
+        for match_id, match_date, match_time in db.query(Match.match_id, Match.date, Match.time).filter(Match.kickoff.is_(None)):
+            try:
+                kickoffs.append({"match_id": match_id, "kickoff": toUtcKickoff(match_date, match_time)})
+            except (TypeError, ValueError):
+                print(f" Could not work out the kickoff of match {match_id}: '{match_date} {match_time}'")
+        if kickoffs:
+            db.execute(update(Match), kickoffs)
+        db.commit()
+
+    if cleared or kickoffs:
+        tableVersions.bump(Match.__tablename__)
+    return {"results_cleared": cleared, "kickoffs_filled": len(kickoffs)}
\ No newline at end of file
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+from MachineLearning.CompiledForest import compileForest
+
+# how much memory loaded models may use before the least recently used ones get unloaded
+MODEL_MEMORY_BUDGET_MB = float(os.getenv('MODEL_MEMORY_BUDGET_MB', '512'))
+# random forests are flattened into NumPy arrays at load time and scored with those instead of sklearn
+USE_COMPILED_FOREST = os.getenv('USE_COMPILED_FOREST', 'true').lower() in ('1', 'true', 'yes')
+
+
+# finds the directory holding the saved models - works in Docker and locally
+def findModelsDir(file_name):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(script_dir)
+    possible_models_dirs = [
+        "/app/MachineLearning/models",  # Docker path
+        os.path.join(parent_dir, "../MachineLearning/models"),  # Local relative path
+        os.path.join(script_dir, "../MachineLearning/models"),
+        "MachineLearning/models"
+    ]
+    for path in possible_models_dirs:
+        if os.path.exists(os.path.join(path, file_name)):
+            return path
+    raise FileNotFoundError(f"Model directory not found. Tried: {possible_models_dirs}")
+
+
+class LoadedModel:
+    """A model with its predictors and metrics plus what it cost to load"""
+
+    def __init__(self, name, model, predictors, metrics, size_bytes, load_seconds, compiled=None):
+        self.name = name
+        self.model = model
+        self.compiled = compiled  # CompiledForest for random forests, None otherwise
+        self.predictors = predictors
+        self.metrics = metrics
+        self.size_bytes = size_bytes
+        self.load_seconds = load_seconds
+
+
+class ModelRegistry:
+    """
+    Loads the models described in `model_info` on demand and keeps them in memory.
+
+    Loading is single-flight: concurrent first requests for the same model wait
+    for one load instead of each unpickling the file. Models are kept in LRU
+    order and the least recently used ones are unloaded once the total size of
+    the loaded model files goes over the memory budget. all_metrics.pkl and the
+    predictor lists are small and shared, so they are loaded once and kept.
+    """
+
+    def __init__(self, model_info, memory_budget_mb=MODEL_MEMORY_BUDGET_MB):
+        self.model_info = model_info
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self._models = OrderedDict()
+        self._load_locks = {}
+        self._shared = {}
+        self.loads = 0
+        self.evictions = 0
+
+    def _loadShared(self, models_dir, file_name):
+        # metrics and predictor lists are shared between models, load each file once
+        with self._lock:
+            if file_name not in self._shared:
+                self._shared[file_name] = joblib.load(os.path.join(models_dir, file_name))
+            return self._shared[file_name]
+
+    def _load(self, name):
+        model_config = self.model_info[name]
+        models_dir = findModelsDir(model_config["file"])
+        model_path = os.path.join(models_dir, model_config["file"])
+
+        print(f" Loading model: {model_config['name']}")
+        print(f"   File: {model_path}")
+
+        start = time.perf_counter()
+        model = joblib.load(model_path)
+        predictors = self._loadShared(models_dir, f"{model_config['predictors_key']}.pkl")
+        all_metrics = self._loadShared(models_dir, "all_metrics.pkl")
+
+        metrics_key = model_config.get("metrics_key", name)
+        if metrics_key not in all_metrics:
+            raise KeyError(f"Model '{metrics_key}' not found in metrics file. Available: {list(all_metrics.keys())}")
+        metrics = all_metrics[metrics_key]
+
+        # Validate metrics structure
+        if 'accuracy' not in metrics or 'precision' not in metrics:
+            raise KeyError(f"Metrics for '{name}' missing required keys. Found: {list(metrics.keys())}")
+
+        compiled = None
+        if USE_COMPILED_FOREST and isinstance(model, RandomForestClassifier):
+            compiled = compileForest(model)
+
+        print(f" Model loaded successfully!")
+        print(f"   Accuracy: {metrics['accuracy']:.4f}, Precision: {metrics['precision']:.4f}")
+
+        # the pickle size is a close enough estimate of the model's memory use
+        return LoadedModel(name, model, predictors, metrics, os.path.getsize(model_path), time.perf_counter() - start, compiled)
+
+    def _evict(self, keep):
+        while self.loadedBytes() > self.memory_budget and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            print(f" Unloading model: {oldest}")
+            del self._models[oldest]
+            self.evictions += 1
+
+    def get(self, name):
+        """Returns the LoadedModel for `name`, loading it on first use"""
+        if name not in self.model_info:
+            raise ValueError(f"Invalid model '{name}'. Available: {list(self.model_info.keys())}")
+
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is not None:
+                self._models.move_to_end(name)
+                return loaded
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # only one thread loads a given model, the others wait here and reuse its result
+        with load_lock:
+            with self._lock:
+                loaded = self._models.get(name)
+                if loaded is not None:
+                    self._models.move_to_end(name)
+                    return loaded
+
+            loaded = self._load(name)
+
+            with self._lock:
+                self._models[name] = loaded
+                self.loads += 1
+                self._evict(keep=name)
+            return loaded
+
+    def loadedBytes(self):
+        return sum(loaded.size_bytes for loaded in self._models.values())
+
+    def unload(self, name):
+        with self._lock:
+            self._models.pop(name, None)
+
+    def status(self):
+        with self._lock:
+            return {
+                "loaded": [
+                    {
+                        "model": loaded.name,
+                        "size_bytes": loaded.size_bytes,
+                        "load_seconds": round(loaded.load_seconds, 4),
+                        "compiled": loaded.compiled is not None,
+                    }
+                    for loaded in self._models.values()
+                ],
+                "loaded_bytes": self.loadedBytes(),
+                "memory_budget_bytes": self.memory_budget,
+                "loads": self.loads,
+                "evictions": self.evictions,
+            }
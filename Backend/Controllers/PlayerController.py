@@ -1,9 +1,15 @@
 from fastapi import HTTPException, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
 from Models.team import Team  
 from Models.player import Player
 from database import get_db
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from Controllers.ListQuery import readPage
+from Controllers.ResponseCache import tableVersions
+from Controllers.ImportJobs import ImportJob
+from Controllers.BulkImport import importFrame, cleanFrame, PLAYER_COLUMNS, PLAYER_KEY, IMPORT_MODES
 import pandas as pd
 
 class PlayerBase(BaseModel):
@@ -42,78 +48,93 @@ class PlayerBase(BaseModel):
     expectedNonPenaltyGoalsAndAssistsPer90: float = 0.00
     team_name: str
 
-# API call get request to get all players in the premier league
-def readAllPlayers(db: Session):
-    players = db.query(Player).all()
-    if players is None:
-        raise HTTPException(status_code=404, detail="No players found")
-    return players
+# what the player routes send back, read straight off the ORM row
+class PlayerResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: Optional[str] = None
+    nation: Optional[str] = None
+    position: Optional[str] = None
+    age: Optional[float] = None
+    matchesPlayed: Optional[int] = None
+    starts: Optional[int] = None
+    minutes: Optional[int] = None
+    minutesPerMatch: Optional[float] = None
+    goals: Optional[int] = None
+    assists: Optional[int] = None
+    goalsAndAssists: Optional[float] = None
+    nonPenaltyGoals: Optional[int] = None
+    penaltyGoals: Optional[int] = None
+    penaltyAttempts: Optional[int] = None
+    yellowCards: Optional[int] = None
+    redCards: Optional[int] = None
+    expectedGoals: Optional[float] = None
+    expectedNonPenaltyGoals: Optional[float] = None
+    expectedAssists: Optional[float] = None
+    expectedNonPenaltyGoalsAndAssists: Optional[float] = None
+    progressiveCarries: Optional[int] = None
+    progessivePasses: Optional[int] = None
+    progessivePassesReceived: Optional[int] = None
+    goalsPer90: Optional[float] = None
+    assistsPer90: Optional[float] = None
+    goalsAndAssistsPer90: Optional[float] = None
+    nonPenaltyGoalsPer90: Optional[float] = None
+    nonPenaltyGoalsAndAssistsPer90: Optional[float] = None
+    expectedGoalsPer90: Optional[float] = None
+    expectedAssistsPer90: Optional[float] = None
+    expectedGoalsAndAssistsPer90: Optional[float] = None
+    expectedNonPenaltyGoalsPer90: Optional[float] = None
+    expectedNonPenaltyGoalsAndAssistsPer90: Optional[float] = None
+    team_name: Optional[str] = None
+
+# API call get request to get all players in the premier league, optionally filtered, projected and paged
+async def readAllPlayers(db: AsyncSession, team: str = None, position: str = None, fields: str = None, limit: int = None,
+                   after: str = None, format: str = "json"):
+    filters = []
+    if team:
+        filters.append(Player.team_name == team)
+    if position:
+        # players can have more than one position, e.g. "FW,MF"
+        filters.append(Player.position.contains(position))
+    return await readPage(db, Player, filters, fields, limit, after, format)
 
 # API call get request to get all players from a specific team
-async def readPlayersPerTeam(team_name: str, db: Session):
-    players = db.query(Player).filter(Player.team_name == team_name).all()
+async def readPlayersPerTeam(team_name: str, db: AsyncSession):
+    players = (await db.scalars(select(Player).where(Player.team_name == team_name))).all()
     if not players:
         raise HTTPException(status_code=404, detail=f"No players found for team: {team_name}")
     return players
 
 # Import league table from CSV and insert into database
-async def importPlayers(csv_path: str, db: Session):
+async def importPlayers(csv_path: str, db: AsyncSession, mode: str = "incremental", job: ImportJob = None):
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid import mode '{mode}'. Available: {list(IMPORT_MODES)}")
+    # outside the job queue the phases are still timed, they just aren't reported
+    if job is None:
+        job = ImportJob("players", mode)
     try:
-        df = pd.read_csv(csv_path)
-        
-        # Clear existing data
-        db.query(Player).delete()
-        db.commit()
+        with job.phase("read"):
+            df = pd.read_csv(csv_path)
+        job.rows["read"] = len(df)
+        with job.phase("clean"):
+            frame = cleanFrame(df, PLAYER_COLUMNS)
 
-        # Insert each row into database
-        for _, row in df.iterrows():
-            age_raw = str(row.get('Age', "0"))
-            tableEntry = Player(
-                name=str(row.get('Player', '')),
-                nation=str(row.get('Nation', '')),
-                position=str(row.get('Pos', '')),
-                age = float(age_raw.split("-")[0] if age_raw and age_raw[0].isdigit() else 0),
-                matchesPlayed= int(row.get('MP', 0)) if pd.notna(row.get('MP', 0)) else 0,
-                starts= int(row.get('Starts', 0)) if pd.notna(row.get('Starts', 0)) else 0,
-                minutes = int(float(row.get('Min', 0))) if pd.notna(row.get('Min', None)) else 0,
-                minutesPerMatch=float(row.get('90s', 0.00)) if pd.notna(row.get('90s', 0.00)) else 0.00,
-                goals=int(float(row.get('Gls', 0))) if pd.notna(row.get('Gls', 0)) else 0,
-                assists=int(float(row.get('Ast', 0))) if pd.notna(row.get('Ast', 0)) else 0,
-                goalsAndAssists=float(row.get('G+A', 0.00)) if pd.notna(row.get('G+A', 0.00)) else 0.00,
-                nonPenaltyGoals=int(float(row.get('G-PK', 0))) if pd.notna(row.get('G-PK', 0)) else 0,
-                penaltyGoals=int(float(row.get('PK', 0))) if pd.notna(row.get('PK', 0)) else 0,
-                penaltyAttempts=int(float(row.get('PKatt', 0))) if pd.notna(row.get('PKatt', 0)) else 0,
-                yellowCards=int(float(row.get('CrdY', 0))) if pd.notna(row.get('CrdY', 0)) else 0,
-                redCards=int(float(row.get('CrdR', 0))) if pd.notna(row.get('CrdR', 0)) else 0,
-                expectedGoals=float(row.get('xG', 0.00)) if pd.notna(row.get('xG', 0.00)) else 0.00,
-                expectedNonPenaltyGoals=float(row.get('npxG', 0.00)) if pd.notna(row.get('npxG', 0.00)) else 0.00,
-                expectedAssists=float(row.get('xAG', 0.00)) if pd.notna(row.get('xAG', 0.00)) else 0.00,
-                expectedNonPenaltyGoalsAndAssists=float(row.get('npxG+xAG', 0.00)) if pd.notna(row.get('npxG+xAG', 0.00)) else 0.00,
-                progressiveCarries=int(float(row.get('PrgC', 0))) if pd.notna(row.get('PrgC', 0)) else 0,
-                progessivePasses=int(float(row.get('PrgP', 0))) if pd.notna(row.get('PrgP', 0)) else 0,
-                progessivePassesReceived=int(float(row.get('PrgR', 0))) if pd.notna(row.get('PrgR', 0)) else 0,
-                goalsPer90=float(row.get('Gls', 0.00)) if pd.notna(row.get('Gls', 0.00)) else 0.00,
-                assistsPer90=float(row.get('Ast', 0.00)) if pd.notna(row.get('Ast', 0.00)) else 0.00,
-                goalsAndAssistsPer90=float(row.get('G+A', 0.00)) if pd.notna(row.get('G+A', 0.00)) else 0.00,
-                nonPenaltyGoalsPer90=float(row.get('G-PK', 0.00)) if pd.notna(row.get('G-PK', 0.00)) else 0.00,
-                nonPenaltyGoalsAndAssistsPer90=float(row.get('G+A-PK', 0.00)) if pd.notna(row.get('G+A-PK', 0.00)) else 0.00,
-                expectedGoalsPer90=float(row.get('xG', 0.00)) if pd.notna(row.get('xG', 0.00)) else 0.00,
-                expectedAssistsPer90=float(row.get('xAG', 0.00)) if pd.notna(row.get('xAG', 0.00)) else 0.00,
-                expectedGoalsAndAssistsPer90=float(row.get('xG+xAG', 0.00)) if pd.notna(row.get('xG+xAG', 0.00)) else 0.00,
-                expectedNonPenaltyGoalsPer90=float(row.get('npxG', 0.00)) if pd.notna(row.get('npxG', 0.00)) else 0.00,
-                expectedNonPenaltyGoalsAndAssistsPer90=float(row.get('npxG+xAG', 0.00)) if pd.notna(row.get('npxG+xAG', 0.00)) else 0.00,
-                team_name=str(row.get('Team', ''))
-            )
-            db.add(tableEntry)
-        
-        db.commit()
-        return {"message": f"Successfully imported {len(df)} players into database"}
+        # Only new, changed or removed players are written, all in one transaction
+        with job.phase("write"):
+            changes = await db.run_sync(importFrame, Player, frame, PLAYER_KEY, mode)
+        job.rows.update(changes)
+        with job.phase("commit"):
+            await db.commit()
+        if changes["inserted"] or changes["updated"] or changes["deleted"]:
+            tableVersions.bump(Player.__tablename__)
+        return {"message": f"Successfully imported {len(df)} players into database", "mode": mode, **changes}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error importing table: {str(e)}")
 
 # API call post request to add a player to the database
-async def createPlayer(player: PlayerBase, db: Session):
+async def createPlayer(player: PlayerBase, db: AsyncSession):
     dbPlayer = Player(
         name=player.name,
         nation=player.nation,
@@ -152,6 +173,7 @@ async def createPlayer(player: PlayerBase, db: Session):
         team_name=player.team_name
     )
     db.add(dbPlayer)
-    db.commit()
-    db.refresh(dbPlayer)
+    await db.commit()
+    await db.refresh(dbPlayer)
+    tableVersions.bump(Player.__tablename__)
     return dbPlayer
\ No newline at end of file
@@ -1,14 +1,20 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
 import pandas as pd
-import os
-import joblib
-from sqlalchemy.orm import Session
+import numpy as np
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from Models.prediction import Prediction
-from Controllers.MatchController import MatchBase
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, precision_score
-from datetime import datetime
+from Models.match import Match
+from Controllers.MatchController import MatchBase, getMatchesPerWeek
+from Controllers.FeatureStore import featureStore, ROLLING_FEATURES
+from Controllers.PredictionCache import predictionCache
+from Controllers.ModelRegistry import ModelRegistry
+from Controllers.PredictionExecutor import predictionExecutor
+from Controllers.ResponseCache import tableVersions
+from Controllers.Kickoff import cleanKickoffTime, toLocalKickoff
+from MachineLearning.CompiledForest import CompiledForest
 
 # ============================================
 # MODEL CONFIGURATION - CHANGE THIS TO SWITCH MODELS
@@ -29,6 +35,7 @@ MODEL_INFO = {
         "name": "Basic Random Forest",
         "file": "rf_basic.pkl",
         "predictors_key": "basic_predictors",
+        "metrics_key": "basic_rf",  # saved under a different name in all_metrics.pkl
         "uses_rolling": False
     },
     "rf_rolling": {
@@ -57,451 +64,395 @@ MODEL_INFO = {
     }
 }
 
-# Global cache for model
-_cached_model = None
-_cached_predictors = None
-_cached_metrics = None
-_cached_model_name = None
+# Models are loaded on first use and kept by the registry, any model above can be picked per request
+modelRegistry = ModelRegistry(MODEL_INFO)
 
 # Function for loading trained models so we can test different models with the predictor website
-def load_trained_model():
-    """Load the pre-trained model based on SELECTED_MODEL (loads once, cached)"""
-    global _cached_model, _cached_predictors, _cached_metrics, _cached_model_name
-    
-    # Check if we need to reload (model changed)
-    if _cached_model is not None and _cached_model_name == SELECTED_MODEL:
-        # Return the specific model's metrics, not the full dictionary
-        if SELECTED_MODEL not in _cached_metrics:
-            raise KeyError(f"Model '{SELECTED_MODEL}' not found in cached metrics. Available: {list(_cached_metrics.keys())}")
-        
-        model_metrics = _cached_metrics[SELECTED_MODEL]
-        
-        # Validate metrics structure
-        if 'accuracy' not in model_metrics or 'precision' not in model_metrics:
-            raise KeyError(f"Cached metrics for '{SELECTED_MODEL}' missing required keys. Found: {list(model_metrics.keys())}")
-        
-        return _cached_model, _cached_predictors, model_metrics
-    
-    # Clear cache if model changed
-    if _cached_model_name != SELECTED_MODEL:
-        _cached_model = None
-        _cached_predictors = None
-        _cached_metrics = None
-    
+def load_trained_model(model_name=None):
+    """Load a pre-trained model (defaults to SELECTED_MODEL), cached by the model registry"""
+    model_name = model_name or SELECTED_MODEL
     try:
-        # Validate selected model
-        if SELECTED_MODEL not in MODEL_INFO:
-            raise ValueError(f"Invalid model '{SELECTED_MODEL}'. Available: {list(MODEL_INFO.keys())}")
-        
-        model_config = MODEL_INFO[SELECTED_MODEL]
-        
-        # Get path to saved models - try multiple paths for Docker and local
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.dirname(script_dir)
-        possible_models_dirs = [
-            "/app/MachineLearning/models",  # Docker path
-            os.path.join(parent_dir, "../MachineLearning/models"),  # Local relative path
-            os.path.join(script_dir, "../MachineLearning/models"),
-            "MachineLearning/models"
-        ]
-        
-        models_dir = None
-        for path in possible_models_dirs:
-            test_path = os.path.join(path, model_config["file"])
-            if os.path.exists(test_path):
-                models_dir = path
-                break
-        
-        if not models_dir:
-            raise FileNotFoundError(f"Model directory not found. Tried: {possible_models_dirs}")
-        
-        # Load model based on SELECTED_MODEL
-        model_path = os.path.join(models_dir, model_config["file"])
-        
-        # Determine predictors file based on model config
-        if model_config["uses_rolling"]:
-            predictors_path = os.path.join(models_dir, "rolling_predictors.pkl")
-        else:
-            predictors_path = os.path.join(models_dir, "basic_predictors.pkl")
-        
-        metrics_path = os.path.join(models_dir, "all_metrics.pkl")
-        
-        print(f" Loading model: {model_config['name']}")
-        print(f"   File: {model_path}")
-        
-        _cached_model = joblib.load(model_path)
-        _cached_predictors = joblib.load(predictors_path)
-        _cached_metrics = joblib.load(metrics_path)
-        _cached_model_name = SELECTED_MODEL
-        
-        # Get metrics for this model
-        if SELECTED_MODEL not in _cached_metrics:
-            raise KeyError(f"Model '{SELECTED_MODEL}' not found in metrics file. Available: {list(_cached_metrics.keys())}")
-        
-        metrics = _cached_metrics[SELECTED_MODEL]
-        
-        # Validate metrics structure
-        if 'accuracy' not in metrics or 'precision' not in metrics:
-            raise KeyError(f"Metrics for '{SELECTED_MODEL}' missing required keys. Found: {list(metrics.keys())}")
-        
-        acc = metrics['accuracy']
-        prec = metrics['precision']
-        
-        print(f" Model loaded successfully!")
-        print(f"   Accuracy: {acc:.4f}, Precision: {prec:.4f}")
-        
-        return _cached_model, _cached_predictors, metrics
-        
-    except FileNotFoundError as e:
-        print(f" Model file not found: {e}")
-        print(" Falling back to training new model...")
-        return None, None, None
+        loaded = modelRegistry.get(model_name)
     except Exception as e:
-        print(f" Error loading model: {e}")
-        return None, None, None
+        # no model is trained on the request path, a model that can't be loaded is unavailable
+        print(f" Error loading model '{model_name}': {e}")
+        raise HTTPException(status_code=503, detail=f"Model '{model_name}' is unavailable: {str(e)}")
+
+    # random forests are scored with their compiled arrays, same probabilities without the sklearn overhead
+    model = loaded.compiled if loaded.compiled is not None else loaded.model
+    return model, loaded.predictors, loaded.metrics
 
 
+# the probability fields and confidence are None for models that only predict a label (svm)
 class PredictionBase(BaseModel):
     home_team: str
     away_team: str
-    home_win_prob: float
-    draw_prob: float
-    away_win_prob: float
+    home_win_prob: Optional[float] = None
+    draw_prob: Optional[float] = None
+    away_win_prob: Optional[float] = None
     predicted_score: str
     prediction: str
-    confidence: float
+    confidence: Optional[float] = None
     accuracy: float
     precision: float
 
+# a stored prediction as the prediction routes send it back
+class PredictionResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    match_id: Optional[int] = None
+    home_team: Optional[str] = None
+    away_team: Optional[str] = None
+    home_win_prob: Optional[float] = None
+    draw_prob: Optional[float] = None
+    away_win_prob: Optional[float] = None
+    predicted_score: Optional[str] = None
+    predicted_winner: Optional[str] = None
+    confidence: Optional[float] = None
+    accuracy: Optional[float] = None
+    precision: Optional[float] = None
+
 #API call get request to get all predictions
-async def readAllPredictions(db:Session):
-    predictions = db.query(Prediction).all()
+async def readAllPredictions(db: AsyncSession):
+    predictions = (await db.scalars(select(Prediction))).all()
     if predictions is None:
         raise HTTPException(status_code=404,detail="No predictions found")
     return predictions
 
+#API call get request to get the precomputed prediction for a fixture in the match table
+async def readPredictionPerFixture(match_id: int, db: AsyncSession):
+    prediction = await db.scalar(select(Prediction).where(Prediction.match_id == match_id).order_by(Prediction.id.desc()).limit(1))
+    if not prediction:
+        raise HTTPException(status_code=404, detail=f"No prediction found for match {match_id}")
+    return prediction
+
 #API call get request to get all predictions for a specific team
-async def readPredictionPerTeam(teamName:str, db:Session):
-    predictions = db.query(Prediction).filter(Prediction.home_team == teamName).all()
+async def readPredictionPerTeam(teamName:str, db: AsyncSession):
+    predictions = (await db.scalars(select(Prediction).where(Prediction.home_team == teamName))).all()
     if predictions is None:
         raise HTTPException(status_code=404, detail='No predictions found')
     return predictions
 
-#function to load the 2025-2026 schedule
-def load2025Schedule():
-
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    # Try multiple paths in case running in Docker or locally
-    possible_paths = [
-        "/app/WebScraper/schedules_2025_2026.csv",  # Docker path
-        os.path.join(script_dir, "../../WebScraper/schedules_2025_2026.csv"),  # Local relative path
-        os.path.join(script_dir, "../WebScraper/schedules_2025_2026.csv"),
-        "WebScraper/schedules_2025_2026.csv"
-    ]
+# loads the model and its metrics, a 503 if the saved model can't be loaded
+def loadScoringModel(model_name=None):
+    model_name = model_name or SELECTED_MODEL
+    if model_name not in MODEL_INFO:
+        raise HTTPException(status_code=400, detail=f"Invalid model '{model_name}'. Available: {list(MODEL_INFO.keys())}")
+
+    # Load pre-trained model (MUCH FASTER!)
+    rf, predictors, metrics = load_trained_model(model_name)
+    return rf, predictors, metrics['accuracy'], metrics['precision'], model_name
+
+# parses the kickoff of a fixture, returns the local datetime and the "HH:MM" local time
+def parseKickoff(match):
+    # stored matches already have a UTC kickoff, the models use the local time so convert back
+    kickoff = getattr(match, "kickoff", None)
+    if kickoff is not None:
+        local_kickoff = toLocalKickoff(kickoff)
+        return pd.Timestamp(local_kickoff), local_kickoff.strftime("%H:%M")
+
+    # fixtures posted to /predict/ only have fbref's date and time text
+    clean_time = cleanKickoffTime(match.time)
+    try:
+        match_datetime = pd.to_datetime(f"{match.date} {clean_time}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid time format: '{match.time}'. Parsed as '{clean_time}'. Error: {str(e)}"
+     )
+    return match_datetime, clean_time
+
+# builds the home and away feature rows for one fixture, raising a 4xx if the fixture can't be scored
+def buildFixtureFeatures(match):
+    match_datetime, clean_time = parseKickoff(match)
+
+    # Check if teams exist in the schedule data
+    available_teams = list(featureStore.teams)
     
-    schedule_path = None
-    for path in possible_paths:
-        if os.path.exists(path):
-            schedule_path = path
-            break
+    # Get latest stats for home team
+    home_latest = featureStore.getLatestFeatures(match.team_name, match_datetime)
     
-    if not schedule_path:
-        raise FileNotFoundError(f"schedules_2025_2026.csv not found in expected locations. Tried: {possible_paths}")
-
-    schedule_df = pd.read_csv(schedule_path)
-
-    # Filter completed matches only
-    completed = schedule_df[schedule_df['Result'].notna()].copy()
-    completed['date'] = pd.to_datetime(completed['Date'])
-    completed['venue'] = completed['Venue']
-    completed['result'] = completed['Result']
-    completed['gf'] = completed['GF']
-    completed['ga'] = completed['GA']
-    completed['opponent'] = completed['Opponent']
-    completed['team'] = completed['Team']
-
-    # Fix time format
-    completed['time'] = (
-        completed['Time']
-        .str.split('(').str[0]
-        .str.strip()
-        .str.split(' ').str[0]
-    )
+    # Get latest stats for away team
+    away_latest = featureStore.getLatestFeatures(match.opponent, match_datetime)
+    
+    # Better error messages
+    if home_latest is None:
+        # Check if team exists in schedule at all
+        if match.team_name not in available_teams:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"Team '{match.team_name}' not found in schedule data. Available teams: {', '.join(sorted(available_teams)[:10])}..."
+            )
+        # Check if team has matches before this date
+        home_matches_before = featureStore.countCompletedBefore(match.team_name, match_datetime)
+        if home_matches_before == 0:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No completed matches found for {match.team_name} before {match.date}. Need at least 3 completed matches to calculate rolling averages."
+            )
+        else:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Not enough completed matches for {match.team_name} before {match.date}. Found {home_matches_before} match(es), but need at least 3 for rolling averages."
+            )
+    
+    if away_latest is None:
+        # Check if team exists in schedule at all
+        if match.opponent not in available_teams:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Team '{match.opponent}' not found in schedule data. Available teams: {', '.join(sorted(available_teams)[:10])}..."
+            )
+        # Check if team has matches before this date
+        away_matches_before = featureStore.countCompletedBefore(match.opponent, match_datetime)
+        if away_matches_before == 0:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No completed matches found for {match.opponent} before {match.date}. Need at least 3 completed matches to calculate rolling averages."
+            )
+        else:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Not enough completed matches for {match.opponent} before {match.date}. Found {away_matches_before} match(es), but need at least 3 for rolling averages."
+            )
+    
+    # Get opponent codes the model was trained with (2020-2022 data)
+    away_opp_code = featureStore.getOpponentCode(match.opponent)
+    home_opp_code = featureStore.getOpponentCode(match.team_name)
 
-    # Add placeholder stats if missing, most new matches does not have detailed stats
-    for stat in ['sh', 'sot', 'dist', 'fk', 'pk', 'pkatt']:
-        if stat not in completed.columns:
-            completed[stat] = 0  # Average placeholder
+    # Create prediction data for home team
+    try:
+        match_hour = int(clean_time.split(':')[0])
+    except (ValueError, AttributeError):
+        match_hour = 12  # Default to noon if parsing fails
+    match_day = match_datetime.dayofweek
     
-    return completed
+    home_row = {"h/a": 1, "opp": away_opp_code, "hour": match_hour, "day": match_day}
+    home_row.update(home_latest)
+
+    # Create prediction data for away team
+    away_row = {"h/a": 0, "opp": home_opp_code, "hour": match_hour, "day": match_day}
+    away_row.update(away_latest)
+
+    return home_row, away_row
+
+# models saved without probability estimates (svm) only give the predicted class
+def hasProbabilities(rf):
+    return isinstance(rf, CompiledForest) or hasattr(rf, "predict_proba")
+
+# scores any number of fixtures with a single predict_proba call
+# returns a list of (home win probability, away win probability), or of the
+# predicted (home win, away win) labels for models without probabilities
+def scoreFixtures(rf, predictors, fixture_rows):
+    rows = [home_row for home_row, _ in fixture_rows] + [away_row for _, away_row in fixture_rows]
+    count = len(fixture_rows)
+    if isinstance(rf, CompiledForest):
+        # the compiled forest takes a plain array in predictor order, no DataFrame needed
+        features = np.array([[row[p] for p in predictors] for row in rows], dtype=float)
+        win_probs = rf.predict_proba(features)[:, 1]
+        return list(zip(win_probs[:count], win_probs[count:]))
+
+    features = pd.DataFrame(rows, columns=["h/a", "opp", "hour", "day"] + ROLLING_FEATURES)
+    if hasProbabilities(rf):
+        win_probs = rf.predict_proba(features[predictors])[:, 1].astype(float)
+    else:
+        win_probs = rf.predict(features[predictors]).astype(float)
+
+    return list(zip(win_probs[:count], win_probs[count:]))
+
+# turns the two win probabilities of a fixture into a Prediction row.
+# With probabilities=False home_win and away_win are 0/1 labels, so only the
+# winner and score are filled in and the probability fields are left empty
+def buildPrediction(match, home_row, away_row, home_win, away_win, acc, precision, probabilities=True):
+    # Calculate probabilities
+    if not probabilities:
+        draw_prob = None
+    elif home_win + away_win > 1.0:
+        draw_prob = 0.25
+        total = home_win + away_win + draw_prob
+        home_win = home_win / total
+        away_win = away_win / total
+        draw_prob = draw_prob / total
+    else:
+        draw_prob = 1 - home_win - away_win
+
+    # Score prediction, doesn't have to be accurate just indicative
+    base_home = (home_row['gf_rolling'] * 0.7 + away_row['ga_rolling'] * 0.3) * 1.05
+    base_away = (away_row['gf_rolling'] * 0.7 + home_row['ga_rolling'] * 0.3) * 0.95
+
+    if home_win > away_win + 0.15:
+        home_score = max(1, round(base_home + 0.3))
+        away_score = max(0, round(base_away - 0.2))
+    elif away_win > home_win + 0.15:
+        home_score = max(0, round(base_home - 0.2))
+        away_score = max(1, round(base_away + 0.3))
+    else:
+        home_score = round(base_home)
+        away_score = round(base_away)
+
+    return Prediction(
+        home_team=match.team_name,
+        away_team=match.opponent,
+        home_win_prob=float(round(home_win, 4)) if probabilities else None,
+        draw_prob=float(round(draw_prob, 4)) if probabilities else None,
+        away_win_prob=float(round(away_win, 4)) if probabilities else None,
+        predicted_score=f"{home_score}-{away_score}",
+        confidence=float(round(max(home_win, away_win, draw_prob), 4)) if probabilities else None,
+        predicted_winner=(match.team_name if home_win > away_win else (match.opponent if away_win > home_win else "Draw")),
+        accuracy=float(round(acc, 4)),
+        precision=float(round(precision, 4)),
+    )
+
+# label-only predictions are stored without probabilities
+def optionalFloat(value):
+    return None if value is None else float(value)
+
+# converts a stored Prediction row into the json response
+def toPredictionBase(predictionEntry):
+    return PredictionBase(
+        home_team=predictionEntry.home_team,
+        away_team=predictionEntry.away_team,
+        home_win_prob=optionalFloat(predictionEntry.home_win_prob),
+        draw_prob=optionalFloat(predictionEntry.draw_prob),
+        away_win_prob=optionalFloat(predictionEntry.away_win_prob),
+        predicted_score=predictionEntry.predicted_score,
+        prediction=predictionEntry.predicted_winner,
+        confidence=optionalFloat(predictionEntry.confidence),
+        accuracy=float(predictionEntry.accuracy),
+        precision=float(predictionEntry.precision)
+    )
+
+# scores a list of fixtures with one feature matrix, runs on the prediction pool.
+# Fixtures already predicted with the same model and data are served from the prediction cache,
+# returns the results (None where a new prediction was made), the cache keys, the indexes
+# of the new predictions and their Prediction rows
+def scoreNewFixtures(fixtures, model_name=None):
+    # Historical and 2025 rolling features come from the feature store
+    # which is built once and only rebuilt after a match import
+    featureStore.ensureLoaded()
+    rf, predictors, acc, precision, model_name = loadScoringModel(model_name)
+
+    results = [None] * len(fixtures)
+    keys = []
+    missing = []
+    for i, match in enumerate(fixtures):
+        kickoff, _ = parseKickoff(match)
+        key = predictionCache.makeKey(match.team_name, match.opponent, kickoff, model_name, featureStore.version)
+        keys.append(key)
+        results[i] = predictionCache.get(key)
+        if results[i] is None:
+            missing.append(i)
+
+    predictionEntries = []
+    if missing:
+        fixture_rows = [buildFixtureFeatures(fixtures[i]) for i in missing]
+        probabilities = scoreFixtures(rf, predictors, fixture_rows)
+
+        predictionEntries = [
+            buildPrediction(fixtures[i], home_row, away_row, home_win, away_win, acc, precision, hasProbabilities(rf))
+            for i, (home_row, away_row), (home_win, away_win) in zip(missing, fixture_rows, probabilities)
+        ]
+    return results, keys, missing, predictionEntries
+
+# predicts a list of fixtures and stores every new result in one transaction.
+# The model work runs on the prediction pool, the insert is awaited on the event loop
+async def predictFixtures(fixtures, db: AsyncSession, model_name=None):
+    results, keys, missing, predictionEntries = await predictionExecutor.run(scoreNewFixtures, fixtures, model_name)
+
+    if predictionEntries:
+        # Store predictions in database
+        db.add_all(predictionEntries)
+        await db.commit()
+        tableVersions.bump(Prediction.__tablename__)
+
+        for i, entry in zip(missing, predictionEntries):
+            results[i] = toPredictionBase(entry)
+            predictionCache.put(keys[i], results[i])
+
+    #returns json objects as the response
+    return results
+
+#API call get request to see how well the prediction cache is doing
+async def readPredictionCacheStats():
+    return predictionCache.stats()
+
+#API call get request to see how busy the prediction pool is
+async def readPredictionPoolStats():
+    return predictionExecutor.stats()
 
 #API call post request to predict the outcome of a match
-async def predictMatchOutcome(match: MatchBase, db: Session):
+async def predictMatchOutcome(match: MatchBase, db: AsyncSession, model_name: Optional[str] = None):
     try:
+        # the scoring runs on the prediction pool so it doesn't block the event loop
+        return (await predictFixtures([match], db, model_name))[0]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Get path to 2020-2022 matches.csv
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        # Try multiple paths in case running in Docker or locally
-        possible_paths = [
-            os.path.join(script_dir, "../../MachineLearning/matches.csv"),
-            os.path.join(script_dir, "../MachineLearning/matches.csv"),
-            "/app/MachineLearning/matches.csv",
-            "MachineLearning/matches.csv"
-        ]
-        
-        matches_path = None
-        for path in possible_paths:
-            if os.path.exists(path):
-                matches_path = path
-                break
-        
-        if not matches_path:
-            return {"error": "matches.csv not found in expected locations"}
-        
-        matches = pd.read_csv(matches_path, index_col=0)
-
-        # Preprocess 2020-2022 data
-        matches["date"] = pd.to_datetime(matches["date"])
-        matches["h/a"] = matches["venue"].astype("category").cat.codes
-        matches["opp"] = matches["opponent"].astype("category").cat.codes
-        matches["hour"] = matches["time"].str.replace(":.+", "", regex=True).astype("int")
-        matches["day"] = matches["date"].dt.dayofweek
-        matches["target"] = (matches["result"] == "W").astype("int")
-
-        # Rolling averages function
-        def rolling_averages(group, cols, new_cols):
-            group = group.sort_values("date")
-            rolling_stats = group[cols].rolling(3, closed='left').mean()
-            group[new_cols] = rolling_stats
-            group = group.dropna(subset=new_cols)
-            return group
-
-        cols = ["gf", "ga", "sh", "sot", "dist", "fk", "pk", "pkatt"]
-        new_cols = [f"{c}_rolling" for c in cols]
-
-        # Calculate rolling averages for 2020-2022 data (only needed for fallback training)
-        matches_rolling = matches.groupby("team").apply(lambda x: rolling_averages(x, cols, new_cols))
-        matches_rolling = matches_rolling.droplevel('team')
-        matches_rolling.index = range(matches_rolling.shape[0])
-
-        # Load pre-trained model (MUCH FASTER!)
-        rf, predictors, metrics = load_trained_model()
-        
-        if rf is None:
-            # Fallback: train new model if saved model not found
-            print("⚠️  Training new model (saved model not available)...")
-            rf = RandomForestClassifier(n_estimators=100, min_samples_split=10, random_state=42)
-            
-            train = matches_rolling[matches_rolling["date"] < '2022-01-01']
-            test = matches_rolling[matches_rolling["date"] >= '2022-01-01']
-            predictors = ["h/a", "opp", "hour", "day"] + new_cols
-            
-            rf.fit(train[predictors], train["target"])
-            
-            preds = rf.predict(test[predictors])
-            acc = accuracy_score(test["target"], preds)
-            precision = precision_score(test["target"], preds)
-        else:
-            # Use metrics from loaded model
-            acc = metrics['accuracy']
-            precision = metrics['precision']
-
-        ####################### END OF EDITS #####################
-        
-        # Load 2025 season data
-        completed_2025 = load2025Schedule()
-        
-        # Calculate rolling averages for 2025 data
-        completed_2025_rolling = completed_2025.groupby("team").apply(
-            lambda x: rolling_averages(x, cols, new_cols)
-        )
-        completed_2025_rolling = completed_2025_rolling.droplevel('team')
-        completed_2025_rolling.index = range(completed_2025_rolling.shape[0])
-
-        # Clean time string - remove parentheses and extra spaces
-        clean_time = match.time.split("(")[0].strip() if match.time else ""
-        # Extract just the time part (HH:MM format)
-        if " " in clean_time:
-            clean_time = clean_time.split(" ")[0]
-        
-        # Default to noon if time is missing or invalid
-        if not clean_time or ":" not in clean_time:
-            clean_time = "12:00"
+#API call post request to predict several matches at once
+async def predictMatchOutcomes(matches: List[MatchBase], db: AsyncSession, model_name: Optional[str] = None):
+    try:
+        return await predictFixtures(matches, db, model_name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+#API call post request to predict every fixture of a matchweek
+async def predictMatchweek(weekNumber: int, db: AsyncSession, model_name: Optional[str] = None):
+    fixtures = await getMatchesPerWeek(weekNumber, db)
+    if not fixtures:
+        raise HTTPException(status_code=404, detail=f"No matches found for Matchweek {weekNumber}")
+    return await predictMatchOutcomes(fixtures, db, model_name)
+
+#API call get request to list the available models and what the registry has loaded
+async def readModels():
+    return {
+        "default": SELECTED_MODEL,
+        "available": {name: info["name"] for name, info in MODEL_INFO.items()},
+        **modelRegistry.status(),
+    }
 
+# builds the Prediction rows for the fixtures that can be scored, runs on the prediction pool
+def scoreUpcomingFixtures(fixtures):
+    featureStore.ensureLoaded()
+    rf, predictors, acc, precision, model_name = loadScoringModel()
+
+    scoreable = []
+    fixture_rows = []
+    for fixture in fixtures:
         try:
-            match_datetime = pd.to_datetime(f"{match.date} {clean_time}")
-        except Exception as e:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid time format: '{match.time}'. Parsed as '{clean_time}'. Error: {str(e)}"
-         )
-
-        # Check if teams exist in the schedule data
-        available_teams = completed_2025['team'].unique().tolist()
-        
-        # Get latest stats for home team
-        home_data = completed_2025_rolling[
-            (completed_2025_rolling['team'] == match.team_name) &
-            (completed_2025_rolling['date'] < match_datetime)
-        ]
-        
-        # Get latest stats for away team
-        away_data = completed_2025_rolling[
-            (completed_2025_rolling['team'] == match.opponent) &
-            (completed_2025_rolling['date'] < match_datetime)
-        ]
-        
-        # Better error messages
-        if len(home_data) == 0:
-            # Check if team exists in schedule at all
-            if match.team_name not in available_teams:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Team '{match.team_name}' not found in schedule data. Available teams: {', '.join(sorted(available_teams)[:10])}..."
-                )
-            # Check if team has matches before this date
-            home_matches_before = completed_2025[
-                (completed_2025['team'] == match.team_name) &
-                (completed_2025['date'] < match_datetime)
-            ]
-            if len(home_matches_before) == 0:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No completed matches found for {match.team_name} before {match.date}. Need at least 3 completed matches to calculate rolling averages."
-                )
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Not enough completed matches for {match.team_name} before {match.date}. Found {len(home_matches_before)} match(es), but need at least 3 for rolling averages."
-                )
-        
-        if len(away_data) == 0:
-            # Check if team exists in schedule at all
-            if match.opponent not in available_teams:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Team '{match.opponent}' not found in schedule data. Available teams: {', '.join(sorted(available_teams)[:10])}..."
-                )
-            # Check if team has matches before this date
-            away_matches_before = completed_2025[
-                (completed_2025['team'] == match.opponent) &
-                (completed_2025['date'] < match_datetime)
-            ]
-            if len(away_matches_before) == 0:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"No completed matches found for {match.opponent} before {match.date}. Need at least 3 completed matches to calculate rolling averages."
-                )
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Not enough completed matches for {match.opponent} before {match.date}. Found {len(away_matches_before)} match(es), but need at least 3 for rolling averages."
-                )
-        
-        home_latest = home_data.sort_values('date').iloc[-1]
-        away_latest = away_data.sort_values('date').iloc[-1]
-
-        # Get opponent codes from historical data only 2020-2022
-        away_opp_code = matches[
-            matches["opponent"].str.contains(match.opponent.split()[0], case=False, na=False)
-        ]["opp"].mode()
-        away_opp_code = away_opp_code[0] if len(away_opp_code) > 0 else 10
-        
-        home_opp_code = matches[
-            matches["opponent"].str.contains(match.team_name.split()[0], case=False, na=False)
-        ]["opp"].mode()
-        home_opp_code = home_opp_code[0] if len(home_opp_code) > 0 else 10
-
-        # Create prediction data for home team
-        try:
-            match_hour = int(clean_time.split(':')[0])
-        except (ValueError, AttributeError):
-            match_hour = 12  # Default to noon if parsing fails
-        match_day = match_datetime.dayofweek
-        
-        home_match = pd.DataFrame({
-            "h/a": [1],
-            "opp": [away_opp_code],
-            "hour": [match_hour],
-            "day": [match_day],
-        })
-        
-        for col in new_cols:
-            home_match[col] = home_latest[col]
-        
-        home_pred = rf.predict(home_match)[0]
-        home_prob = rf.predict_proba(home_match)[0]
-
-        # Create prediction data for away team
-        away_match = pd.DataFrame({
-            "h/a": [0],
-            "opp": [home_opp_code],
-            "hour": [match_hour],
-            "day": [match_day],
-        })
-        
-        for col in new_cols:
-            away_match[col] = away_latest[col]
-        
-        away_pred = rf.predict(away_match)[0]
-        away_prob = rf.predict_proba(away_match)[0]
-
-        # Calculate probabilities
-        home_win = home_prob[1]
-        away_win = away_prob[1]
-        
-        if home_win + away_win > 1.0:
-            draw_prob = 0.25
-            total = home_win + away_win + draw_prob
-            home_win = home_win / total
-            away_win = away_win / total
-            draw_prob = draw_prob / total
-        else:
-            draw_prob = 1 - home_win - away_win
-
-        # Score prediction, doesn't have to be accurate just indicative
-        base_home = (home_latest['gf_rolling'] * 0.7 + away_latest['ga_rolling'] * 0.3) * 1.05
-        base_away = (away_latest['gf_rolling'] * 0.7 + home_latest['ga_rolling'] * 0.3) * 0.95
-
-        if home_win > away_win + 0.15:
-            home_score = max(1, round(base_home + 0.3))
-            away_score = max(0, round(base_away - 0.2))
-        elif away_win > home_win + 0.15:
-            home_score = max(0, round(base_home - 0.2))
-            away_score = max(1, round(base_away + 0.3))
-        else:
-            home_score = round(base_home)
-            away_score = round(base_away)
-
-        # Store prediction in database
-        predictionEntry = Prediction(
-            home_team=match.team_name,
-            away_team=match.opponent,
-            home_win_prob=float(round(home_win, 4)),
-            draw_prob=float(round(draw_prob, 4)),
-            away_win_prob=float(round(away_win, 4)),
-            predicted_score=f"{home_score}-{away_score}",
-            confidence=float(round(max(home_win, away_win, draw_prob), 4)),
-            predicted_winner=(match.team_name if home_win > away_win else (match.opponent if away_win > home_win else "Draw")),
-            accuracy=float(round(acc, 4)),
-            precision=float(round(precision, 4)),
-        )
-
-        db.add(predictionEntry)
-        db.commit()
-
-        #returns json object as the response
-        return PredictionBase(
-            home_team=predictionEntry.home_team,
-            away_team=predictionEntry.away_team,
-            home_win_prob=float(predictionEntry.home_win_prob),
-            draw_prob=float(predictionEntry.draw_prob),
-            away_win_prob=float(predictionEntry.away_win_prob),
-            predicted_score=predictionEntry.predicted_score,
-            prediction=predictionEntry.predicted_winner,
-            confidence=float(predictionEntry.confidence),
-            accuracy=float(predictionEntry.accuracy),
-            precision=float(predictionEntry.precision)
-        )
+            fixture_rows.append(buildFixtureFeatures(fixture))
+            scoreable.append(fixture)
+        except HTTPException:
+            continue
+
+    predictionEntries = []
+    if fixture_rows:
+        probabilities = scoreFixtures(rf, predictors, fixture_rows)
+        for fixture, (home_row, away_row), (home_win, away_win) in zip(scoreable, fixture_rows, probabilities):
+            predictionEntry = buildPrediction(fixture, home_row, away_row, home_win, away_win, acc, precision, hasProbabilities(rf))
+            predictionEntry.match_id = fixture.match_id
+            predictionEntries.append(predictionEntry)
+    return predictionEntries
+
+# scores every unplayed home fixture in the match table and replaces the stored
+# precomputed predictions, so reads don't need to run the model.
+# Called after a match import, fixtures that can't be scored yet are skipped
+async def precomputeUpcomingPredictions(db: AsyncSession):
+    try:
+        fixtures = (await db.scalars(select(Match).where(Match.result.is_(None), Match.venue == "Home"))).all()
+        predictionEntries = await predictionExecutor.run(scoreUpcomingFixtures, fixtures)
+
+        # swap the old precomputed predictions for the new ones in one transaction
+        await db.execute(delete(Prediction).where(Prediction.match_id.isnot(None)))
+        db.add_all(predictionEntries)
+        await db.commit()
+        tableVersions.bump(Prediction.__tablename__)
+        return {"predicted": len(predictionEntries), "skipped": len(fixtures) - len(predictionEntries)}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error precomputing predictions: {str(e)}")
@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fastapi import HTTPException
+
+# number of predictions that can run at once and how many more may wait for a worker
+PREDICTION_WORKERS = int(os.getenv('PREDICTION_WORKERS', '2'))
+PREDICTION_QUEUE_SIZE = int(os.getenv('PREDICTION_QUEUE_SIZE', '16'))
+
+
+class PredictionExecutor:
+    """
+    Runs the blocking pandas/sklearn/SQLAlchemy prediction work on a bounded
+    thread pool so it never runs on the asyncio event loop.
+
+    At most `workers` jobs run at once and up to `queue_size` more wait for a
+    free worker. Anything beyond that is rejected straight away with a 503 so
+    a burst of predictions backs off instead of piling up behind the loop.
+    """
+
+    def __init__(self, workers=PREDICTION_WORKERS, queue_size=PREDICTION_QUEUE_SIZE):
+        self.workers = workers
+        self.queue_size = queue_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prediction")
+        self._lock = threading.Lock()
+        self.pending = 0  # running + waiting jobs
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=503,
+                    detail="Prediction queue is full, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "running": min(self.pending, self.workers),
+                "queued": max(0, self.pending - self.workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+predictionExecutor = PredictionExecutor()
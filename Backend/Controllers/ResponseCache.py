@@ -0,0 +1,125 @@
+import hashlib
+import inspect
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from Controllers.JsonEncoding import FastJSONResponse, encodeModels
+
+# how many pre-serialized GET bodies are kept (one per endpoint and query string)
+RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '64'))
+
+# changes on every start so an ETag from before a restart never matches new data
+BOOT_ID = uuid.uuid4().hex[:8]
+
+
+class TableVersions:
+    """
+    One counter per table, bumped after every committed write to it
+    (imports, creates and prediction writes). A cached response built at
+    version N stays valid until the table moves past N.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, *tables):
+        with self._lock:
+            return tuple(self._versions.get(table, 0) for table in tables)
+
+
+class ResponseCache:
+    """
+    LRU of serialized JSON bodies keyed by request, each stored with the table
+    versions it was built from. A hit at the current versions skips both the
+    database query and the JSON encoding.
+    """
+
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, versions):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], entry[2]
+            self.misses += 1
+            return None
+
+    def put(self, key, versions, body, headers):
+        with self._lock:
+            self._entries[key] = (versions, body, headers)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+tableVersions = TableVersions()
+responseCache = ResponseCache()
+
+
+def makeEtag(key, versions):
+    digest = hashlib.sha1(repr((BOOT_ID, key, versions)).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etagMatches(request: Request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+async def cachedJsonResponse(request: Request, tables, build, key=None, model=None):
+    """
+    Serves a GET from the tables' current versions.
+
+    `build` returns the data to send (or an awaitable of it), optionally as a
+    (data, extra headers) pair. Data can be already encoded bytes, or ORM objects
+    serialized through the pydantic response `model`. It only runs when the cached
+    body is missing or older than the tables. Clients sending the current ETag in
+    If-None-Match get an empty 304.
+    """
+    key = key if key is not None else (request.url.path, str(request.query_params))
+    # read the versions before querying, a write landing mid query then just makes this entry stale
+    versions = tableVersions.get(*tables)
+    etag = makeEtag(key, versions)
+    if etagMatches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    cached = responseCache.get(key, versions)
+    if cached is None:
+        data = build()
+        if inspect.isawaitable(data):
+            data = await data
+        data, headers = data if isinstance(data, tuple) else (data, {})
+        if isinstance(data, bytes):
+            body = data
+        elif model is not None:
+            body = encodeModels(model, data)
+        else:
+            body = FastJSONResponse(jsonable_encoder(data)).body
+        responseCache.put(key, versions, body, headers)
+    else:
+        body, headers = cached
+
+    # no-cache: browsers may keep the body but must revalidate it with the ETag
+    return Response(body, media_type="application/json", headers={**headers, "ETag": etag, "Cache-Control": "no-cache"})
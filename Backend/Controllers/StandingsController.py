@@ -0,0 +1,240 @@
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
+import pandas as pd
+from sqlalchemy import Integer, and_, case, cast, distinct, func, select, true, update
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from Models.match import Match
+from Models.standing import Standing
+from Models.team import Team
+from Controllers.BulkImport import diffImport
+from Controllers.ResponseCache import tableVersions
+
+# a snapshot row is one team after one matchweek
+STANDING_KEY = ["matchweek", "team_name"]
+# results that make up the form string, newest last like fbref's "Last 5" column
+FORM_LENGTH = 5
+# what a team's played matches add up to, compared to spot stale snapshots
+RESULT_COLUMNS = ["wins", "draws", "losses", "goalsFor", "goalsAgainst"]
+# the team table columns kept in line with the latest snapshot. The standings computed from the
+# match table are their source of truth, table.csv only fills them for teams without a snapshot
+TEAM_STANDING_COLUMNS = ["rank", "matchesPlayed", "wins", "draws", "losses", "goalsFor", "goalsAgainst",
+                         "goalDifference", "points", "last5Wins"]
+
+
+# one row of a standings snapshot as /standings sends it back
+class StandingResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    matchweek: Optional[int] = None
+    team_name: Optional[str] = None
+    rank: Optional[int] = None
+    matchesPlayed: Optional[int] = None
+    wins: Optional[int] = None
+    draws: Optional[int] = None
+    losses: Optional[int] = None
+    goalsFor: Optional[int] = None
+    goalsAgainst: Optional[int] = None
+    goalDifference: Optional[int] = None
+    points: Optional[int] = None
+    last5Wins: Optional[str] = None
+
+
+def matchweekNumber(round_column):
+    # "Matchweek 12" -> 12
+    return cast(func.replace(round_column, "Matchweek ", ""), Integer)
+
+
+def standingsQuery(from_matchweek=1):
+    """
+    The league table after every matchweek from `from_matchweek` on, in one statement.
+
+    Each team is paired with every snapshot matchweek and the played matches of
+    rounds up to it, so a postponed match counts towards its own round once it is
+    played. Totals come from GROUP BY, the rank and the last five results from
+    window functions. Ties on points are split by goal difference, then goals scored.
+    """
+    in_league = Match.round.like("Matchweek %")
+    played = select(
+        Match.team_name, matchweekNumber(Match.round).label("matchweek"), Match.kickoff, Match.result, Match.gf, Match.ga
+    ).where(in_league, Match.result.isnot(None)).cte("played")
+    weeks = select(distinct(played.c.matchweek).label("matchweek")).where(played.c.matchweek >= from_matchweek).cte("weeks")
+    teams = select(distinct(Match.team_name).label("team_name")).where(in_league).cte("teams")
+
+    # every result a team had by each matchweek, numbered newest first for the form
+    history = select(
+        weeks.c.matchweek,
+        teams.c.team_name,
+        played.c.result,
+        played.c.gf,
+        played.c.ga,
+        func.row_number().over(
+            partition_by=(weeks.c.matchweek, teams.c.team_name), order_by=played.c.kickoff.desc()
+        ).label("recent"),
+    ).select_from(
+        weeks.join(teams, true()).outerjoin(
+            played, and_(played.c.team_name == teams.c.team_name, played.c.matchweek <= weeks.c.matchweek)
+        )
+    ).cte("history")
+
+    wins = func.sum(case((history.c.result == "W", 1), else_=0))
+    draws = func.sum(case((history.c.result == "D", 1), else_=0))
+    losses = func.sum(case((history.c.result == "L", 1), else_=0))
+    goals_for = func.coalesce(func.sum(history.c.gf), 0)
+    goals_against = func.coalesce(func.sum(history.c.ga), 0)
+    points = 3 * wins + draws
+    form = [func.max(case((history.c.recent == n, history.c.result))).label(f"form{n}") for n in range(FORM_LENGTH, 0, -1)]
+
+    return select(
+        history.c.matchweek,
+        history.c.team_name,
+        func.row_number().over(
+            partition_by=history.c.matchweek,
+            order_by=(points.desc(), (goals_for - goals_against).desc(), goals_for.desc(), history.c.team_name),
+        ).label("rank"),
+        func.count(history.c.result).label("matchesPlayed"),
+        wins.label("wins"),
+        draws.label("draws"),
+        losses.label("losses"),
+        goals_for.label("goalsFor"),
+        goals_against.label("goalsAgainst"),
+        (goals_for - goals_against).label("goalDifference"),
+        points.label("points"),
+        *form,
+    ).group_by(history.c.matchweek, history.c.team_name)
+
+
+def computeStandings(db: Session, from_matchweek=1):
+    """Runs standingsQuery and returns a frame with the standing table's columns"""
+    result = db.execute(standingsQuery(from_matchweek))
+    frame = pd.DataFrame(result.all(), columns=list(result.keys()))
+    form_columns = [f"form{n}" for n in range(FORM_LENGTH, 0, -1)]
+    # teams with fewer than five results have NULL in the oldest slots
+    frame["last5Wins"] = [" ".join(r for r in results if r) for results in frame[form_columns].itertuples(index=False)]
+    return frame.drop(columns=form_columns).astype({column: "int64" for column in TEAM_STANDING_COLUMNS if column != "last5Wins"})
+
+
+def firstStaleMatchweek(db: Session):
+    """
+    Earliest matchweek whose snapshot no longer agrees with the played matches, None when all agree.
+
+    What a team did in a matchweek is the difference between its snapshot and the one
+    before, which is compared with a GROUP BY of its played matches in that round.
+    """
+    wins = func.sum(case((Match.result == "W", 1), else_=0))
+    draws = func.sum(case((Match.result == "D", 1), else_=0))
+    losses = func.sum(case((Match.result == "L", 1), else_=0))
+    matchweek = matchweekNumber(Match.round)
+    weekly = db.execute(
+        select(Match.team_name, matchweek.label("matchweek"), wins, draws, losses, func.coalesce(func.sum(Match.gf), 0), func.coalesce(func.sum(Match.ga), 0))
+        .where(Match.round.like("Matchweek %"), Match.result.isnot(None))
+        .group_by(Match.team_name, matchweek)
+    ).all()
+    weekly = pd.DataFrame(weekly, columns=["team_name", "matchweek"] + RESULT_COLUMNS).set_index(["team_name", "matchweek"])
+
+    snapshots = db.execute(select(Standing.team_name, Standing.matchweek, *[getattr(Standing, column) for column in RESULT_COLUMNS])).all()
+    snapshots = pd.DataFrame(snapshots, columns=["team_name", "matchweek"] + RESULT_COLUMNS).sort_values(["team_name", "matchweek"])
+    deltas = snapshots.groupby("team_name")[RESULT_COLUMNS].diff().fillna(snapshots[RESULT_COLUMNS])
+    deltas.index = pd.MultiIndex.from_frame(snapshots[["team_name", "matchweek"]])
+    deltas = deltas[(deltas != 0).any(axis=1)]
+
+    # weeks that gained or lost their last result, then weeks where some team's results differ
+    stale = set(weekly.index.get_level_values("matchweek")) ^ set(snapshots["matchweek"])
+    compared = weekly.join(deltas, how="outer", rsuffix="_snapshot").fillna(0)
+    differs = (compared[RESULT_COLUMNS].to_numpy() != compared[[f"{c}_snapshot" for c in RESULT_COLUMNS]].to_numpy()).any(axis=1)
+    stale |= set(compared.index[differs].get_level_values("matchweek"))
+    return int(min(stale)) if stale else None
+
+
+def refreshStandings(db: Session):
+    """
+    Brings the snapshots in line with the match table and copies the latest one
+    onto the team table.
+
+    Only the matchweeks from the first stale one on are recomputed and only the
+    snapshot rows whose numbers moved are written, so an import adding this
+    week's results leaves every earlier snapshot alone.
+    Runs inside the session's transaction, the caller commits.
+    Returns the standing row counts and how many teams were updated.
+    """
+    from_matchweek = firstStaleMatchweek(db)
+    if from_matchweek is None:
+        return {"from_matchweek": None, "inserted": 0, "updated": 0, "deleted": 0, "teams_updated": 0}
+    frame = computeStandings(db, from_matchweek)
+    changes = diffImport(db, Standing, frame, STANDING_KEY, scope=[Standing.matchweek >= from_matchweek])
+    changes.pop("unchanged")
+    changes["teams_updated"] = syncTeamStandings(db)
+    return {"from_matchweek": from_matchweek, **changes}
+
+
+def latestSnapshot(db: Session):
+    """The latest matchweek's TEAM_STANDING_COLUMNS keyed by team name, empty before any snapshot"""
+    latest = db.execute(select(func.max(Standing.matchweek))).scalar()
+    if latest is None:
+        return {}
+    columns = [getattr(Standing, column) for column in TEAM_STANDING_COLUMNS]
+    return {row.team_name: row for row in db.execute(select(Standing.team_name, *columns).where(Standing.matchweek == latest))}
+
+
+def syncTeamStandings(db: Session):
+    # /teams/ stays a single table read, its standings columns follow the latest snapshot
+    snapshot = latestSnapshot(db)
+    if not snapshot:
+        return 0
+    stored = db.execute(select(Team.name, *[getattr(Team, column) for column in TEAM_STANDING_COLUMNS]).where(Team.name.in_(snapshot)))
+
+    changed = []
+    for row in stored:
+        values = {column: getattr(snapshot[row.name], column) for column in TEAM_STANDING_COLUMNS}
+        if any(getattr(row, column) != value for column, value in values.items()):
+            changed.append({"name": row.name, **values})
+    if changed:
+        db.execute(update(Team), changed)
+    return len(changed)
+
+
+def applyLatestStandings(db: Session, frame):
+    """
+    Replaces the standings columns of a cleaned table.csv frame with the latest snapshot,
+    so a /teams/import never undoes what the match import computed. Teams without a
+    snapshot keep the scraped values.
+    """
+    snapshot = latestSnapshot(db)
+    known = frame["name"].isin(snapshot)
+    if not known.any():
+        return frame
+    frame = frame.copy()
+    for column in TEAM_STANDING_COLUMNS:
+        frame.loc[known, column] = [getattr(snapshot[name], column) for name in frame.loc[known, "name"]]
+    return frame
+
+
+# called once the refresh is committed so cached /standings and /teams/ responses are rebuilt
+def bumpStandingVersions(changes):
+    if changes["inserted"] or changes["updated"] or changes["deleted"]:
+        tableVersions.bump(Standing.__tablename__)
+    if changes["teams_updated"]:
+        tableVersions.bump(Team.__tablename__)
+
+
+# fills in the snapshots at startup, e.g. for a database imported before the standing table existed
+def rebuildStandings(bind):
+    with Session(bind) as db:
+        changes = refreshStandings(db)
+        db.commit()
+    bumpStandingVersions(changes)
+    return changes
+
+
+# API call get request to get the league table after a matchweek, the latest one by default
+async def readStandings(db: AsyncSession, matchweek: int = None):
+    if matchweek is None:
+        matchweek = await db.scalar(select(func.max(Standing.matchweek)))
+        if matchweek is None:
+            raise HTTPException(status_code=404, detail="No standings yet, import the matches first")
+    standings = (await db.scalars(select(Standing).where(Standing.matchweek == matchweek).order_by(Standing.rank))).all()
+    if not standings:
+        raise HTTPException(status_code=404, detail=f"No standings found for Matchweek {matchweek}")
+    return standings
@@ -1,8 +1,14 @@
 from fastapi import HTTPException, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
+from typing import Optional
 from Models.team import Team
 from database import Base, get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from Controllers.ListQuery import readPage
+from Controllers.ResponseCache import tableVersions
+from Controllers.ImportJobs import ImportJob
+from Controllers.BulkImport import importFrame, cleanFrame, TEAM_COLUMNS, TEAM_KEY, IMPORT_MODES
+from Controllers.StandingsController import applyLatestStandings
 import pandas as pd
 
 class TeamBase(BaseModel):
@@ -26,56 +32,66 @@ class TeamBase(BaseModel):
     topTeamScorer: str = ""
     goalkeeper: str = ""
 
+# what the team routes send back, read straight off the ORM row
+class TeamResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    rank: Optional[int] = None
+    name: str
+    matchesPlayed: Optional[int] = None
+    wins: Optional[int] = None
+    draws: Optional[int] = None
+    losses: Optional[int] = None
+    goalsFor: Optional[int] = None
+    goalsAgainst: Optional[int] = None
+    goalDifference: Optional[int] = None
+    points: Optional[int] = None
+    goalsPer90: Optional[float] = None
+    expectedGoals: Optional[float] = None
+    expectedGoalsAllowed: Optional[float] = None
+    expectedGoalsDifference: Optional[float] = None
+    expectedGoalsDifferencePer90: Optional[float] = None
+    last5Wins: Optional[str] = None
+    attendance: Optional[int] = None
+    topTeamScorer: Optional[str] = None
+    goalkeeper: Optional[str] = None
 
-# API call get request to get all teams in the database
-def readTeams(db: Session):
-    teams = db.query(Team).all()
-    if teams is None:
-        raise HTTPException(status_code=404, detail="No teams found")
-    return teams
+
+# API call get request to get all teams in the database, optionally projected and paged
+async def readTeams(db: AsyncSession, fields: str = None, limit: int = None, after: str = None):
+    return await readPage(db, Team, (), fields, limit, after)
 
 # Import league table from CSV and insert into database
-async def importLeagueTable(csv_path: str, db: Session):
+async def importLeagueTable(csv_path: str, db: AsyncSession, mode: str = "incremental", job: ImportJob = None):
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"Invalid import mode '{mode}'. Available: {list(IMPORT_MODES)}")
+    # outside the job queue the phases are still timed, they just aren't reported
+    if job is None:
+        job = ImportJob("teams", mode)
     try:
-        df = pd.read_csv(csv_path)
-        
-        # Clear existing data
-        db.query(Team).delete()
-        db.commit()
-        
-        # Insert each row into database
-        for _, row in df.iterrows():
-            tableEntry = Team(
-                rank=int(row.get('Rk', 0)) if pd.notna(row.get('Rk', 0)) else 0,
-                name=str(row.get('Squad', '')),
-                matchesPlayed=int(row.get('MP', 0)) if pd.notna(row.get('MP', 0)) else 0,
-                wins=int(row.get('W', 0)) if pd.notna(row.get('W', 0)) else 0,
-                draws=int(row.get('D', 0)) if pd.notna(row.get('D', 0)) else 0,
-                losses=int(row.get('L', 0)) if pd.notna(row.get('L', 0)) else 0,
-                goalsFor=int(row.get('GF', 0)) if pd.notna(row.get('GF', 0)) else 0,
-                goalsAgainst=int(row.get('GA', 0)) if pd.notna(row.get('GA', 0)) else 0,
-                goalDifference=int(row.get('GD', 0)) if pd.notna(row.get('GD', 0)) else 0,
-                points=int(row.get('Pts', 0)) if pd.notna(row.get('Pts', 0)) else 0,
-                goalsPer90=float(row.get('GF/90', 0)) if pd.notna(row.get('GF/90', 0)) else 0.00,
-                expectedGoals=float(row.get('xG', 0)) if pd.notna(row.get('xG', 0)) else 0.00,
-                expectedGoalsAllowed=float(row.get('xGA', 0)) if pd.notna(row.get('xGA', 0)) else 0.00,
-                expectedGoalsDifference=float(row.get('xGD', 0)) if pd.notna(row.get('xGD', 0)) else 0.00,
-                expectedGoalsDifferencePer90=float(row.get('xGD/90', 0)) if pd.notna(row.get('xGD/90', 0)) else 0.00,
-                last5Wins=str(row.get('Last 5', '')),
-                attendance=int(row.get('Attendance', 0)) if pd.notna(row.get('Attendance', 0)) else 0,
-                topTeamScorer=str(row.get('Top Team Scorer', '')),
-                goalkeeper=str(row.get('Goalkeeper', ''))
-            )
-            db.add(tableEntry)
-        
-        db.commit()
-        return {"message": f"Successfully imported {len(df)} teams into database"}
+        with job.phase("read"):
+            df = pd.read_csv(csv_path)
+        job.rows["read"] = len(df)
+        with job.phase("clean"):
+            frame = cleanFrame(df, TEAM_COLUMNS)
+            # rank, points and the other standings columns come from the match results once there are any
+            frame = await db.run_sync(applyLatestStandings, frame)
+
+        # Update the table in place, one transaction and only the rows that differ
+        with job.phase("write"):
+            changes = await db.run_sync(importFrame, Team, frame, TEAM_KEY, mode)
+        job.rows.update(changes)
+        with job.phase("commit"):
+            await db.commit()
+        if changes["inserted"] or changes["updated"] or changes["deleted"]:
+            tableVersions.bump(Team.__tablename__)
+        return {"message": f"Successfully imported {len(df)} teams into database", "mode": mode, **changes}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error importing table: {str(e)}")
 
 # API call post request to add a team to the database
-async def createTeam(team: TeamBase, db: Session):
+async def createTeam(team: TeamBase, db: AsyncSession):
     dbTeam = Team(
         name=team.name, 
         rank=team.rank,
@@ -98,6 +114,7 @@ async def createTeam(team: TeamBase, db: Session):
         goalkeeper=team.goalkeeper
     )
     db.add(dbTeam)
-    db.commit()
-    db.refresh(dbTeam)
+    await db.commit()
+    await db.refresh(dbTeam)
+    tableVersions.bump(Team.__tablename__)
     return dbTeam
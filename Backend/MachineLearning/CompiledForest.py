@@ -0,0 +1,101 @@
+# Flattens a fitted sklearn RandomForestClassifier into contiguous NumPy arrays so
+# scoring a handful of rows skips sklearn's per-call validation and the dispatch
+# over every estimator. Used by the backend for rf_basic.pkl and rf_rolling.pkl.
+import numpy as np
+
+# sklearn marks leaves with -1 as their children
+TREE_LEAF = -1
+
+
+# past this many rows sklearn's compiled tree walk wins over the NumPy gathers, hand those to the forest
+MAX_COMPILED_ROWS = 512
+
+
+class CompiledForest:
+    """
+    All trees of a forest stored as one set of node arrays:
+    feature, threshold, children (left and right pairs, absolute node indices)
+    and the class probabilities of every node. Leaves point back to themselves
+    so every row can keep stepping without checking whether it reached a leaf.
+    """
+
+    def __init__(self, forest, roots, feature, threshold, children, probabilities, max_depth):
+        self.forest = forest
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.probabilities = probabilities
+        self.max_depth = max_depth
+        self.classes_ = forest.classes_
+        self.n_features = forest.n_features_in_
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def predict_proba(self, X):
+        """Same probabilities as RandomForestClassifier.predict_proba for a 2D array of rows"""
+        # sklearn compares float32 features against the thresholds, do the same so splits agree
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected rows with {self.n_features} features, got shape {X.shape}")
+        n_rows = X.shape[0]
+        if n_rows > MAX_COMPILED_ROWS:
+            return self.forest.predict_proba(X)
+
+        flat_X = X.ravel()
+        # one current node per (tree, row), all trees walked together
+        nodes = np.repeat(self.roots, n_rows)
+        row_offsets = np.tile(np.arange(n_rows) * self.n_features, self.n_trees)
+        for _ in range(self.max_depth):
+            goes_right = flat_X[row_offsets + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + goes_right]
+
+        return self.probabilities[nodes].reshape(self.n_trees, n_rows, -1).mean(axis=0)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compileForest(forest):
+    """Builds a CompiledForest from a fitted RandomForestClassifier"""
+    features, thresholds, children, probabilities, roots = [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        count = tree.node_count
+        is_leaf = tree.children_left == TREE_LEAF
+        own_index = np.arange(count) + offset
+
+        roots.append(offset)
+        # leaves loop on themselves and compare feature 0 against +inf so they always "go left"
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        left = np.where(is_leaf, own_index, tree.children_left + offset)
+        right = np.where(is_leaf, own_index, tree.children_right + offset)
+        children.append(np.stack([left, right], axis=1).ravel())
+
+        # normalise the per node class weights the same way DecisionTreeClassifier.predict_proba does
+        values = tree.value[:, 0, :]
+        totals = values.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        probabilities.append(values / totals)
+
+        max_depth = max(max_depth, tree.max_depth)
+        offset += count
+
+    return CompiledForest(
+        forest=forest,
+        roots=np.array(roots, dtype=np.intp),
+        feature=np.concatenate(features).astype(np.intp),
+        threshold=np.concatenate(thresholds).astype(np.float64),
+        children=np.concatenate(children).astype(np.intp),
+        probabilities=np.ascontiguousarray(np.concatenate(probabilities)),
+        max_depth=max_depth,
+    )
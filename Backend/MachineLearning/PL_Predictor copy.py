@@ -8,6 +8,7 @@ from sklearn.metrics import precision_score, accuracy_score, classification_repo
 from sklearn.ensemble import RandomForestClassifier
 import joblib
 import os
+from RollingStats import rollingFrame, ROLLING_COLS, ROLLING_FEATURES
 
 print("="*70)
 print("PREMIER LEAGUE MATCH PREDICTOR - MODEL COMPARISON")
@@ -29,21 +30,11 @@ matches["hour"] = matches["time"].str.replace(":.+", "", regex=True).astype("int
 matches["day"] = matches["date"].dt.dayofweek
 matches["target"] = (matches["result"] == "W").astype("int")
 
-# Rolling averages function
-def rolling_averages(group, cols, new_cols):
-    group = group.sort_values("date")
-    rolling_stats = group[cols].rolling(3, closed='left').mean()
-    group[new_cols] = rolling_stats
-    group = group.dropna(subset=new_cols)
-    return group
-
 # Calculate rolling averages
-cols = ["gf", "ga", "sh", "sot", "dist", "fk", "pk", "pkatt"]
-new_cols = [f"{c}_rolling" for c in cols]
+cols = ROLLING_COLS
+new_cols = ROLLING_FEATURES
 
-matches_rolling = matches.groupby("team").apply(lambda x: rolling_averages(x, cols, new_cols))
-matches_rolling = matches_rolling.droplevel('team')
-matches_rolling.index = range(matches_rolling.shape[0])
+matches_rolling = rollingFrame(matches)
 
 # Split data
 train = matches_rolling[matches_rolling["date"] < '2022-01-01']
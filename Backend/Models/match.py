@@ -1,29 +1,37 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 from database import Base
 
 # current match model table
 class Match(Base):
     __tablename__ = "match"
+    # team pages read a team's matches in kickoff order, matchweek pages filter on round and venue
+    __table_args__ = (
+        Index("ix_match_team_name_kickoff", "team_name", "kickoff"),
+        Index("ix_match_round_venue", "round", "venue"),
+    )
 
     match_id = Column(Integer, primary_key=True, index=True)
-    date = Column(String, index=True)
-    time = Column(String, index=True)
-    round = Column(String, index=True)
-    day = Column(String, index=True)
-    venue = Column(String, index=True)
-    result = Column(String, index=True)
-    gf = Column(Integer, default=0)
-    ga = Column(Integer, default=0)
-    opponent = Column(String, index=True)
+    # kickoff in UTC, date and time keep fbref's local text for display
+    kickoff = Column(DateTime, index=True, nullable=True)
+    date = Column(String)
+    time = Column(String)
+    round = Column(String)
+    day = Column(String)
+    venue = Column(String)
+    # result, gf and ga stay NULL until the match is played
+    result = Column(String, nullable=True)
+    gf = Column(Integer, nullable=True)
+    ga = Column(Integer, nullable=True)
+    opponent = Column(String)
     xg = Column(Float, default=0.00)
     xga = Column(Float, default=0.00)
     poss = Column(Float, default=0.00)
     attendance = Column(Integer, default=0)
-    captain = Column(String, index=True)
-    formation = Column(String, index=True)
-    oppFormation = Column(String, index=True)
-    referee = Column(String, index=True)
+    captain = Column(String)
+    formation = Column(String)
+    oppFormation = Column(String)
+    referee = Column(String)
 
     team_name = Column(String, ForeignKey("team.name", ondelete="CASCADE"))
 
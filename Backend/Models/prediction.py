@@ -7,13 +7,16 @@ class Prediction(Base):
     __tablename__ = "prediction"
 
     id = Column(Integer, primary_key=True, index=True)
+    # set for predictions precomputed for an upcoming fixture in the match table
+    match_id = Column(Integer, index=True, nullable=True)
     home_team = Column(String, index=True)
     away_team = Column(String, index=True)
-    home_win_prob = Column(Float, default=0.00)
-    draw_prob = Column(Float, default=0.00)
-    away_win_prob = Column(Float, default=0.00)
+    # left empty for models that only predict a label (svm)
+    home_win_prob = Column(Float)
+    draw_prob = Column(Float)
+    away_win_prob = Column(Float)
     predicted_score = Column(String, index=True)
     predicted_winner = Column(String, index=True)
-    confidence = Column(Float, default=0.00)
+    confidence = Column(Float)
     accuracy = Column(Float, default=0.00)
     precision = Column(Float, default=0.00)
\ No newline at end of file
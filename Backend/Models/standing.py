@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Index, Integer, String
+from database import Base
+
+# league table after each matchweek, rebuilt from the match table whenever results change
+class Standing(Base):
+    __tablename__ = "standing"
+    # /standings reads one matchweek in rank order
+    __table_args__ = (
+        Index("ix_standing_matchweek_rank", "matchweek", "rank"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    matchweek = Column(Integer)
+    team_name = Column(String)
+    rank = Column(Integer)
+    matchesPlayed = Column(Integer, default=0)
+    wins = Column(Integer, default=0)
+    draws = Column(Integer, default=0)
+    losses = Column(Integer, default=0)
+    goalsFor = Column(Integer, default=0)
+    goalsAgainst = Column(Integer, default=0)
+    goalDifference = Column(Integer, default=0)
+    points = Column(Integer, default=0)
+    # last five results, oldest first, e.g. "D W L W W"
+    last5Wins = Column(String)
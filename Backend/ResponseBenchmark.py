@@ -0,0 +1,112 @@
+"""
+/players/ response benchmark
+Times GET /players/ the ways it used to be served against the current path,
+end to end through the app and for the serialization step on its own:
+  orm        every player as an ORM object, jsonable_encoder + json.dumps (JSONResponse)
+  row_dicts  selected rows as dicts, jsonable_encoder + json.dumps (JSONResponse)
+  bytes      selected row tuples encoded straight to bytes with orjson (current)
+All bodies are checked to decode to the same players.
+
+Uses a throwaway SQLite database loaded from WebScraper/stats.csv.
+Run from Backend/: python ResponseBenchmark.py
+"""
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+for name, value in (("DB_USER", "benchmark"), ("DB_PASSWORD", "benchmark"), ("DB_HOST", "localhost"), ("DB_PORT", "5432"), ("DB_NAME", "benchmark")):
+    os.environ.setdefault(name, value)
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import database
+
+# same setup as the tests: one SQLite file behind the blocking and the async engine
+database_path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+database.engine = create_engine(f"sqlite:///{database_path}")
+database.SessionLocal = sessionmaker(bind=database.engine)
+database.asyncEngine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+database.AsyncSessionLocal = async_sessionmaker(database.asyncEngine, expire_on_commit=False)
+
+from main import app
+from Models.player import Player
+from Controllers.ListQuery import pageQuery
+from Controllers.JsonEncoding import encodeRows
+
+REPEATS = 50
+
+
+# the old /players/ routes, both encoded by fastapi's JSONResponse
+@app.get("/benchmark/players-orm", response_class=JSONResponse)
+async def playersThroughOrm():
+    async with database.AsyncSessionLocal() as db:
+        return (await db.scalars(select(Player).order_by(Player.id))).all()
+
+
+@app.get("/benchmark/players-dicts", response_class=JSONResponse)
+async def playersAsDicts():
+    async with database.AsyncSessionLocal() as db:
+        result = await db.execute(pageQuery(Player)[0])
+        keys = list(result.keys())
+        return [dict(zip(keys, row)) for row in result.all()]
+
+
+def timeIt(fn, repeats=REPEATS):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+async def loadRows():
+    async with database.AsyncSessionLocal() as db:
+        players = (await db.scalars(select(Player).order_by(Player.id))).all()
+        result = await db.execute(pageQuery(Player)[0])
+        return players, list(result.keys()), result.all()
+
+
+def report(label, after, **before):
+    print(f"   {label}")
+    for name, seconds in before.items():
+        print(f"      {name:<10} {seconds * 1000:8.2f} ms   ({seconds / after:.1f}x the current time)")
+    print(f"      {'bytes':<10} {after * 1000:8.2f} ms")
+
+
+def main():
+    with TestClient(app) as client:
+        job = client.post("/players/import", params={"mode": "replace"}).json()
+        while job["status"] in ("queued", "running"):
+            time.sleep(0.05)
+            job = client.get(f"/jobs/{job['id']}").json()
+
+        new_body = client.get("/players/").json()
+        assert client.get("/benchmark/players-orm").json() == new_body, "ORM body differs"
+        assert client.get("/benchmark/players-dicts").json() == new_body, "row dict body differs"
+        print(f"\n/players/: {len(new_body)} players, {len(new_body[0])} columns")
+
+        print("\nEnd to end (TestClient GET):")
+        report("GET /players/", timeIt(lambda: client.get("/players/")),
+               orm=timeIt(lambda: client.get("/benchmark/players-orm")),
+               row_dicts=timeIt(lambda: client.get("/benchmark/players-dicts")))
+
+    players, keys, rows = asyncio.run(loadRows())
+    dumps = lambda data: json.dumps(jsonable_encoder(data), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    encodeOrm = lambda: dumps(players)
+    encodeDicts = lambda: dumps([dict(zip(keys, row)) for row in rows])
+    encodeBytes = lambda: encodeRows(keys, rows)
+    assert json.loads(encodeOrm()) == json.loads(encodeDicts()) == json.loads(encodeBytes())
+
+    print("\nSerialization only (rows already fetched):")
+    report("body for every player", timeIt(encodeBytes), orm=timeIt(encodeOrm), row_dicts=timeIt(encodeDicts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from Controllers.ImportJobs import importJobs, readJob
+
+router = APIRouter()
+
+#API call get request to list the latest import jobs, newest first
+@router.get("/jobs/", tags=["jobs"])
+async def getJobs():
+    return importJobs.recent()
+
+#API call get request to follow one import job: status, current phase, row counts and phase timings
+@router.get("/jobs/{job_id}", tags=["jobs"])
+async def getJob(job_id: str):
+    return readJob(job_id)
@@ -1,46 +1,79 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from datetime import date
 from pydantic import BaseModel
-from typing import Union
+from typing import Union, Optional
 from typing import List, Annotated
 from Models.team import Base
 from database import engine, get_db
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from Controllers.ListQuery import pageResponse, MAX_PAGE_SIZE
+from Controllers.ResponseCache import cachedJsonResponse
+from Controllers.ImportJobs import importJobs, acceptedJob
+from Models.match import Match
 from Controllers.TeamController import importLeagueTable, readTeams, createTeam, TeamBase
 from Controllers.PlayerController import importPlayers, readAllPlayers, readPlayersPerTeam, createPlayer, PlayerBase
-from Controllers.MatchController import getMatchesPerWeek, matchesCurrentWeek, importMatches, readAllMatches, readMatchesPerTeam, readMatchById, createMatch, MatchBase
+from Controllers.PredictionController import precomputeUpcomingPredictions
+from Controllers.MatchController import getMatchesPerWeek, matchesCurrentWeek, readTeamsAwaitingResults, importMatches, readAllMatches, readMatchesPerTeam, readMatchById, createMatch, MatchBase, MatchResponse
 
 router = APIRouter(prefix="/matches", tags=["matches"])
 
 #API call get request to get all matches in the database
+# filters: ?team= ?round= ?venue= ?date_from= ?date_to=, ?fields=a,b picks columns,
+# ?limit=&after= pages using the X-Next-Cursor header, ?format=ndjson|columns for bulk readers
 @router.get("/", tags=["matches"])
-async def getAllMatches(db: Session = Depends(get_db)):
-    return readAllMatches(db)
+async def getAllMatches(team: Optional[str] = None, round: Optional[str] = None,
+                        venue: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                        fields: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                        after: Optional[str] = None, format: str = "json", db: AsyncSession = Depends(get_db)):
+    return pageResponse(*await readAllMatches(db, team, round, venue, date_from, date_to, fields, limit, after, format))
 
-@router.post("/import", tags=["matches"])
-async def importAllMatches(db: Session = Depends(get_db)):
-    return await importMatches("WebScraper/schedules_2025_2026.csv", db)
+async def runMatchImport(db: AsyncSession, job):
+    result = await importMatches("WebScraper/schedules_2025_2026.csv", db, job.mode, job)
+    # score the upcoming fixtures now so reading predictions needs no model work
+    with job.phase("predictions"):
+        try:
+            result["predictions"] = await precomputeUpcomingPredictions(db)
+        except HTTPException as e:
+            # the matches are already committed, so the import succeeded even if scoring didn't
+            result["predictions"] = {"error": e.detail}
+            job.warnings.append(f"Predictions were not precomputed: {e.detail}")
+    return result
+
+#API call post request to import the schedule and results, runs in the background
+# answers 202 with the job right away, poll GET /jobs/{id} (the Location header) for the outcome
+@router.post("/import", tags=["matches"], status_code=202)
+async def importAllMatches(response: Response, mode: str = "incremental"):
+    return acceptedJob(response, importJobs.submit("matches", mode, runMatchImport))
 
 #API call get request to get all players from a specific team
-@router.get("/team/{team_name}", tags=["matches"])
-async def getMatchesPerTeam(team_name: str, db: Session = Depends(get_db)):
+@router.get("/team/{team_name}", tags=["matches"], response_model=List[MatchResponse])
+async def getMatchesPerTeam(team_name: str, db: AsyncSession = Depends(get_db)):
     return await readMatchesPerTeam(team_name, db)
 
 #API call post request to add a player to the database
-@router.post("/", tags=["matches"])
-async def addMatch(match: MatchBase, db: Session = Depends(get_db)):
+@router.post("/", tags=["matches"], response_model=MatchResponse)
+async def addMatch(match: MatchBase, db: AsyncSession = Depends(get_db)):
     return await createMatch(match,db)
 
 #API call get request to get all matches in the current week
+# cached per day (the week is worked out from today's date) until the next match import
 @router.get("/current-week", tags=["matches"])
-async def getMatchesCurrentWeek(db:Session = Depends(get_db)):
-    return await matchesCurrentWeek(db)
+async def getMatchesCurrentWeek(request: Request, db: AsyncSession = Depends(get_db)):
+    key = (request.url.path, str(date.today()))
+    return await cachedJsonResponse(request, [Match.__tablename__], lambda: matchesCurrentWeek(db), key, MatchResponse)
 
 #API call get request to get all matches for a specific week
-@router.get("/Matchweek/{weekNumber}",tags=["matches"])
-async def getCallMatchesPerWeek(weekNumber:int, db:Session = Depends(get_db)):
+@router.get("/Matchweek/{weekNumber}",tags=["matches"], response_model=List[MatchResponse])
+async def getCallMatchesPerWeek(weekNumber:int, db: AsyncSession = Depends(get_db)):
     return await getMatchesPerWeek(weekNumber,db)
 
+#API call get request to get the teams whose finished fixtures still have no result
+# read by the scraper to only fetch those teams' pages, not cached as it moves with the clock
+@router.get("/awaiting-results", tags=["matches"])
+async def getTeamsAwaitingResults(db: AsyncSession = Depends(get_db)):
+    return await readTeamsAwaitingResults(db)
+
 #API call get request to get a single match by match_id
-@router.get("/{match_id}", tags=["matches"])
-async def getMatchById(match_id: int, db: Session = Depends(get_db)):
-    return readMatchById(match_id, db)
\ No newline at end of file
+@router.get("/{match_id}", tags=["matches"], response_model=MatchResponse)
+async def getMatchById(match_id: int, db: AsyncSession = Depends(get_db)):
+    return await readMatchById(match_id, db)
\ No newline at end of file
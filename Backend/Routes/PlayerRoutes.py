@@ -1,27 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
 from Models.team import Base
 from database import engine, get_db
-from sqlalchemy.orm import Session
-from Controllers.PlayerController import importPlayers, readAllPlayers, readPlayersPerTeam, createPlayer, PlayerBase
+from sqlalchemy.ext.asyncio import AsyncSession
+from Controllers.ListQuery import pageResponse, MAX_PAGE_SIZE
+from Controllers.ImportJobs import importJobs, acceptedJob
+from Controllers.PlayerController import importPlayers, readAllPlayers, readPlayersPerTeam, createPlayer, PlayerBase, PlayerResponse
 
 router = APIRouter()
 
 #API call get request to get all players from the database
+# ?team= and ?position= filter, ?fields=a,b picks columns, ?limit=&after= pages using the X-Next-Cursor header
+# ?format=ndjson streams one player per line, ?format=columns returns {column: [values]}
 @router.get("/players/", tags=["players"])
-async def getAllPlayers(db: Session = Depends(get_db)):
-    return readAllPlayers(db)
+async def getAllPlayers(team: Optional[str] = None, position: Optional[str] = None,
+                        fields: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                        after: Optional[str] = None, format: str = "json", db: AsyncSession = Depends(get_db)):
+    # encoded to bytes straight from the row tuples, no ORM objects or jsonable_encoder
+    return pageResponse(*await readAllPlayers(db, team, position, fields, limit, after, format))
 
 #API call post request to add a player to the database
-@router.post("/players/", tags=["players"])
-async def addPlayer(player: PlayerBase, db: Session = Depends(get_db)):
+@router.post("/players/", tags=["players"], response_model=PlayerResponse)
+async def addPlayer(player: PlayerBase, db: AsyncSession = Depends(get_db)):
     return await createPlayer(player,db)
 
-#API call post request to import players from a CSV file
-@router.post("/players/import", tags=["players"])
-async def importAllPlayers(db: Session = Depends(get_db)):
-    return await importPlayers("WebScraper/stats.csv", db)
+#API call post request to import players from a CSV file, runs in the background
+# answers 202 with the job right away, poll GET /jobs/{id} (the Location header) for the outcome
+@router.post("/players/import", tags=["players"], status_code=202)
+async def importAllPlayers(response: Response, mode: str = "incremental"):
+    job = importJobs.submit("players", mode, lambda db, job: importPlayers("WebScraper/stats.csv", db, job.mode, job))
+    return acceptedJob(response, job)
 
 #API call get request to get all players from a specific team
-@router.get("/players/{team_name}", tags=["players"])
-async def getPlayersPerTeam(team_name: str, db: Session = Depends(get_db)):
+@router.get("/players/{team_name}", tags=["players"], response_model=List[PlayerResponse])
+async def getPlayersPerTeam(team_name: str, db: AsyncSession = Depends(get_db)):
     return await readPlayersPerTeam(team_name, db)
@@ -1,22 +1,55 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from Models.team import Base
 from database import engine, get_db
-from sqlalchemy.orm import Session
-from Controllers.PredictionController import readPredictionPerTeam, readAllPredictions, predictMatchOutcome, Prediction
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from Controllers.PredictionController import readPredictionPerTeam, readPredictionPerFixture, readAllPredictions, predictMatchOutcome, predictMatchOutcomes, predictMatchweek, readPredictionCacheStats, readPredictionPoolStats, readModels, Prediction, PredictionBase, PredictionResponse
 from Controllers.MatchController import MatchBase
+from Controllers.ResponseCache import cachedJsonResponse
 
 router = APIRouter()
 
 #API call post request to create a prediction of a match
-@router.post("/predict/", tags=["predictions"])
-async def predictMatch(match: MatchBase, db: Session = Depends(get_db)):
-    return await predictMatchOutcome(match, db)
+@router.post("/predict/", tags=["predictions"], response_model=PredictionBase)
+async def predictMatch(match: MatchBase, model: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await predictMatchOutcome(match, db, model)
+
+#API call post request to predict several matches with one model call
+@router.post("/predict/batch", tags=["predictions"], response_model=List[PredictionBase])
+async def predictMatches(matches: List[MatchBase], model: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await predictMatchOutcomes(matches, db, model)
+
+#API call post request to predict every fixture in a matchweek
+@router.post("/predict/matchweek/{weekNumber}", tags=["predictions"], response_model=List[PredictionBase])
+async def predictWeek(weekNumber: int, model: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    return await predictMatchweek(weekNumber, db, model)
+
+#API call get request to list the models that can be passed as ?model=
+@router.get("/predict/models", tags=["predictions"])
+async def getModels():
+    return await readModels()
+
+#API call get request to get the hit and miss counters of the prediction cache
+@router.get("/predict/cache", tags=["predictions"])
+async def getPredictionCacheStats():
+    return await readPredictionCacheStats()
+
+#API call get request to get the running, queued and rejected counts of the prediction pool
+@router.get("/predict/pool", tags=["predictions"])
+async def getPredictionPoolStats():
+    return await readPredictionPoolStats()
 
 #API call get request to get all entries of predictions
+# served from the pre-serialized body until a prediction is written, with ETag / If-None-Match support
 @router.get("/predictions/", tags=["predictions"])
-async def getAllPredictions(db: Session = Depends(get_db)):
-    return await readAllPredictions(db)
+async def getAllPredictions(request: Request, db: AsyncSession = Depends(get_db)):
+    return await cachedJsonResponse(request, [Prediction.__tablename__], lambda: readAllPredictions(db), model=PredictionResponse)
+
+#API call get request to get the precomputed prediction for a fixture
+@router.get("/predictions/fixture/{match_id}", tags=["predictions"], response_model=PredictionResponse)
+async def getPredictionPerFixture(match_id: int, db: AsyncSession = Depends(get_db)):
+    return await readPredictionPerFixture(match_id, db)
 
-@router.get("/predictions/{teamName}", tags=["predictions"])
-async def getPredictionsPerTeam(teamName: str, db:Session = Depends(get_db)):
+@router.get("/predictions/{teamName}", tags=["predictions"], response_model=List[PredictionResponse])
+async def getPredictionsPerTeam(teamName: str, db: AsyncSession = Depends(get_db)):
     return await readPredictionPerTeam(teamName, db)
\ No newline at end of file
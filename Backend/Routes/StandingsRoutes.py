@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
+from database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from Models.standing import Standing
+from Controllers.ResponseCache import cachedJsonResponse
+from Controllers.StandingsController import readStandings, StandingResponse
+
+router = APIRouter()
+
+#API call get request to get the league table after a matchweek (?matchweek=12), the latest one without it
+# served from the materialized snapshots, cached until results change the table
+@router.get("/standings", tags=["standings"])
+async def getStandings(request: Request, matchweek: Optional[int] = Query(None, ge=1), db: AsyncSession = Depends(get_db)):
+    return await cachedJsonResponse(request, [Standing.__tablename__], lambda: readStandings(db, matchweek), model=StandingResponse)
@@ -1,26 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
 from pydantic import BaseModel
-from typing import Union
+from typing import Union, Optional
 from typing import List, Annotated
-from Models.team import Base
+from Models.team import Base, Team
 from database import engine, get_db
-from sqlalchemy.orm import Session
-from Controllers.TeamController import importLeagueTable, readTeams, createTeam, TeamBase
+from sqlalchemy.ext.asyncio import AsyncSession
+from Controllers.ListQuery import pageHeaders, MAX_PAGE_SIZE
+from Controllers.ResponseCache import cachedJsonResponse
+from Controllers.ImportJobs import importJobs, acceptedJob
+from Controllers.TeamController import importLeagueTable, readTeams, createTeam, TeamBase, TeamResponse
 from Controllers.PlayerController import importPlayers, readAllPlayers, readPlayersPerTeam, createPlayer, PlayerBase
 from Controllers.MatchController import importMatches, readAllMatches, readMatchesPerTeam, createMatch, MatchBase
 
 router = APIRouter()
 
 #API call get request to get all teams in the database
+# ?fields=a,b picks columns, ?limit=&after= pages using the X-Next-Cursor header
+# the body is cached until the next team import and carries an ETag for If-None-Match
 @router.get("/teams/", tags=["teams"])
-def getAllTeams(db: Session = Depends(get_db)):
-    return readTeams(db)
+async def getAllTeams(request: Request, fields: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                      after: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    async def build():
+        teams, next_after = await readTeams(db, fields, limit, after)
+        return teams, pageHeaders(next_after)
+    return await cachedJsonResponse(request, [Team.__tablename__], build)
 
-#API call post request to add a team to the database
-@router.post("/teams/import", tags=["teams"])
-async def importTeams(db: Session = Depends(get_db)):
-    return await importLeagueTable("WebScraper/table.csv", db)
+#API call post request to import the league table, runs in the background
+# answers 202 with the job right away, poll GET /jobs/{id} (the Location header) for the outcome
+@router.post("/teams/import", tags=["teams"], status_code=202)
+async def importTeams(response: Response, mode: str = "incremental"):
+    job = importJobs.submit("teams", mode, lambda db, job: importLeagueTable("WebScraper/table.csv", db, job.mode, job))
+    return acceptedJob(response, job)
 
-@router.post("/teams/", tags=["teams"])
-async def createTeamRoute(team: TeamBase, db: Session = Depends(get_db)):
+@router.post("/teams/", tags=["teams"], response_model=TeamResponse)
+async def createTeamRoute(team: TeamBase, db: AsyncSession = Depends(get_db)):
     return await createTeam(team, db)
\ No newline at end of file
@@ -1,208 +1,246 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
 import pandas as pd
+import asyncio
 import time
-import requests
 import os
+from urllib.parse import urljoin
+from ImportClient import importDataset, teamsAwaitingResults
+from PageFetcher import createFetcher, FBREF_BASE_URL
+from ScrapeScheduler import ScrapeScheduler
+from PageParsing import statsTables, readTable, tableLinks
 
-# Setup Chrome options
-chrome_options = Options()
-chrome_options.add_argument('--headless')  # Run in background
-chrome_options.add_argument('--no-sandbox')
-chrome_options.add_argument('--disable-dev-shm-usage')
-chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+LEAGUE_URL = f"{FBREF_BASE_URL}/en/comps/9/Premier-League-Stats"
+SEASON = "2025-2026"
+STATS_CSV = "WebScraper/stats.csv"
+SCHEDULES_CSV = "WebScraper/schedules_2025_2026.csv"
+# incremental: only the teams with finished fixtures that have no result yet, full: every team
+SCRAPE_MODE = os.getenv('SCRAPE_MODE', 'incremental')
 
-# Initialize the driver
-driver = webdriver.Chrome(options=chrome_options)
+# table to have all names standardized
+TEAM_NAME_MAP = {
+"Brighton and Hove Albion": "Brighton",
+"Brighton & Hove Albion": "Brighton",
+"Tottenham Hotspur": "Tottenham",
+"Wolverhampton Wanderers": "Wolves",
+"Manchester United": "Manchester Utd",
+"Newcastle United": "Newcastle Utd",
+"West Ham United": "West Ham",
+"Nottingham Forest": "Nott'ham Forest"
+}
 
-# API configuration - can be set via environment variable or defaults to localhost
-API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
 
-all_teams = []
-all_schedules = []
-
-try:
-    # Get the main page
-    print("Loading main page...")
-    driver.get('https://fbref.com/en/comps/9/Premier-League-Stats')
-    
-    # Wait for the table to load
-    wait = WebDriverWait(driver, 10)
-    wait.until(EC.presence_of_element_located((By.CLASS_NAME, 'stats_table')))
-    
-    # Parse with BeautifulSoup
-    html = driver.page_source
-    soup = BeautifulSoup(html, 'lxml')
-
-    # table to have all names standardized
-    TEAM_NAME_MAP = {
-    "Brighton and Hove Albion": "Brighton",
-    "Brighton & Hove Albion": "Brighton",
-    "Tottenham Hotspur": "Tottenham",
-    "Wolverhampton Wanderers": "Wolves",
-    "Manchester United": "Manchester Utd",
-    "Newcastle United": "Newcastle Utd",
-    "West Ham United": "West Ham",
-    "Nottingham Forest": "Nott'ham Forest"
-    }
-
-    tables = soup.find_all('table', class_='stats_table')
+def teamUrls(html, page_url=LEAGUE_URL):
+    """Squad page URLs linked from the league table on the main page"""
+    tables = statsTables(html)
     if not tables:
-        print("No tables found")
-        exit()
-    
-    table = tables[0]
-    links = table.find_all('a')
-    links = [l.get("href") for l in links if l.get("href")]
-    links = [l for l in links if '/squads/' in l]
-    team_urls = [f"https://fbref.com{l}" for l in links]
-    
-    print(f"Found {len(team_urls)} teams to scrape\n")
-    
-    for i, team_url in enumerate(team_urls, 1):
-        team_name = team_url.split("/")[-1].replace("-Stats", "").replace("-", " ")
-        team_name = TEAM_NAME_MAP.get(team_name, team_name)
-        
-        print(f"Scraping {i}/{len(team_urls)}: {team_name}")
-        
-        # Scrape team stats
+        return []
+    links = [l for l in tableLinks(tables[0]) if '/squads/' in l]
+    return [urljoin(page_url, l) for l in links]
+
+
+def teamNameFromUrl(team_url):
+    team_name = team_url.split("/")[-1].replace("-Stats", "").replace("-", " ")
+    return TEAM_NAME_MAP.get(team_name, team_name)
+
+
+def scheduleUrl(team_url, team_name):
+    # Extract squad ID from the team URL
+    squad_id = team_url.split("/squads/")[1].split("/")[0]
+    team_name_formatted = team_name.replace(" ", "-")
+    return urljoin(team_url, f"/en/squads/{squad_id}/{SEASON}/matchlogs/c9/schedule/{team_name_formatted}-Scores-and-Fixtures-Premier-League")
+
+
+def parseSquadStats(html, team_name):
+    """The squad's standard stats table, one row per player, or None when the page has none"""
+    stats = statsTables(html)
+    if not stats:
+        print(f"  No stats table found for {team_name}, skipping...")
+        return None
+
+    team_data = readTable(stats[0])
+
+    # Handle multi-level columns
+    if isinstance(team_data.columns, pd.MultiIndex):
+        team_data.columns = team_data.columns.droplevel()
+
+    # Filter out rows where Player column is blank or contains header-like values
+    player_col = team_data.columns[0]  # First column should be Player
+    team_data = team_data[team_data[player_col].notna()]  # Remove NaN values
+    team_data = team_data[team_data[player_col] != player_col]  # Remove header rows
+    team_data = team_data[team_data[player_col].astype(str).str.strip() != '']  # Remove empty strings
+
+    # Only keep it if there are valid player rows remaining
+    if len(team_data) == 0:
+        print(f"No valid player data found for {team_name}")
+        return None
+    team_data["Team"] = team_name
+    return team_data
+
+
+def parseSchedule(html, team_name):
+    """The team's scores and fixtures table, or None when the page has none"""
+    schedule_tables = statsTables(html)
+    if not schedule_tables:
+        print(f" No schedule table found for {team_name}")
+        return None
+
+    # Usually the first table contains the schedule
+    schedule_data = readTable(schedule_tables[0])
+    schedule_data = schedule_data[schedule_data[schedule_data.columns[0]] != schedule_data.columns[0]]
+
+    # Handle multi-level columns
+    if isinstance(schedule_data.columns, pd.MultiIndex):
+        schedule_data.columns = schedule_data.columns.droplevel(0)
+
+    schedule_data["Team"] = team_name
+    return schedule_data
+
+
+def cleanStats(stat_df):
+    # Final cleanup: remove any rows where Player column is blank, NaN, or contains "Playing Time" etc.
+    player_col = stat_df.columns[0]
+    stat_df = stat_df[stat_df[player_col].notna()]
+    stat_df = stat_df[stat_df[player_col].astype(str).str.strip() != '']
+    return stat_df[~stat_df[player_col].astype(str).str.contains('Playing Time|Performance|Expected|Progression|Per 90 Minutes', na=False)]
+
+
+# how each of a team's pages is parsed, keyed like the frames scrapeLeague returns
+PAGE_PARSERS = {"stats": parseSquadStats, "schedules": parseSchedule}
+
+
+async def scrapeTeam(scheduler, team_url):
+    """
+    Fetches a team's stats and schedule pages side by side and parses the ones that
+    changed since they were last parsed. Returns the team's name, {kind: frame} for the
+    pages parsed and {kind: url} of those pages.
+    """
+    team_name = teamNameFromUrl(team_url)
+    urls = {"stats": team_url, "schedules": scheduleUrl(team_url, team_name)}
+    pages = await asyncio.gather(*(scheduler.fetch(url) for url in urls.values()), return_exceptions=True)
+
+    frames, parsed = {}, {}
+    for (kind, url), page in zip(urls.items(), pages):
         try:
-            driver.get(team_url)
-            time.sleep(3)
-            
-            page_html = driver.page_source
-            soup = BeautifulSoup(page_html, 'lxml')
-            stats = soup.find_all('table', class_="stats_table")
-            
-            if not stats:
-                print(f"  No stats table found for {team_name}, skipping...")
+            if isinstance(page, Exception):
+                raise page
+            # same body as the one already in the CSV, its rows are kept as they are
+            if scheduler.unchanged(url):
+                print(f"  {kind} page for {team_name} unchanged since the last run")
                 continue
-                
-            stats = stats[0]
-            team_data = pd.read_html(str(stats))[0]
-            
-            # Handle multi-level columns
-            if isinstance(team_data.columns, pd.MultiIndex):
-                team_data.columns = team_data.columns.droplevel()
-            
-            # Filter out rows where Player column is blank or contains header-like values
-            player_col = team_data.columns[0]  # First column should be Player
-            team_data = team_data[team_data[player_col].notna()]  # Remove NaN values
-            team_data = team_data[team_data[player_col] != player_col]  # Remove header rows
-            team_data = team_data[team_data[player_col].astype(str).str.strip() != '']  # Remove empty strings
-            
-            # Only add if there are valid player rows remaining
-            if len(team_data) > 0:
-                team_data["Team"] = team_name
-                all_teams.append(team_data)
-                print(f"Successfully scraped stats for {team_name} - {len(team_data)} players")
-            else:
-                print(f"No valid player data found for {team_name}")
-            
-        except Exception as e:
-            print(f"Error scraping stats for {team_name}: {e}")
-        
-        # Scrape team schedule
-        try:
-            # Extract squad ID from the team URL
-            squad_id = team_url.split("/squads/")[1].split("/")[0]
-            
-            # Construct schedule URL
-            team_name_formatted = team_name.replace(" ", "-")
-            schedule_url = f"https://fbref.com/en/squads/{squad_id}/2025-2026/matchlogs/c9/schedule/{team_name_formatted}-Scores-and-Fixtures-Premier-League"
-            
-            print(f"  Loading schedule from: {schedule_url}")
-            driver.get(schedule_url)
-            time.sleep(3)
-            
-            schedule_html = driver.page_source
-            schedule_soup = BeautifulSoup(schedule_html, 'lxml')
-            
-            # Find the scores and fixtures table
-            schedule_tables = schedule_soup.find_all('table', class_="stats_table")
-            
-            if schedule_tables:
-                # Usually the first table contains the schedule
-                schedule_table = schedule_tables[0]
-                schedule_data = pd.read_html(str(schedule_table))[0]
-                schedule_data = schedule_data[schedule_data[schedule_data.columns[0]] != schedule_data.columns[0]]
-                
-                # Handle multi-level columns
-                if isinstance(schedule_data.columns, pd.MultiIndex):
-                    schedule_data.columns = schedule_data.columns.droplevel(0)
-                
-                schedule_data["Team"] = team_name
-                all_schedules.append(schedule_data)
-                print(f" Successfully scraped schedule for {team_name}")
-            else:
-                print(f" No schedule table found for {team_name}")
-                
-        except Exception as e:
-            print(f"Error scraping schedule for {team_name}: {e}")
-        
-        time.sleep(5)  # Be respectful to the server
-    
-    # Save stats data
-    if all_teams:
-        stat_df = pd.concat(all_teams, ignore_index=True)
-        
-        # Final cleanup: remove any rows where Player column is blank, NaN, or contains "Playing Time" etc.
-        player_col = stat_df.columns[0]
-        stat_df = stat_df[stat_df[player_col].notna()]
-        stat_df = stat_df[stat_df[player_col].astype(str).str.strip() != '']
-        stat_df = stat_df[~stat_df[player_col].astype(str).str.contains('Playing Time|Performance|Expected|Progression|Per 90 Minutes', na=False)]
-        
-        stat_df.to_csv("WebScraper/stats.csv", index=False)
-        print(f"\nSuccessfully saved stats for {len(all_teams)} teams to stats.csv")
-        print(f"Total players: {len(stat_df)}")
-        
-        # Import players into database via API
-        try:
-            print("\nImporting players into database...")
-            response = requests.post(f"{API_BASE_URL}/players/import", timeout=300)
-            if response.status_code == 200:
-                print(f"✓ Successfully imported players: {response.json()}")
-            else:
-                print(f"API returned status {response.status_code}: {response.text}")
-        except requests.exceptions.ConnectionError:
-            print("Could not connect to API. Make sure the FastAPI server is running.")
-            print(f"Attempted URL: {API_BASE_URL}/players/import")
-        except requests.exceptions.Timeout:
-            print("API request timed out. The import may still be processing.")
+            frame = PAGE_PARSERS[kind](page, team_name)
+            if frame is not None:
+                frames[kind], parsed[kind] = frame, url
+                print(f"Successfully scraped {kind} for {team_name} - {len(frame)} rows")
         except Exception as e:
-            print(f"Error calling import API: {e}")
-    else:
-        print("\nNo stats data was scraped")
-    
-    # Save schedule data
-    if all_schedules:
-        schedule_df = pd.concat(all_schedules, ignore_index=True)
-        schedule_df.to_csv("WebScraper/schedules_2025_2026.csv", index=False)
-        print(f"Successfully saved schedules for {len(all_schedules)} teams to schedules_2025_2026.csv")
-        
-        # Import matches into database via API
-        try:
-            print("\nImporting matches into database...")
-            response = requests.post(f"{API_BASE_URL}/matches/import", timeout=300)
-            if response.status_code == 200:
-                print(f"✓ Successfully imported matches: {response.json()}")
-            else:
-                print(f"API returned status {response.status_code}: {response.text}")
-        except requests.exceptions.ConnectionError:
-            print("Could not connect to API. Make sure the FastAPI server is running.")
-            print(f"Attempted URL: {API_BASE_URL}/matches/import")
-        except requests.exceptions.Timeout:
-            print("API request timed out. The import may still be processing.")
-        except Exception as e:
-            print(f"Error calling import API: {e}")
-    else:
-        print("No schedule data was scraped")
+            print(f"Error scraping {kind} for {team_name} from {url}: {e}")
+    return team_name, frames, parsed
+
+
+async def scrapeLeague(scheduler, league_url=LEAGUE_URL, teams=None):
+    """
+    Scrapes the squad stats and schedules of the teams in the league table, every team
+    or only those named in `teams`.
+    Returns {"teams": every name in table order, "stats": {team: frame}, "schedules": {team: frame},
+    "parsed": {"stats": [urls], "schedules": [urls]}} with only the pages parsed this run.
+    """
+    scraped = {"teams": [], "stats": {}, "schedules": {}, "parsed": {"stats": [], "schedules": []}}
+
+    # Get the main page
+    print("Loading main page...")
+    team_urls = teamUrls(await scheduler.fetch(league_url), league_url)
+    if not team_urls:
+        print("No tables found")
+        return scraped
+
+    scraped["teams"] = [teamNameFromUrl(team_url) for team_url in team_urls]
+    if teams is not None:
+        team_urls = [team_url for team_url in team_urls if teamNameFromUrl(team_url) in teams]
+
+    # every team is queued at once, the scheduler decides how fast the pages are fetched
+    print(f"Found {len(scraped['teams'])} teams, scraping {len(team_urls)}\n")
+    for team_name, frames, parsed in await asyncio.gather(*(scrapeTeam(scheduler, team_url) for team_url in team_urls)):
+        for kind, frame in frames.items():
+            scraped[kind][team_name] = frame
+            scraped["parsed"][kind].append(parsed[kind])
+    return scraped
+
+
+def mergeTeamRows(path, teams, frames):
+    """
+    The rows of the CSV at `path` with each team in `frames` replaced by its new rows, in
+    league table order. Teams that weren't parsed this run (unchanged or failed) keep
+    the rows they have in the file, teams no longer in the table are dropped.
+    """
+    fresh = pd.concat(frames.values(), ignore_index=True)
+    kept = []
+    if os.path.exists(path):
+        existing = pd.read_csv(path)
+        if len(existing.columns) == len(fresh.columns):
+            # read_csv renames repeated headers (Gls -> Gls.1), the parsed frames keep fbref's names
+            existing.columns = fresh.columns
+            kept.append(existing[existing["Team"].isin([team for team in teams if team not in frames])])
+        else:
+            print(f"  {path} has other columns than the pages, only the teams parsed this run are kept")
+    merged = pd.concat(kept + [fresh], ignore_index=True)
+    order = {team: i for i, team in enumerate(teams)}
+    merged = merged[merged["Team"].isin(order)]
+    return merged.iloc[merged["Team"].map(order).argsort(kind="stable")].reset_index(drop=True)
+
+
+def teamsToScrape():
+    """
+    The teams whose pages are fetched this run, None for every team.
+    Between matchdays only the teams that played have new rows, so an incremental
+    run asks the API for the teams with finished fixtures that have no result yet.
+    Without both CSVs or an answer from the API every team is scraped.
+    """
+    if SCRAPE_MODE == "full" or not (os.path.exists(STATS_CSV) and os.path.exists(SCHEDULES_CSV)):
+        return None
+    return teamsAwaitingResults()
+
+
+def importSucceeded(job):
+    return job is not None and job["status"] == "succeeded"
+
+
+def main():
+    teams = teamsToScrape()
+    if teams is not None:
+        if not teams:
+            print("No finished fixtures are waiting for a result, nothing to scrape")
+            return
+        print(f"Scraping the teams with new results: {', '.join(teams)}")
+
+    start = time.perf_counter()
+    with createFetcher() as fetcher:
+        scheduler = ScrapeScheduler(fetcher)
+        scraped = asyncio.run(scrapeLeague(scheduler, teams=teams))
+        print(f"\nFetched {len(scheduler.latencies)} pages in {time.perf_counter() - start:.1f}s, latency: {scheduler.latencyReport()}")
+
+        # Save stats data, the pages count as parsed once the import took them
+        if scraped["stats"]:
+            stat_df = cleanStats(mergeTeamRows(STATS_CSV, scraped["teams"], scraped["stats"]))
+            stat_df.to_csv(STATS_CSV, index=False)
+            print(f"\nSuccessfully saved stats for {len(scraped['stats'])} teams to stats.csv")
+            print(f"Total players: {len(stat_df)}")
+
+            # Import players into database via API, the import runs as a background job on the server
+            if importSucceeded(importDataset("players")):
+                scheduler.markParsed(scraped["parsed"]["stats"])
+        else:
+            print("\nNo squad stats changed since the last run, players not re-imported")
+
+        # Save schedule data
+        if scraped["schedules"]:
+            schedule_df = mergeTeamRows(SCHEDULES_CSV, scraped["teams"], scraped["schedules"])
+            schedule_df.to_csv(SCHEDULES_CSV, index=False)
+            print(f"Successfully saved schedules for {len(scraped['schedules'])} teams to schedules_2025_2026.csv")
+
+            # Import matches into database via API, the import runs as a background job on the server
+            if importSucceeded(importDataset("matches")):
+                scheduler.markParsed(scraped["parsed"]["schedules"])
+        else:
+            print("No schedule changed since the last run, matches not re-imported")
+
 
-finally:
-    driver.quit()
-    print("\nBrowser closed")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+What the scrapers ask the API.
+
+POST /<dataset>/import answers straight away with a job id, the import itself runs
+on the server, so the scrapers poll GET /jobs/{id} instead of holding one request
+open for minutes. GET /matches/awaiting-results tells the schedule scraper which
+teams have played since the last import.
+"""
+import requests
+import time
+import os
+
+# API configuration - can be set via environment variable or defaults to localhost
+API_BASE_URL = os.getenv('API_BASE_URL', 'http://localhost:8000')
+# how long to follow a job before leaving it to finish on the server
+IMPORT_WAIT_SECONDS = float(os.getenv('IMPORT_WAIT_SECONDS', '300'))
+POLL_SECONDS = 1.0
+
+
+def importDataset(dataset, mode="incremental"):
+    """Submits the import of `dataset` (teams, players or matches) and waits for it, returns the finished job or None"""
+    url = f"{API_BASE_URL}/{dataset}/import"
+    try:
+        print(f"\nImporting {dataset} into database...")
+        response = requests.post(url, params={"mode": mode}, timeout=30)
+        if response.status_code != 202:
+            print(f"API returned status {response.status_code}: {response.text}")
+            return None
+        job = response.json()
+        if job["coalesced"]:
+            print(f"Joined import job {job['id']} that was already waiting")
+
+        deadline = time.monotonic() + IMPORT_WAIT_SECONDS
+        while job["status"] in ("queued", "running"):
+            if time.monotonic() > deadline:
+                print(f"Import job {job['id']} is still {job['status']}, it will finish on the server")
+                return job
+            time.sleep(POLL_SECONDS)
+            job = requests.get(f"{API_BASE_URL}/jobs/{job['id']}", timeout=30).json()
+
+        if job["status"] == "succeeded":
+            phases = ", ".join(f"{phase['name']} {phase['seconds']}s" for phase in job["phases"])
+            print(f"✓ Successfully imported {dataset}: {job['rows']} ({phases})")
+        else:
+            print(f"Import job {job['id']} failed: {job['error']}")
+        return job
+    except requests.exceptions.ConnectionError:
+        print("Could not connect to API. Make sure the FastAPI server is running.")
+        print(f"Attempted URL: {url}")
+    except requests.exceptions.Timeout:
+        print("API request timed out. The import may still be processing.")
+    except Exception as e:
+        print(f"Error calling import API: {e}")
+    return None
+
+
+def teamsAwaitingResults():
+    """Names of the teams with finished fixtures the database has no result for, None when the API can't be asked"""
+    try:
+        response = requests.get(f"{API_BASE_URL}/matches/awaiting-results", timeout=30)
+        response.raise_for_status()
+        return [team["team_name"] for team in response.json()["teams"]]
+    except Exception as e:
+        print(f"Could not ask the API which teams have new results ({e})")
+        return None
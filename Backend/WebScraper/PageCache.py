@@ -0,0 +1,181 @@
+"""
+On-disk cache of the scraped pages.
+
+Bodies are stored once per content hash under pages/<sha256>.html. Each URL has
+an entry under urls/<sha256 of the url>.json with the hash of its latest body,
+the ETag, the Last-Modified date, when it was fetched and the hash of the body
+the scraper last parsed. A cached page is revalidated with If-None-Match /
+If-Modified-Since, so an unchanged page costs a 304 instead of a download.
+When the body still hashes the same as the one that was last parsed, the
+scrapers skip the parse and the import.
+
+SCRAPE_OFFLINE=1 replays the cache without touching the network, every page
+is parsed again, e.g. to benchmark or test the parsers.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+PAGE_CACHE_DIR = os.getenv('PAGE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'page_cache'))
+PAGE_CACHE = os.getenv('PAGE_CACHE', '1') == '1'
+SCRAPE_OFFLINE = os.getenv('SCRAPE_OFFLINE', '0') == '1'
+
+
+class PageNotCached(LookupError):
+    """Raised in offline mode for a page that was never fetched"""
+
+
+def bodyHash(body):
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def writeAtomically(path, text):
+    # the scheduler fetches from several threads, a reader never sees half a file
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(handle, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(temporary, path)
+
+
+class PageCache:
+    """The files under `directory`: bodies by content hash and one metadata entry per URL"""
+
+    def __init__(self, directory=PAGE_CACHE_DIR):
+        self.directory = directory
+        self.pages = os.path.join(directory, "pages")
+        self.urls = os.path.join(directory, "urls")
+        os.makedirs(self.pages, exist_ok=True)
+        os.makedirs(self.urls, exist_ok=True)
+
+    def entryPath(self, url):
+        return os.path.join(self.urls, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def bodyPath(self, digest):
+        return os.path.join(self.pages, digest + ".html")
+
+    def entry(self, url):
+        try:
+            with open(self.entryPath(url), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def body(self, entry):
+        with open(self.bodyPath(entry["hash"]), encoding="utf-8") as file:
+            return file.read()
+
+    def store(self, url, body, etag=None, last_modified=None, previous=None):
+        """Saves a downloaded body and its validators, returns the new entry"""
+        digest = bodyHash(body)
+        if not os.path.exists(self.bodyPath(digest)):
+            writeAtomically(self.bodyPath(digest), body)
+        entry = {
+            "url": url,
+            "hash": digest,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "parsed_hash": (previous or {}).get("parsed_hash"),
+        }
+        self.save(entry)
+        return entry
+
+    def save(self, entry):
+        writeAtomically(self.entryPath(entry["url"]), json.dumps(entry, indent=1))
+
+    def prune(self):
+        """Deletes bodies no URL points at any more, returns how many"""
+        live = set()
+        for name in os.listdir(self.urls):
+            if name.endswith(".json"):
+                with open(os.path.join(self.urls, name), encoding="utf-8") as file:
+                    entry = json.load(file)
+                live.add(entry["hash"])
+        removed = 0
+        for name in os.listdir(self.pages):
+            if name.endswith(".html") and name[:-len(".html")] not in live:
+                os.remove(os.path.join(self.pages, name))
+                removed += 1
+        return removed
+
+
+class CachedFetcher:
+    """
+    Fetches through `fetcher` (an HttpFetcher) and the page cache.
+    With `offline` pages come only from the cache and the network is never used.
+    """
+
+    def __init__(self, fetcher, cache=None, offline=False):
+        self.fetcher = fetcher
+        self.cache = cache if cache is not None else PageCache()
+        self.offline = offline
+        # how each page of this run was answered: downloaded, not modified (304) or replayed
+        self.outcomes = {}
+
+    def fetch(self, url):
+        entry = self.cache.entry(url)
+        if self.offline:
+            if entry is None:
+                raise PageNotCached(f"{url} is not in the page cache at {self.cache.directory}")
+            self.outcomes[url] = "replayed"
+            return self.cache.body(entry)
+
+        headers = {}
+        if entry is not None:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = self.fetcher.get(url, headers=headers)
+
+        if response.status_code == 304 and entry is not None:
+            entry["fetched_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            self.cache.save(entry)
+            self.outcomes[url] = "not_modified"
+            return self.cache.body(entry)
+
+        body = response.text
+        self.cache.store(url, body, response.headers.get("ETag"), response.headers.get("Last-Modified"), entry)
+        self.outcomes[url] = "downloaded"
+        return body
+
+    def unchanged(self, url):
+        """Whether the page fetched this run is the same body the scraper last parsed, never in offline mode"""
+        if self.offline or url not in self.outcomes:
+            return False
+        entry = self.cache.entry(url)
+        return entry is not None and entry["hash"] == entry.get("parsed_hash")
+
+    def markParsed(self, urls):
+        """Records that the pages' current bodies made it into the CSVs"""
+        for url in urls:
+            entry = self.cache.entry(url)
+            if entry is not None:
+                entry["parsed_hash"] = entry["hash"]
+                self.cache.save(entry)
+
+    def close(self):
+        # bodies replaced during the run are dropped once the run is over
+        if not self.offline:
+            self.cache.prune()
+        self.fetcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# fetchers without a cache (e.g. Selenium) always have a page worth parsing
+def pageUnchanged(fetcher, url):
+    unchanged = getattr(fetcher, "unchanged", None)
+    return unchanged is not None and unchanged(url)
+
+
+def markParsed(fetcher, urls):
+    mark = getattr(fetcher, "markParsed", None)
+    if mark is not None:
+        mark(urls)
@@ -0,0 +1,162 @@
+"""
+Fetches the fbref pages the scrapers parse.
+
+The league, squad and schedule pages are server-rendered tables, so a plain HTTP
+GET on a pooled keep-alive session returns the same HTML a browser would show,
+without starting Chrome for every page. Selenium is only used when asked for:
+SCRAPER_FETCHER=selenium fetches everything through headless Chrome, and
+SCRAPER_SELENIUM_FALLBACK=1 keeps HTTP but retries a page in Chrome when the
+response has no stats table (e.g. a bot check page). HTTP pages go through the
+on-disk page cache (PageCache.py) unless PAGE_CACHE=0.
+"""
+import requests
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
+from PageCache import CachedFetcher, PAGE_CACHE, SCRAPE_OFFLINE, pageUnchanged, markParsed
+
+# scheme and host of every page, tests point it at a local fixture server
+FBREF_BASE_URL = os.getenv('FBREF_BASE_URL', 'https://fbref.com').rstrip('/')
+SCRAPER_FETCHER = os.getenv('SCRAPER_FETCHER', 'http')
+SCRAPER_SELENIUM_FALLBACK = os.getenv('SCRAPER_SELENIUM_FALLBACK', '0') == '1'
+REQUEST_TIMEOUT = float(os.getenv('SCRAPER_REQUEST_TIMEOUT', '30'))
+# keep-alive connections kept open per host
+POOL_SIZE = int(os.getenv('SCRAPER_POOL_SIZE', '4'))
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+# every page the scrapers read has at least one of these
+STATS_TABLE_MARKER = 'stats_table'
+
+
+class HttpFetcher:
+    """GETs pages over one requests session, its connections are reused from page to page"""
+
+    def __init__(self, pool_size=POOL_SIZE, timeout=REQUEST_TIMEOUT, retries=3):
+        self.timeout = timeout
+        self.session = requests.Session()
+        # rate limits and server errors are retried with backoff, honouring Retry-After
+        retry = Retry(total=retries, backoff_factor=2, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "text/html", "Accept-Language": "en-GB,en;q=0.9"})
+
+    def get(self, url, headers=None):
+        """The response for `url`, a 304 answering a conditional request is returned rather than raised"""
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code != 304:
+            response.raise_for_status()
+        # without a charset requests would guess one, fbref pages are UTF-8
+        if "charset" not in response.headers.get("Content-Type", ""):
+            response.encoding = "utf-8"
+        return response
+
+    def fetch(self, url):
+        return self.get(url).text
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SeleniumFetcher:
+    """Loads pages in headless Chrome, started on the first fetch. Only used when opted in"""
+
+    def __init__(self, wait_seconds=10):
+        self.wait_seconds = wait_seconds
+        self.driver = None
+        # one browser, the scrape scheduler's worker threads take turns
+        self.lock = threading.Lock()
+
+    def fetch(self, url):
+        # imported here so the HTTP scrapers run without selenium or Chrome installed
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        with self.lock:
+            if self.driver is None:
+                self.driver = self._startDriver()
+            self.driver.get(url)
+            WebDriverWait(self.driver, self.wait_seconds).until(EC.presence_of_element_located((By.CLASS_NAME, STATS_TABLE_MARKER)))
+            return self.driver.page_source
+
+    def _startDriver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # Run in background
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+        return webdriver.Chrome(options=chrome_options)
+
+    def close(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+            print("\nBrowser closed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class FallbackFetcher:
+    """Fetches with `primary` and retries with `fallback` when that fails or returns a page without tables"""
+
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.fell_back = set()
+
+    def fetch(self, url):
+        try:
+            html = self.primary.fetch(url)
+            if STATS_TABLE_MARKER in html:
+                return html
+            print(f"  No stats table in {url}, retrying in the browser")
+        except requests.exceptions.RequestException as e:
+            print(f"  Fetching {url} failed ({e}), retrying in the browser")
+        self.fell_back.add(url)
+        return self.fallback.fetch(url)
+
+    # a page the browser loaded is always parsed, the primary's cache only knows its own pages
+    def unchanged(self, url):
+        return url not in self.fell_back and pageUnchanged(self.primary, url)
+
+    def markParsed(self, urls):
+        markParsed(self.primary, [url for url in urls if url not in self.fell_back])
+
+    def close(self):
+        self.primary.close()
+        self.fallback.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def createFetcher(kind=SCRAPER_FETCHER, selenium_fallback=SCRAPER_SELENIUM_FALLBACK, cache=PAGE_CACHE, offline=SCRAPE_OFFLINE):
+    """The fetcher picked by SCRAPER_FETCHER (http or selenium), SCRAPER_SELENIUM_FALLBACK, PAGE_CACHE and SCRAPE_OFFLINE"""
+    # replaying the cache needs neither the network nor a browser
+    if offline:
+        return CachedFetcher(HttpFetcher(), offline=True)
+    if kind == "selenium":
+        return SeleniumFetcher()
+    if kind != "http":
+        raise ValueError(f"Unknown SCRAPER_FETCHER '{kind}', use 'http' or 'selenium'")
+    fetcher = CachedFetcher(HttpFetcher()) if cache else HttpFetcher()
+    if selenium_fallback:
+        return FallbackFetcher(fetcher, SeleniumFetcher())
+    return fetcher
@@ -0,0 +1,27 @@
+"""
+lxml helpers shared by the scrapers.
+
+A page is parsed once with lxml and only the table that is needed is handed to
+pandas, instead of re-parsing the whole document with BeautifulSoup.
+"""
+from io import StringIO
+import lxml.html
+import pandas as pd
+
+# tables whose class list contains stats_table, same as soup.find_all('table', class_='stats_table')
+STATS_TABLE_XPATH = "//table[contains(concat(' ', normalize-space(@class), ' '), ' stats_table ')]"
+
+
+def statsTables(html):
+    """Every stats table on the page, in document order"""
+    return lxml.html.document_fromstring(html).xpath(STATS_TABLE_XPATH)
+
+
+def readTable(table):
+    """The table as a DataFrame, columns keep both header rows when the table has two"""
+    return pd.read_html(StringIO(lxml.html.tostring(table, encoding="unicode")), flavor="lxml")[0]
+
+
+def tableLinks(table):
+    """hrefs of the links in the table, in order"""
+    return [link.get("href") for link in table.iter("a") if link.get("href")]
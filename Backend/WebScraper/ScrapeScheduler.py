@@ -0,0 +1,114 @@
+"""
+Runs the page fetches of a scrape concurrently, at a polite rate per host.
+
+Instead of sleeping a fixed time after every page, each host gets a token bucket
+that hands out SCRAPE_RATE requests per second (bursts of up to SCRAPE_BURST),
+and at most SCRAPE_CONCURRENCY requests are in flight at once. Slow responses
+overlap with the wait for the next token, so a run takes about
+pages / SCRAPE_RATE instead of the sum of every page load and sleep.
+The default rate stays under fbref's limit of 10 requests a minute.
+"""
+import asyncio
+import time
+import os
+from urllib.parse import urlsplit
+from PageFetcher import POOL_SIZE
+from PageCache import pageUnchanged, markParsed
+
+SCRAPE_RATE = float(os.getenv('SCRAPE_RATE', '0.16'))  # requests per second per host, 0 for no limit
+SCRAPE_BURST = int(os.getenv('SCRAPE_BURST', '1'))
+SCRAPE_CONCURRENCY = int(os.getenv('SCRAPE_CONCURRENCY', str(POOL_SIZE)))
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average and up to `burst` back to back"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        # waiters queue on the lock, so tokens go out in the order they were asked for
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ScrapeScheduler:
+    """
+    Fetches pages through `fetcher` with bounded concurrency and a token bucket per host.
+    The fetcher is blocking, each request runs in a worker thread.
+    Every request's latency is kept in `latencies`.
+    """
+
+    def __init__(self, fetcher, rate=SCRAPE_RATE, burst=SCRAPE_BURST, concurrency=SCRAPE_CONCURRENCY):
+        self.fetcher = fetcher
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.latencies = []
+        self._buckets = {}
+        self._slots = None
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    async def fetch(self, url):
+        # created on first use so the semaphore belongs to the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        queued = time.perf_counter()
+        # a slot first, then the token, so a granted token is spent straight away
+        async with self._slots:
+            await self.bucket(url).acquire()
+            start = time.perf_counter()
+            error = None
+            try:
+                return await asyncio.to_thread(self.fetcher.fetch, url)
+            except Exception as e:
+                error = str(e)
+                raise
+            finally:
+                self.latencies.append({
+                    "url": url,
+                    "waited": round(start - queued, 4),
+                    "seconds": round(time.perf_counter() - start, 4),
+                    "error": error,
+                })
+
+    def unchanged(self, url):
+        """Whether the page is the body the scraper last parsed, only a caching fetcher knows"""
+        return pageUnchanged(self.fetcher, url)
+
+    def markParsed(self, urls):
+        markParsed(self.fetcher, urls)
+
+    def latencyReport(self):
+        """Request count, errors and latency percentiles in seconds"""
+        seconds = sorted(entry["seconds"] for entry in self.latencies)
+        if not seconds:
+            return {"requests": 0}
+        percentile = lambda p: seconds[min(len(seconds) - 1, int(p * len(seconds)))]
+        return {
+            "requests": len(seconds),
+            "errors": sum(1 for entry in self.latencies if entry["error"]),
+            "mean": round(sum(seconds) / len(seconds), 4),
+            "p50": percentile(0.5),
+            "p95": percentile(0.95),
+            "max": seconds[-1],
+            "waited": round(sum(entry["waited"] for entry in self.latencies), 4),
+        }
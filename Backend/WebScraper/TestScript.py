@@ -2,11 +2,16 @@ import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import precision_score, accuracy_score
 import os
+import sys
 
 # get path to matches.csv
 script_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(script_dir)
 matches_path = os.path.join(parent_dir, "MachineLearning", "matches.csv")
+
+# rolling averages engine shared with the backend and training scripts
+sys.path.insert(0, parent_dir)
+from MachineLearning.RollingStats import rollingFrame, ROLLING_COLS, ROLLING_FEATURES
 matches = pd.read_csv(matches_path, index_col=0)
 
 print("team1 VS team2 MATCH PREDICTOR")
@@ -19,22 +24,12 @@ matches["hour"] = matches["time"].str.replace(":.+", "", regex=True).astype("int
 matches["day"] = matches["date"].dt.dayofweek
 matches["target"] = (matches["result"] == "W").astype("int")
 
-# ===== ROLLING AVERAGES FUNCTION =====
-def rolling_averages(group, cols, new_cols):
-    group = group.sort_values("date")
-    rolling_stats = group[cols].rolling(3, closed='left').mean()
-    group[new_cols] = rolling_stats
-    group = group.dropna(subset=new_cols)
-    print("hi")
-    return group
-
-cols = ["gf", "ga", "sh", "sot", "dist", "fk", "pk", "pkatt"]
-new_cols = [f"{c}_rolling" for c in cols]
+# ===== ROLLING AVERAGES =====
+cols = ROLLING_COLS
+new_cols = ROLLING_FEATURES
 
 print("\nCalculating rolling averages (last 3 matches for each team)")
-matches_rolling = matches.groupby("team").apply(lambda x: rolling_averages(x, cols, new_cols))
-matches_rolling = matches_rolling.droplevel('team')
-matches_rolling.index = range(matches_rolling.shape[0])
+matches_rolling = rollingFrame(matches)
 
 # training model on data before 2022
 print("\nTraining Random Forest Classifier")
@@ -109,9 +104,7 @@ new_data["day"] = new_data["date"].dt.dayofweek
 new_data["target"] = (new_data["result"] == "W").astype("int")
 
 # Calculate rolling averages for 2025 data
-new_data_rolling = new_data.groupby("team").apply(lambda x: rolling_averages(x, cols, new_cols))
-new_data_rolling = new_data_rolling.droplevel('team')
-new_data_rolling.index = range(new_data_rolling.shape[0])
+new_data_rolling = rollingFrame(new_data)
 
 # Get latest stats for both teams
 arsenal_latest = new_data_rolling[new_data_rolling["team"] == "Arsenal"].sort_values("date").iloc[-1]
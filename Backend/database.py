@@ -1,5 +1,6 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 from fastapi import Depends
@@ -17,25 +18,84 @@ dbHost = os.getenv('DB_HOST')
 dbPort = os.getenv('DB_PORT')
 dbName = os.getenv('DB_NAME')
 
+# connections kept open by the request pool, how many more may be opened under load
+# and how long a request waits for a free connection before failing
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+
 # creates the database URL for SQLAlchemy
 URL_DATABASE = f'postgresql://{dbUser}:{dbPassword}@{dbHost}:{dbPort}/{dbName}'
+# requests go through asyncpg so a worker can wait on many queries at once
+ASYNC_URL_DATABASE = f'postgresql+asyncpg://{dbUser}:{dbPassword}@{dbHost}:{dbPort}/{dbName}'
 
+# the blocking engine only does the schema work at startup
 engine = create_engine(URL_DATABASE)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+asyncEngine = create_async_engine(
+    ASYNC_URL_DATABASE,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=True,
+)
+
+# rows stay readable after commit, an async session can't lazily reload expired attributes
+AsyncSessionLocal = async_sessionmaker(asyncEngine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Database dependency to get a session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
-dbDependancy = Annotated[SessionLocal, Depends(get_db)]
 
+dbDependancy = Annotated[AsyncSession, Depends(get_db)]
 
+# create_all() only creates missing tables, so columns added to an existing
+# model later on (e.g. prediction.match_id) are added here with their indexes
+def addMissingColumns(bind=None):
+    bind = bind if bind is not None else engine
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added = [column for column in table.columns if column.name not in existing and column.nullable]
+            for column in added:
+                columnType = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {columnType}'))
+            for index in table.indexes:
+                if any(column in added for column in index.columns):
+                    index.create(conn)
 
+# single-column match indexes replaced by the composite (team_name, kickoff) and (round, venue) ones
+REPLACED_INDEXES = {
+    "match": [
+        f"ix_match_{column}"
+        for column in ["date", "time", "round", "day", "venue", "result", "opponent",
+                       "captain", "formation", "oppFormation", "referee"]
+    ],
+}
 
+# create_all() also leaves indexes alone on existing tables, so indexes added to a model
+# are created here and the ones listed in REPLACED_INDEXES are dropped. Any other index,
+# e.g. one an operator added by hand, is left in place
+def syncIndexes(bind=None):
+    bind = bind if bind is not None else engine
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            declared = {index.name for index in table.indexes}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+            for name in REPLACED_INDEXES.get(table.name, []):
+                if name in existing and name not in declared:
+                    conn.execute(text(f'DROP INDEX "{name}"'))
@@ -4,18 +4,63 @@ from pydantic import BaseModel
 from typing import Union
 from typing import List, Annotated
 from Models.team import Base
-from database import engine, get_db
+from database import engine, asyncEngine, get_db, addMissingColumns, syncIndexes
 from sqlalchemy.orm import Session
 from Controllers.TeamController import importLeagueTable, readTeams, createTeam, TeamBase
 from Controllers.PlayerController import importPlayers, readAllPlayers, readPlayersPerTeam, createPlayer, PlayerBase
-from Controllers.MatchController import importMatches, readAllMatches, readMatchesPerTeam, createMatch, MatchBase
+from Controllers.MatchController import importMatches, readAllMatches, readMatchesPerTeam, createMatch, MatchBase, backfillMatchColumns
 from Routes.PlayerRoutes import router as playerRouter
 from Routes.TeamRoutes import router as teamRouter
 from Routes.MatchRoutes import router as matchRouter
 from Routes.Prediction import router as predictionRouter
+from Routes.StandingsRoutes import router as standingsRouter
+from Routes.JobRoutes import router as jobRouter
+from Controllers.ImportJobs import importJobs
+from Controllers.StandingsController import rebuildStandings
+from Controllers.FeatureStore import featureStore
+from Controllers.PredictionController import modelRegistry, SELECTED_MODEL
+from contextlib import asynccontextmanager
+from fastapi.responses import JSONResponse
+from Controllers.JsonEncoding import FastJSONResponse
+import time
 
-#starts the FastAPI app
-app = FastAPI()
+# what the warm-up loaded and how long each step took, reported by /ready
+readiness = {"ready": False, "steps": {}}
+
+def runWarmupStep(name, step):
+    start = time.perf_counter()
+    try:
+        detail = step()
+        readiness["steps"][name] = {"status": "ok", "seconds": round(time.perf_counter() - start, 4), **(detail or {})}
+    except Exception as e:
+        # the request path will retry anything that failed here on first use
+        print(f" Warm-up step '{name}' failed: {e}")
+        readiness["steps"][name] = {"status": "error", "seconds": round(time.perf_counter() - start, 4), "error": str(e)}
+
+def warmFeatureStore():
+    featureStore.build()
+    return {"teams": len(featureStore.teams), "version": featureStore.version}
+
+def warmModel():
+    loaded = modelRegistry.get(SELECTED_MODEL)
+    return {"model": loaded.name, "predictors": len(loaded.predictors)}
+
+#loads the feature data and the selected model before the app starts taking requests
+#so the first prediction after a deploy doesn't pay for CSV parsing and unpickling
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    readiness["ready"] = False
+    readiness["steps"] = {}
+    runWarmupStep("feature_store", warmFeatureStore)
+    runWarmupStep("model", warmModel)
+    readiness["ready"] = True
+    yield
+    # let queued imports finish, then close the pooled request connections on shutdown
+    await importJobs.shutdown()
+    await asyncEngine.dispose()
+
+#starts the FastAPI app, responses are encoded with orjson unless a route sends its own
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Enable CORS
 app.add_middleware(
@@ -24,17 +69,31 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # the frontend reads the next page cursor and revalidates with the ETag
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 app.include_router(playerRouter)
 app.include_router(teamRouter)
 app.include_router(matchRouter)
 app.include_router(predictionRouter)
+app.include_router(standingsRouter)
+app.include_router(jobRouter)
 
 #creates all tables and schemas in postgres database
 Base.metadata.create_all(bind=engine)
+addMissingColumns(engine)
+syncIndexes(engine)
+backfillMatchColumns(engine)
+rebuildStandings(engine)
 
 #basic root get request to test if backend is running
 @app.get("/")
 def read_root():
-    return {"Hello": "World"}
\ No newline at end of file
+    return {"Hello": "World"}
+
+#readiness check, 503 until the warm-up has run or if any warm-up step failed
+@app.get("/ready")
+def read_ready():
+    ok = readiness["ready"] and all(step["status"] == "ok" for step in readiness["steps"].values())
+    return JSONResponse(status_code=200 if ok else 503, content={"ready": ok, "steps": readiness["steps"]})
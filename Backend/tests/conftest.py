@@ -1,7 +1,15 @@
 """
 Pytest configuration and shared fixtures for backend tests.
 """
+import hashlib
 import os
+import sys
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
 import pytest
 
 # Set dummy environment variables BEFORE importing anything that uses database.py
@@ -11,30 +19,47 @@ os.environ.setdefault('DB_HOST', 'localhost')
 os.environ.setdefault('DB_PORT', '5432')
 os.environ.setdefault('DB_NAME', 'test_db')
 
-# Create in-memory SQLite database for testing BEFORE importing main
+# the scrapers import their helpers as scripts run from WebScraper/ do
+WEBSCRAPER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WebScraper")
+sys.path.insert(0, WEBSCRAPER_DIR)
+# fbref pages served by the fixture server, laid out by URL path
+FIXTURE_PAGES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "fbref")
+
+# Create a SQLite test database BEFORE importing main
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+
+# a file rather than :memory: so the blocking engine (schema setup and assertions)
+# and the aiosqlite engine the routes use see the same database
+TEST_DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DATABASE_PATH}"
+ASYNC_SQLALCHEMY_DATABASE_URL = f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}"
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
 test_engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
+# NullPool: every TestClient runs its own event loop, so connections are never reused across loops
+test_async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
 
-# Import database module and replace its engine BEFORE importing main
+# Import database module and replace its engines BEFORE importing main
 # This prevents main.py from trying to connect to a real database
 import database
 database.engine = test_engine
 database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+database.asyncEngine = test_async_engine
+database.AsyncSessionLocal = async_sessionmaker(test_async_engine, autoflush=False, expire_on_commit=False)
 
-# Now import main - it will use our test engine
+# Now import main - it will use our test engines
 from main import app
 from database import get_db, Base
+from Controllers.ResponseCache import tableVersions
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+TestingAsyncSessionLocal = async_sessionmaker(test_async_engine, autoflush=False, expire_on_commit=False)
 
 
 # Use the test_engine we created above
@@ -43,8 +68,10 @@ engine = test_engine
 
 @pytest.fixture(scope="function")
 def db_session():
-    """Create a fresh database session for each test."""
+    """Create a fresh database and a blocking session on it for each test."""
     Base.metadata.create_all(bind=engine)
+    # a fresh database is new data, so responses cached by earlier tests must not be served
+    tableVersions.bump(*Base.metadata.tables)
     db = TestingSessionLocal()
     try:
         yield db
@@ -55,14 +82,87 @@ def db_session():
 
 @pytest.fixture(scope="function")
 def client(db_session):
-    """Create a test client with database override."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
+    """Create a test client whose requests get async sessions on the test database."""
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture(scope="function")
+def import_data(client):
+    """Submit an import and wait for its background job, returns the finished job."""
+    def run(endpoint, mode=None, timeout=60):
+        response = client.post(endpoint, params={"mode": mode} if mode else None)
+        assert response.status_code == 202, response.text
+        job = response.json()
+        deadline = time.monotonic() + timeout
+        while job["status"] in ("queued", "running"):
+            assert time.monotonic() < deadline, f"import job {job['id']} did not finish"
+            time.sleep(0.01)
+            job = client.get(f"/jobs/{job['id']}").json()
+        return job
+    return run
+
+
+class FixturePageHandler(BaseHTTPRequestHandler):
+    """
+    Serves <server.root>/<path>.html over keep-alive HTTP/1.1 with an ETag and a
+    Last-Modified date, answering matching conditional requests with a 304.
+    Every request is recorded as (client address, path, status).
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = os.path.join(self.server.root, unquote(urlsplit(self.path).path).lstrip("/") + ".html")
+        if not os.path.isfile(path):
+            return self.sendEmpty(404)
+        with open(path, "rb") as page:
+            body = page.read()
+        validators = {}
+        if self.server.validators:
+            validators = {"ETag": f'"{hashlib.sha1(body).hexdigest()}"', "Last-Modified": formatdate(os.path.getmtime(path), usegmt=True)}
+            if self.headers.get("If-None-Match") == validators["ETag"]:
+                return self.sendEmpty(304, validators)
+        self.server.requests.append((self.client_address, self.path, 200))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in validators.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def sendEmpty(self, status, headers=None):
+        self.server.requests.append((self.client_address, self.path, status))
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="function")
+def fbref_server():
+    """
+    A local HTTP server with saved fbref pages, its base URL is server.url.
+    Tests may point server.root at a copy of the pages or turn off server.validators.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixturePageHandler)
+    server.daemon_threads = True
+    server.root = FIXTURE_PAGES
+    server.validators = True
+    server.requests = []
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
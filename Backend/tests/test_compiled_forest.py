@@ -0,0 +1,44 @@
+"""
+Unit tests for the array compiled random forest evaluator.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from MachineLearning.CompiledForest import compileForest, MAX_COMPILED_ROWS
+from Controllers.ModelRegistry import ModelRegistry
+from Controllers.PredictionController import MODEL_INFO
+
+
+def test_compiled_forest_matches_sklearn_on_random_forest():
+    """Test the compiled arrays give the same probabilities as predict_proba"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 6))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] > 0).astype(int)
+    rf = RandomForestClassifier(n_estimators=25, min_samples_split=4, random_state=0).fit(X, y)
+
+    compiled = compileForest(rf)
+    unseen = rng.normal(size=(50, 6))
+    np.testing.assert_allclose(compiled.predict_proba(unseen), rf.predict_proba(unseen), atol=1e-12)
+    np.testing.assert_array_equal(compiled.predict(unseen), rf.predict(unseen))
+
+    with pytest.raises(ValueError):
+        compiled.predict_proba(unseen[:, :4])
+
+
+@pytest.mark.parametrize("model_name", ["rf_basic", "rf_rolling"])
+def test_compiled_forest_matches_saved_models(model_name):
+    """Test the saved random forests are compiled on load and score like sklearn"""
+    loaded = ModelRegistry(MODEL_INFO).get(model_name)
+    assert loaded.compiled is not None
+
+    rf = loaded.model
+    rng = np.random.default_rng(1)
+    # sample rows around the split thresholds the forest actually uses
+    X = rng.uniform(-1, 30, size=(MAX_COMPILED_ROWS, rf.n_features_in_))
+    np.testing.assert_allclose(loaded.compiled.predict_proba(X), rf.predict_proba(X), atol=1e-12)
+
+
+def test_registry_only_compiles_random_forests():
+    """Test other model types are served as they were saved"""
+    loaded = ModelRegistry(MODEL_INFO).get("logistic_regression")
+    assert loaded.compiled is None
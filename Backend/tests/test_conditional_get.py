@@ -0,0 +1,60 @@
+"""
+Unit tests for ETag / If-None-Match on the polled endpoints.
+"""
+import pytest
+from fastapi import status
+from Controllers.ResponseCache import responseCache
+
+
+def test_teams_etag_and_not_modified(client, import_data):
+    """Test GET /teams/ answers If-None-Match with 304 until a team is written"""
+    import_data("/teams/import")
+    first = client.get("/teams/")
+    assert first.status_code == status.HTTP_200_OK
+    etag = first.headers["ETag"]
+
+    not_modified = client.get("/teams/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not_modified.content == b""
+
+    # the same version is served from the pre-serialized body
+    hits = responseCache.hits
+    assert client.get("/teams/").content == first.content
+    assert responseCache.hits == hits + 1
+
+    # a re-import with no changes keeps the ETag, a new team moves it on
+    import_data("/teams/import")
+    assert client.get("/teams/", headers={"If-None-Match": etag}).status_code == status.HTTP_304_NOT_MODIFIED
+    client.post("/teams/", json={"rank": 21, "name": "Promoted FC"})
+    changed = client.get("/teams/", headers={"If-None-Match": etag})
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 21
+
+
+def test_etag_differs_per_query(client, import_data):
+    """Test a projected or paged read has its own ETag and keeps its cursor header"""
+    import_data("/teams/import")
+    full = client.get("/teams/")
+    page = client.get("/teams/?limit=5&fields=name,points")
+    assert page.headers["ETag"] != full.headers["ETag"]
+    assert page.headers["X-Next-Cursor"] == page.json()[-1]["name"]
+    # cached copies keep the cursor header too
+    assert client.get("/teams/?limit=5&fields=name,points").headers["X-Next-Cursor"] == page.headers["X-Next-Cursor"]
+
+
+def test_predictions_etag_moves_on_prediction_write(client):
+    """Test storing a prediction invalidates the cached GET /predictions/ body"""
+    empty = client.get("/predictions/")
+    assert empty.json() == []
+    etag = empty.headers["ETag"]
+
+    match_data = {
+        "date": "2026-01-10", "time": "15:00", "round": "Matchweek 21", "day": "Sat", "venue": "Home",
+        "result": "nan", "opponent": "Chelsea", "team_name": "Arsenal", "captain": "", "formation": "",
+        "oppFormation": "", "referee": ""
+    }
+    client.post("/predict/?model=rf_basic", json=match_data)
+    response = client.get("/predictions/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) >= 1
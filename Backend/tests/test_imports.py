@@ -0,0 +1,115 @@
+"""
+Unit tests for the bulk CSV import path.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import status
+from Controllers.BulkImport import cleanFrame, diffImport, MATCH_COLUMNS, MATCH_KEY, PLAYER_COLUMNS, TEAM_COLUMNS
+
+
+def test_clean_frame_converts_like_the_row_by_row_import():
+    """Test missing values, missing columns and truncation behave like the old per-row conversion"""
+    df = pd.DataFrame({
+        "Player": ["Bukayo Saka", "Unknown"],
+        "Age": ["24-012", np.nan],
+        "MP": [10, np.nan],
+        "Min": [812.0, np.nan],
+        "xG": [3.4, np.nan],
+        "Team": ["Arsenal", "Arsenal"],
+    })
+    players = cleanFrame(df, PLAYER_COLUMNS)
+
+    assert list(players.columns) == [target for target, _, _ in PLAYER_COLUMNS]
+    assert players["age"].tolist() == [24.0, 0.0]
+    assert players["matchesPlayed"].tolist() == [10, 0]
+    assert players["minutes"].tolist() == [812, 0]
+    assert players["expectedGoals"].tolist() == [3.4, 0.0]
+    # columns missing from the CSV fall back to 0 and empty strings
+    assert players["redCards"].tolist() == [0, 0]
+    assert players["nation"].tolist() == ["", ""]
+
+    matches = cleanFrame(pd.DataFrame({
+        "Date": ["2025-08-17", "2026-01-10"],
+        "Time": ["16:30 (08:30)", np.nan],
+        "Result": ["W", np.nan],
+        "GF": [1.0, np.nan],
+        "Attendance": [60250.0, np.nan],
+    }), MATCH_COLUMNS)
+    # unplayed fixtures have no result or goals
+    assert matches["result"].tolist() == ["W", None]
+    assert matches["gf"].tolist()[0] == 1 and pd.isna(matches["gf"].tolist()[1])
+    assert matches["attendance"].tolist() == [60250, 0]
+    # kickoffs are stored in UTC: 16:30 BST is 15:30 UTC, a missing time means noon local
+    assert matches["kickoff"].tolist() == [pd.Timestamp("2025-08-17 15:30"), pd.Timestamp("2026-01-10 12:00")]
+
+
+@pytest.mark.parametrize("endpoint, expected_rows", [
+    ("/teams/import", 20),
+    ("/players/import", 619),
+    ("/matches/import", 760),
+])
+def test_import_endpoints_bulk_insert_every_row(client, import_data, endpoint, expected_rows):
+    """Test each import endpoint stores every CSV row"""
+    job = import_data(endpoint)
+    assert job["status"] == "succeeded"
+    assert job["rows"]["read"] == job["result"]["inserted"] == expected_rows
+    assert f"imported {expected_rows}" in job["result"]["message"]
+
+
+def test_import_replaces_existing_rows(client, import_data, db_session):
+    """Test importing twice doesn't duplicate the table"""
+    from Models.team import Team
+
+    import_data("/teams/import")
+    import_data("/teams/import")
+    assert db_session.query(Team).count() == 20
+    arsenal = db_session.query(Team).filter(Team.name == "Arsenal").first()
+    assert isinstance(arsenal.rank, int) and arsenal.rank > 0
+
+
+def test_incremental_import_only_writes_differences(db_session):
+    """Test diffImport inserts, updates and deletes only the rows that changed"""
+    from Models.match import Match
+
+    schedule = cleanFrame(pd.read_csv("WebScraper/schedules_2025_2026.csv"), MATCH_COLUMNS)
+    assert diffImport(db_session, Match, schedule, MATCH_KEY)["inserted"] == len(schedule)
+    db_session.commit()
+    ids_before = {(m.team_name, m.date, m.opponent): m.match_id for m in db_session.query(Match).all()}
+
+    # a result comes in, a fixture is dropped and another one is added
+    rescraped = schedule.copy()
+    played = rescraped.index[rescraped["result"].isna()][0]
+    rescraped.loc[played, ["result", "gf", "ga"]] = ["W", 2, 1]
+    dropped = rescraped.iloc[0]
+    rescraped = rescraped.drop(index=rescraped.index[0])
+    added = rescraped.iloc[[0]].assign(date="2026-06-01")
+    rescraped = pd.concat([rescraped, added], ignore_index=True)
+
+    changes = diffImport(db_session, Match, rescraped, MATCH_KEY)
+    db_session.commit()
+    assert changes == {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": len(schedule) - 2}
+
+    assert db_session.query(Match).count() == len(schedule)
+    key = tuple(schedule.loc[played, MATCH_KEY])
+    updated = db_session.query(Match).filter(Match.team_name == key[0], Match.date == key[1], Match.opponent == key[2]).one()
+    assert (updated.result, updated.gf, updated.ga) == ("W", 2, 1)
+    # untouched and updated rows keep their ids, so stored predictions still point at them
+    assert updated.match_id == ids_before[key]
+    assert db_session.query(Match).filter(Match.match_id == ids_before[tuple(dropped[MATCH_KEY])]).first() is None
+
+
+def test_import_mode_parameter(client, import_data):
+    """Test ?mode=replace reloads the whole table and unknown modes are rejected"""
+    first = import_data("/teams/import")["result"]
+    assert first["inserted"] == 20
+
+    again = import_data("/teams/import")["result"]
+    assert again["unchanged"] == 20 and again["inserted"] == again["updated"] == again["deleted"] == 0
+
+    replaced = import_data("/teams/import", mode="replace")["result"]
+    assert replaced["mode"] == "replace"
+    assert replaced["deleted"] == 20 and replaced["inserted"] == 20
+
+    response = client.post("/teams/import?mode=sometimes")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
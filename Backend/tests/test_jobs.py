@@ -0,0 +1,86 @@
+"""
+Unit tests for the background import jobs.
+"""
+import asyncio
+from fastapi import status
+from Controllers.ImportJobs import ImportJobQueue, IMPORT_PHASES
+
+
+def test_import_job_reports_phases_and_rows(client, import_data):
+    """Test POST /matches/import answers 202 with a job that GET /jobs/{id} follows to the end"""
+    response = client.post("/matches/import")
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = response.json()
+    assert response.headers["Location"] == f"/jobs/{job['id']}"
+    assert job["dataset"] == "matches" and job["status"] in ("queued", "running", "succeeded")
+
+    job = import_data("/matches/import")
+    assert job["status"] == "succeeded" and job["error"] is None
+    assert [phase["name"] for phase in job["phases"]] == IMPORT_PHASES["matches"]
+    assert all(phase["seconds"] >= 0 for phase in job["phases"])
+    assert job["progress"]["fraction"] == 1.0 and job["progress"]["phase"] is None
+    assert job["rows"]["read"] == 760
+    assert job["result"]["predictions"]["predicted"] > 0
+
+    assert job["id"] in [listed["id"] for listed in client.get("/jobs/").json()]
+    assert client.get("/jobs/unknown").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_duplicate_submissions_coalesce():
+    """Test submissions made while a job waits join it, and a replace upgrades the waiting job"""
+    async def scenario():
+        queue = ImportJobQueue()
+        release = asyncio.Event()
+        runs = []
+
+        async def runner(db, job):
+            runs.append((job.dataset, job.mode))
+            if job.dataset == "teams":
+                await release.wait()
+            return {"mode": job.mode}
+
+        running = queue.submit("teams", "incremental", runner)
+        await asyncio.sleep(0)
+        waiting = queue.submit("teams", "incremental", runner)
+        joined = queue.submit("teams", "replace", runner)
+        # other datasets have their own lane and don't wait for the teams import
+        players = queue.submit("players", "incremental", runner)
+        await asyncio.sleep(0.01)
+        assert players.status == "succeeded" and running.status == "running"
+
+        release.set()
+        await queue.shutdown()
+        return running, waiting, joined, runs
+
+    running, waiting, joined, runs = asyncio.run(scenario())
+    assert waiting is joined and waiting is not running
+    assert waiting.coalesced == 1 and waiting.mode == "replace"
+    assert runs == [("teams", "incremental"), ("players", "incremental"), ("teams", "replace")]
+    assert running.status == waiting.status == "succeeded"
+
+
+def test_failed_import_job(client, import_data, monkeypatch):
+    """Test an import that raises leaves a failed job with the error instead of a 500"""
+    import Controllers.TeamController as TeamController
+    monkeypatch.setattr(TeamController.pd, "read_csv", lambda path: (_ for _ in ()).throw(OSError("table.csv is missing")))
+
+    job = import_data("/teams/import")
+    assert job["status"] == "failed"
+    assert "table.csv is missing" in job["error"]
+    assert [phase["name"] for phase in job["phases"]] == ["read"]
+
+
+def test_failed_precompute_keeps_import_succeeded(client, import_data, monkeypatch):
+    """Test a failing prediction precompute is a warning on a succeeded match import, not a failed job"""
+    from fastapi import HTTPException
+    import Routes.MatchRoutes as MatchRoutes
+
+    async def failingPrecompute(db):
+        raise HTTPException(status_code=500, detail="Error precomputing predictions: model is missing")
+    monkeypatch.setattr(MatchRoutes, "precomputeUpcomingPredictions", failingPrecompute)
+
+    job = import_data("/matches/import")
+    assert job["status"] == "succeeded" and job["error"] is None
+    assert job["rows"]["read"] == 760
+    assert "model is missing" in job["result"]["predictions"]["error"]
+    assert len(job["warnings"]) == 1 and "model is missing" in job["warnings"][0]
@@ -0,0 +1,120 @@
+"""
+Unit tests for pagination, filtering and field projection on the list endpoints.
+"""
+import asyncio
+import json
+import httpx
+import pytest
+from fastapi import status
+from main import app
+
+
+def read_all_pages(client, url, limit):
+    rows, after = [], None
+    while True:
+        response = client.get(url, params={"limit": limit, **({"after": after} if after else {})})
+        assert response.status_code == status.HTTP_200_OK
+        rows += response.json()
+        after = response.headers.get("X-Next-Cursor")
+        if after is None:
+            return rows
+
+
+@pytest.mark.parametrize("import_url, url", [
+    ("/players/import", "/players/"),
+    ("/matches/import", "/matches/"),
+    ("/teams/import", "/teams/"),
+])
+def test_keyset_pages_cover_every_row_once(client, import_data, import_url, url):
+    """Test following X-Next-Cursor returns the same rows as an unpaged read"""
+    import_data(import_url)
+    everything = client.get(url).json()
+    assert "X-Next-Cursor" not in client.get(url).headers
+    assert read_all_pages(client, url, limit=7) == everything
+
+
+def test_player_filters_and_projection(client, import_data):
+    """Test ?team=, ?position= and ?fields= on GET /players/"""
+    import_data("/players/import")
+    response = client.get("/players/", params={"team": "Arsenal", "position": "FW", "fields": "name,goals,team_name"})
+    assert response.status_code == status.HTTP_200_OK
+    players = response.json()
+    assert players
+    # the primary key is always returned so the client can page
+    assert all(set(player) == {"id", "name", "goals", "team_name"} for player in players)
+    assert all(player["team_name"] == "Arsenal" for player in players)
+
+
+def test_match_filters(client, import_data):
+    """Test ?round=, ?venue= and the date range on GET /matches/"""
+    import_data("/matches/import")
+    week = client.get("/matches/", params={"round": "5", "venue": "Home", "fields": "round,venue"}).json()
+    assert len(week) == 10
+    assert all(match["round"] == "Matchweek 5" and match["venue"] == "Home" for match in week)
+
+    september = client.get("/matches/", params={"date_from": "2025-09-01", "date_to": "2025-09-30", "fields": "date"}).json()
+    assert september and all("2025-09-01" <= match["date"] <= "2025-09-30" for match in september)
+
+
+def test_list_endpoints_reject_bad_parameters(client):
+    """Test unknown fields and malformed cursors are 400s"""
+    assert client.get("/players/?fields=name,shoeSize").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/matches/?limit=5&after=yesterday").status_code == status.HTTP_400_BAD_REQUEST
+    assert client.get("/teams/?limit=0").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.parametrize("import_url, url", [
+    ("/players/import", "/players/"),
+    ("/matches/import", "/matches/"),
+])
+def test_ndjson_and_columnar_formats(client, import_data, import_url, url):
+    """Test ?format=ndjson and ?format=columns carry the same rows as the default JSON list"""
+    import_data(import_url)
+    everything = client.get(url).json()
+
+    response = client.get(url, params={"format": "ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == everything
+
+    columns = client.get(url, params={"format": "columns"}).json()
+    assert [dict(zip(columns, values)) for values in zip(*columns.values())] == everything
+
+    # ndjson honours limit and after like the other formats
+    page = client.get(url, params={"format": "ndjson", "limit": 3, "fields": "team_name"}).text.splitlines()
+    assert len(page) == 3
+
+    assert client.get(url, params={"format": "xml"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_concurrent_reads_on_one_event_loop(client, import_data):
+    """Test many list requests awaited together on a single loop each get their own session"""
+    import_data("/players/import")
+    expected = client.get("/players/", params={"team": "Arsenal"}).json()
+
+    async def read_together():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+            return await asyncio.gather(*[async_client.get("/players/", params={"team": "Arsenal"}) for _ in range(20)])
+
+    responses = asyncio.run(read_together())
+    assert all(response.status_code == status.HTTP_200_OK for response in responses)
+    assert all(response.json() == expected for response in responses)
+
+
+def test_response_models_send_every_column(client, import_data):
+    """Test the pydantic response models return the same fields as the list endpoints"""
+    import_data("/players/import")
+    import_data("/matches/import")
+    player = client.get("/players/", params={"limit": 1}).json()[0]
+    assert client.get(f"/players/{player['team_name']}").json()[0] == player
+
+    match = client.get("/matches/", params={"limit": 1}).json()[0]
+    assert client.get(f"/matches/{match['match_id']}").json() == match
+
+
+def test_cursor_and_etag_headers_are_exposed_to_the_frontend(client, import_data):
+    """Test cross-origin reads from the frontend can see X-Next-Cursor and ETag"""
+    import_data("/teams/import")
+    response = client.get("/teams/", params={"limit": 5}, headers={"Origin": "http://localhost:3000"})
+    assert response.headers["X-Next-Cursor"]
+    exposed = {header.strip().lower() for header in response.headers["Access-Control-Expose-Headers"].split(",")}
+    assert {"x-next-cursor", "etag"} <= exposed
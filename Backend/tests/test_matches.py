@@ -2,6 +2,7 @@
 Unit tests for Match endpoints and controllers.
 """
 import pytest
+from datetime import date, timedelta
 from fastapi import status
 
 
@@ -68,3 +69,85 @@ def test_read_matches_by_team(client):
     assert isinstance(matches, list)
     assert len(matches) > 0
     assert all(match["team_name"] == "Arsenal" for match in matches)
+
+
+def test_match_kickoff_is_stored_in_utc(client):
+    """Test the local fbref date and time become a UTC kickoff and unplayed results are null"""
+    fixture = {
+        "date": "2025-08-17", "time": "16:30 (08:30)", "round": "Matchweek 1", "day": "Sun", "venue": "Home",
+        "result": "nan", "gf": 0, "ga": 0, "opponent": "Chelsea", "team_name": "Arsenal",
+        "captain": "", "formation": "", "oppFormation": "", "referee": ""
+    }
+    data = client.post("/matches/", json=fixture).json()
+    # 16:30 BST is 15:30 UTC, the display text is kept as scraped
+    assert data["kickoff"] == "2025-08-17T15:30:00"
+    assert data["time"] == "16:30 (08:30)"
+    assert data["result"] is None and data["gf"] is None and data["ga"] is None
+
+    bad = client.post("/matches/", json={**fixture, "date": "not a date"})
+    assert bad.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_current_week_uses_kickoff_range(client):
+    """Test GET /matches/current-week returns this week's unplayed home fixtures"""
+    today = date.today().isoformat()
+    fixture = {
+        "date": today, "time": "20:00", "round": "Matchweek 9", "day": "", "venue": "Home",
+        "opponent": "Chelsea", "team_name": "Arsenal", "captain": "", "formation": "", "oppFormation": "", "referee": ""
+    }
+    client.post("/matches/", json=fixture)
+    client.post("/matches/", json={**fixture, "venue": "Away", "team_name": "Chelsea", "opponent": "Arsenal"})
+    client.post("/matches/", json={**fixture, "date": "2024-01-01", "team_name": "Wolves"})
+
+    response = client.get("/matches/current-week")
+    assert response.status_code == status.HTTP_200_OK
+    assert [match["team_name"] for match in response.json()] == ["Arsenal"]
+
+    in_range = client.get("/matches/", params={"date_from": today, "date_to": today, "fields": "team_name"}).json()
+    assert sorted(match["team_name"] for match in in_range) == ["Arsenal", "Chelsea"]
+
+
+def test_teams_awaiting_results(client, db_session):
+    """Test GET /matches/awaiting-results lists teams whose finished fixtures have no result yet"""
+    from Models.match import Match
+    from Controllers.Kickoff import utcNow, MATCH_RESULT_DELAY
+
+    now = utcNow()
+    db_session.add_all([
+        # finished without a result: Arsenal twice, Chelsea once
+        Match(team_name="Arsenal", opponent="Chelsea", kickoff=now - timedelta(days=3), result=None),
+        Match(team_name="Arsenal", opponent="Wolves", kickoff=now - timedelta(days=10), result=None),
+        Match(team_name="Chelsea", opponent="Arsenal", kickoff=now - timedelta(days=3), result=None),
+        # already scraped, still being played and not played yet
+        Match(team_name="Wolves", opponent="Arsenal", kickoff=now - timedelta(days=10), result="L"),
+        Match(team_name="Everton", opponent="Fulham", kickoff=now - MATCH_RESULT_DELAY / 2, result=None),
+        Match(team_name="Fulham", opponent="Everton", kickoff=now + timedelta(days=2), result=None),
+    ])
+    db_session.commit()
+
+    response = client.get("/matches/awaiting-results")
+    assert response.status_code == status.HTTP_200_OK
+    teams = response.json()["teams"]
+    assert [(team["team_name"], team["fixtures"]) for team in teams] == [("Arsenal", 2), ("Chelsea", 1)]
+
+
+def test_sync_indexes_only_drops_replaced_indexes(db_session):
+    """Test syncIndexes drops the replaced match indexes but keeps indexes added by hand"""
+    from sqlalchemy import inspect, text
+    from database import syncIndexes
+
+    engine = db_session.get_bind()
+    with engine.begin() as conn:
+        conn.execute(text('CREATE INDEX "ix_match_date" ON match (date)'))
+        conn.execute(text('CREATE INDEX "ix_match_attendance" ON match (attendance)'))
+        conn.execute(text('CREATE INDEX "ix_team_rank_points" ON team (rank, points)'))
+
+    syncIndexes(engine)
+
+    inspector = inspect(engine)
+    match_indexes = {index["name"] for index in inspector.get_indexes("match")}
+    team_indexes = {index["name"] for index in inspector.get_indexes("team")}
+    assert "ix_match_date" not in match_indexes
+    assert "ix_match_team_name_kickoff" in match_indexes
+    assert "ix_match_attendance" in match_indexes
+    assert "ix_team_rank_points" in team_indexes
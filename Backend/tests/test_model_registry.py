@@ -0,0 +1,129 @@
+"""
+Unit tests for the model registry and the ?model= prediction parameter.
+"""
+import threading
+import pytest
+from fastapi import status
+from Controllers.ModelRegistry import ModelRegistry
+from Controllers.PredictionController import MODEL_INFO
+
+
+def test_registry_loads_each_model_once_under_concurrency():
+    """Test concurrent first requests for a model share a single load"""
+    registry = ModelRegistry(MODEL_INFO)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("rf_rolling"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert registry.loads == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_registry_evicts_least_recently_used_over_budget():
+    """Test models are unloaded in LRU order once the memory budget is exceeded"""
+    # the two random forests are just under 2MB each, so only one fits in 3MB
+    registry = ModelRegistry(MODEL_INFO, memory_budget_mb=3)
+    registry.get("rf_basic")
+    registry.get("logistic_regression")
+    registry.get("rf_basic")
+    registry.get("rf_rolling")
+
+    loaded = [entry["model"] for entry in registry.status()["loaded"]]
+    assert "rf_basic" not in loaded
+    assert loaded[-1] == "rf_rolling"
+    assert registry.evictions >= 1
+
+
+def test_registry_rejects_unknown_model():
+    """Test asking for a model that isn't in MODEL_INFO fails"""
+    with pytest.raises(ValueError):
+        ModelRegistry(MODEL_INFO).get("not_a_model")
+
+
+def test_predict_with_model_parameter(client):
+    """Test POST /predict/?model= scores with the requested model"""
+    match_data = {
+        "date": "2026-01-10",
+        "time": "15:00",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "opponent": "Chelsea",
+        "team_name": "Arsenal",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    basic = client.post("/predict/?model=rf_basic", json=match_data)
+    rolling = client.post("/predict/?model=rf_rolling", json=match_data)
+    assert basic.status_code == status.HTTP_200_OK
+    assert rolling.status_code == status.HTTP_200_OK
+    assert basic.json()["accuracy"] != rolling.json()["accuracy"]
+
+    response = client.post("/predict/?model=not_a_model", json=match_data)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    models = client.get("/predict/models").json()
+    assert models["default"] == "rf_rolling"
+    assert set(models["available"]) == set(MODEL_INFO)
+
+
+def test_predict_with_unloadable_model_is_unavailable(client, monkeypatch):
+    """Test a model the registry can't load gives a 503 instead of training one on the request path"""
+    from Controllers import PredictionController
+
+    match_data = {
+        "date": "2026-01-10",
+        "time": "15:00",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "opponent": "Chelsea",
+        "team_name": "Arsenal",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    xgboost = client.post("/predict/?model=xgboost", json=match_data)
+    assert xgboost.status_code == status.HTTP_200_OK
+
+    def failingGet(name):
+        raise FileNotFoundError(f"{name}.pkl is missing")
+
+    monkeypatch.setattr(PredictionController.modelRegistry, "get", failingGet)
+    response = client.post("/predict/?model=logistic_regression", json=match_data)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+def test_predict_with_label_only_model(client):
+    """Test a model without predict_proba (svm) returns a winner without made-up probabilities"""
+    match_data = {
+        "date": "2026-01-10",
+        "time": "15:00",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "opponent": "Chelsea",
+        "team_name": "Arsenal",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    response = client.post("/predict/?model=svm", json=match_data)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["prediction"] in ("Arsenal", "Chelsea", "Draw")
+    for field in ("home_win_prob", "draw_prob", "away_win_prob", "confidence"):
+        assert data[field] is None
+
+    stored = client.get("/predictions/").json()
+    assert any(entry["home_team"] == "Arsenal" and entry["home_win_prob"] is None for entry in stored)
@@ -24,3 +24,305 @@ def test_read_all_predictions(client):
     assert response.status_code == status.HTTP_200_OK
     predictions = response.json()
     assert isinstance(predictions, list)
+
+
+def test_feature_store_rebuilds_after_invalidate():
+    """Test the feature store serves cached rolling features and rebuilds once invalidated"""
+    from Controllers.FeatureStore import featureStore, ROLLING_FEATURES
+
+    featureStore.ensureLoaded()
+    version = featureStore.version
+    features = featureStore.getLatestFeatures("Arsenal", "2026-06-01")
+    assert set(features) == set(ROLLING_FEATURES)
+
+    # lookups should not trigger a rebuild
+    featureStore.getLatestFeatures("Chelsea", "2026-06-01")
+    assert featureStore.version == version
+
+    featureStore.invalidate()
+    assert featureStore.getLatestFeatures("Arsenal", "2026-06-01") == features
+    assert featureStore.version == version + 1
+
+
+def test_predict_match_unknown_team(client):
+    """Test prediction returns 404 for a team that is not in the schedule"""
+    match_data = {
+        "date": "2026-01-10",
+        "time": "15:00",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "opponent": "Chelsea",
+        "team_name": "Not A Team",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    response = client.post("/predict/", json=match_data)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_predict_batch(client):
+    """Test predicting several fixtures at once via POST /predict/batch"""
+    fixture = {
+        "date": "2026-01-10",
+        "time": "15:00",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    fixtures = [
+        dict(fixture, team_name="Arsenal", opponent="Chelsea"),
+        dict(fixture, team_name="Liverpool", opponent="Tottenham"),
+    ]
+    from Controllers.PredictionCache import predictionCache
+    predictionCache.clear()
+
+    response = client.post("/predict/batch", json=fixtures)
+    assert response.status_code == status.HTTP_200_OK
+    predictions = response.json()
+    assert [p["home_team"] for p in predictions] == ["Arsenal", "Liverpool"]
+
+    # batch results match the single fixture endpoint
+    single = client.post("/predict/", json=fixtures[1]).json()
+    assert single == predictions[1]
+
+    # the repeated fixture came from the cache so no extra row was stored
+    assert len(client.get("/predictions/").json()) == 2
+
+
+def test_predict_matchweek(client):
+    """Test predicting every home fixture of a matchweek via POST /predict/matchweek/{weekNumber}"""
+    match_data = {
+        "date": "2026-01-10",
+        "time": "15:00 (07:00)",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "opponent": "Chelsea",
+        "team_name": "Arsenal",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    client.post("/matches/", json=match_data)
+    client.post("/matches/", json=dict(match_data, team_name="Chelsea", opponent="Arsenal", venue="Away"))
+
+    response = client.post("/predict/matchweek/21")
+    assert response.status_code == status.HTTP_200_OK
+    predictions = response.json()
+    assert len(predictions) == 1
+    assert predictions[0]["home_team"] == "Arsenal"
+    assert predictions[0]["away_team"] == "Chelsea"
+
+
+def test_import_precomputes_fixture_predictions(client, import_data, db_session):
+    """Test importing matches precomputes predictions served by GET /predictions/fixture/{match_id}"""
+    from Models.match import Match
+
+    job = import_data("/matches/import")
+    assert job["status"] == "succeeded"
+    summary = job["result"]["predictions"]
+    assert summary["predicted"] > 0
+
+    upcoming = db_session.query(Match).filter(Match.result.is_(None), Match.venue == "Home").first()
+    response = client.get(f"/predictions/fixture/{upcoming.match_id}")
+    assert response.status_code == status.HTTP_200_OK
+    prediction = response.json()
+    assert prediction["home_team"] == upcoming.team_name
+    assert prediction["away_team"] == upcoming.opponent
+
+    # re-importing replaces the precomputed predictions instead of adding more
+    import_data("/matches/import")
+    assert len(client.get("/predictions/").json()) == summary["predicted"]
+
+
+def test_read_prediction_for_unknown_fixture(client):
+    """Test GET /predictions/fixture/{match_id} returns 404 when nothing was precomputed"""
+    response = client.get("/predictions/fixture/999999")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_feature_store_append_result():
+    """Test a new result moves the team's rolling features forward without a rebuild"""
+    from Controllers.FeatureStore import featureStore
+
+    featureStore.build()
+    version = featureStore.version
+    window = featureStore.engine.current("Arsenal")
+    dates, rows = featureStore._rolling["Arsenal"]
+    size = len(dates)
+
+    # halfway through an append the row is in but its date isn't, readers still see the old latest row
+    previous = featureStore.getLatestFeatures("Arsenal", "2027-01-01")
+    rows.append(rows[-1] + 1)
+    assert featureStore.getLatestFeatures("Arsenal", "2027-01-01") == previous
+    rows.pop()
+
+    stats = {"gf": 4, "ga": 0, "sh": 15, "sot": 7, "dist": 16.2, "fk": 1, "pk": 0, "pkatt": 0}
+    featureStore.appendResult("Arsenal", "2026-12-31", stats)
+    assert len(dates) == len(rows) == size + 1
+    # the same result posted again is already in the window
+    featureStore.appendResult("Arsenal", "2026-12-31", stats)
+    assert len(dates) == size + 1
+    latest = featureStore.getLatestFeatures("Arsenal", "2027-01-01")
+    assert latest["gf_rolling"] == pytest.approx(window[0])
+    assert latest["ga_rolling"] == pytest.approx(window[1])
+    assert featureStore.version == version + 1
+
+    # restore the schedule features for other tests
+    featureStore.invalidate()
+
+
+def test_feature_store_append_without_stats_rebuilds():
+    """Test a result missing shooting stats marks the store stale instead of padding it with zeros"""
+    from Controllers.FeatureStore import featureStore
+
+    featureStore.build()
+    version = featureStore.version
+    size = len(featureStore._rolling["Arsenal"][0])
+
+    featureStore.appendResult("Arsenal", "2026-12-31", {"gf": 4, "ga": 0})
+    assert featureStore.getLatestFeatures("Arsenal", "2027-01-01") is not None
+    # the lookup rebuilt the store from the CSV rather than appending the partial result
+    assert featureStore.version == version + 1
+    assert len(featureStore._rolling["Arsenal"][0]) == size
+
+
+def test_opponent_code_lookup():
+    """Test opponent codes are exact, accept schedule aliases and fall back for unknown teams"""
+    from Controllers.FeatureStore import featureStore, DEFAULT_OPPONENT_CODE
+
+    assert featureStore.getOpponentCode("Manchester City") != featureStore.getOpponentCode("Manchester Utd")
+    assert featureStore.getOpponentCode("Manchester United") == featureStore.getOpponentCode("Manchester Utd")
+    assert featureStore.getOpponentCode("tottenham hotspur") == featureStore.getOpponentCode("Tottenham")
+    assert featureStore.getOpponentCode("Sunderland") == DEFAULT_OPPONENT_CODE
+
+
+def test_prediction_cache_hits_and_invalidation(client):
+    """Test repeated predictions hit the cache until the dataset version changes"""
+    from Controllers.FeatureStore import featureStore
+    from Controllers.PredictionCache import predictionCache
+
+    match_data = {
+        "date": "2026-01-10",
+        "time": "15:00",
+        "round": "Matchweek 21",
+        "day": "Sat",
+        "venue": "Home",
+        "result": "nan",
+        "opponent": "Everton",
+        "team_name": "Fulham",
+        "captain": "",
+        "formation": "",
+        "oppFormation": "",
+        "referee": ""
+    }
+    predictionCache.clear()
+    before = client.get("/predict/cache").json()
+
+    first = client.post("/predict/", json=match_data).json()
+    second = client.post("/predict/", json=match_data).json()
+    assert first == second
+
+    stats = client.get("/predict/cache").json()
+    assert stats["hits"] == before["hits"] + 1
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["size"] == 1
+
+    # a rebuild bumps the dataset version so the next lookup misses and refills
+    featureStore.build()
+    client.post("/predict/", json=match_data)
+    stats = client.get("/predict/cache").json()
+    assert stats["misses"] == before["misses"] + 2
+    assert stats["size"] == 1
+
+
+def test_prediction_cache_lru_and_ttl():
+    """Test the cache evicts the least recently used entry and expires old ones"""
+    from Controllers.PredictionCache import PredictionCache
+
+    cache = PredictionCache(maxsize=2, ttl=60)
+    keys = [PredictionCache.makeKey(home, "Chelsea", "2026-01-10 15:00", "rf_rolling", 1) for home in ["A", "B", "C"]]
+    cache.put(keys[0], "a")
+    cache.put(keys[1], "b")
+    assert cache.get(keys[0]) == "a"
+    cache.put(keys[2], "c")
+    assert cache.get(keys[1]) is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = PredictionCache(maxsize=2, ttl=0)
+    expired.put(keys[0], "a")
+    assert expired.get(keys[0]) is None
+
+
+def test_prediction_cache_keeps_entries_per_model():
+    """Test alternating models keeps both cached and only a dataset change clears them"""
+    from Controllers.PredictionCache import PredictionCache
+
+    cache = PredictionCache(maxsize=8, ttl=60)
+    rolling = PredictionCache.makeKey("Fulham", "Everton", "2026-01-10 15:00", "rf_rolling", 1)
+    logistic = PredictionCache.makeKey("Fulham", "Everton", "2026-01-10 15:00", "logistic_regression", 1)
+    cache.put(rolling, "rf")
+    cache.put(logistic, "lr")
+    for _ in range(2):
+        assert cache.get(rolling) == "rf"
+        assert cache.get(logistic) == "lr"
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 4
+
+    # a new dataset version still invalidates every model's entries
+    assert cache.get(PredictionCache.makeKey("Fulham", "Everton", "2026-01-10 15:00", "rf_rolling", 2)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_ready_after_warmup(client):
+    """Test GET /ready reports the warm-up steps once the app has started"""
+    response = client.get("/ready")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["ready"] is True
+    assert data["steps"]["feature_store"]["status"] == "ok"
+    assert data["steps"]["model"]["model"] == "rf_rolling"
+    assert all("seconds" in step for step in data["steps"].values())
+
+
+def test_prediction_pool_back_pressure():
+    """Test the prediction pool runs jobs off the event loop and rejects work once it is full"""
+    import asyncio
+    import threading
+    from fastapi import HTTPException
+    from Controllers.PredictionExecutor import PredictionExecutor
+
+    executor = PredictionExecutor(workers=1, queue_size=1)
+    release = threading.Event()
+
+    async def scenario():
+        loop_thread = threading.get_ident()
+        blocked = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert executor.stats()["running"] == 1
+        assert executor.stats()["queued"] == 1
+
+        with pytest.raises(HTTPException) as error:
+            await executor.run(lambda: None)
+        assert error.value.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+
+        release.set()
+        await asyncio.gather(*blocked)
+        worker_thread = await executor.run(threading.get_ident)
+        assert worker_thread != loop_thread
+
+    asyncio.run(scenario())
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["completed"] == 3
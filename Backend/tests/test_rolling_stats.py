@@ -0,0 +1,73 @@
+"""
+Unit tests for the rolling stats engine shared by training and prediction.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from MachineLearning.RollingStats import RollingStatsEngine, rollingFrame, replayFrame, ROLLING_COLS, ROLLING_FEATURES
+
+
+def pandas_rolling(matches, window=3):
+    """The groupby.apply(rolling_averages) pipeline the engine replaced"""
+    def rolling_averages(group):
+        group = group.sort_values("date")
+        group[ROLLING_FEATURES] = group[ROLLING_COLS].rolling(window, closed='left').mean()
+        return group.dropna(subset=ROLLING_FEATURES)
+
+    rolled = matches.groupby("team").apply(rolling_averages).droplevel("team")
+    rolled.index = range(rolled.shape[0])
+    return rolled
+
+
+def make_matches(rows_per_team=8):
+    rng = np.random.default_rng(0)
+    frames = []
+    for team in ["Arsenal", "Chelsea", "Wolves"]:
+        frame = pd.DataFrame(rng.integers(0, 20, size=(rows_per_team, len(ROLLING_COLS))).astype(float), columns=ROLLING_COLS)
+        frame["date"] = pd.date_range("2025-08-16", periods=rows_per_team, freq="7D")
+        frame["team"] = team
+        frames.append(frame.sample(frac=1, random_state=1))
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_append_returns_closed_left_window():
+    """Test append returns the mean of the previous matches once the window is full"""
+    engine = RollingStatsEngine(["gf"], window=2)
+    assert engine.append("Arsenal", [1]) is None
+    assert engine.append("Arsenal", [3]) is None
+    assert engine.append("Arsenal", [5]) == pytest.approx([2])
+    assert engine.current("Arsenal") == pytest.approx([4])
+    assert engine.current("Chelsea") is None
+
+
+@pytest.mark.parametrize("window", [2, 3, 5])
+def test_rolling_frame_matches_pandas(window):
+    """Test the vectorized rollingFrame returns exactly what the pandas rolling pipeline did"""
+    matches = make_matches()
+    matches.loc[4, "sh"] = np.nan
+    expected = pandas_rolling(matches, window)
+    result = rollingFrame(matches, window=window)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("window", [2, 3, 5])
+def test_replay_frame_matches_rolling_frame(window):
+    """Test appending match by match through the engine gives the vectorized values"""
+    matches = make_matches()
+    expected = rollingFrame(matches, window=window)
+    result = replayFrame(matches, window=window)
+
+    assert result[["team", "date"]].equals(expected[["team", "date"]])
+    np.testing.assert_allclose(result[ROLLING_FEATURES], expected[ROLLING_FEATURES])
+
+
+def test_seed_keeps_latest_window():
+    """Test seeding the engine from a frame leaves each team's latest matches in its window"""
+    matches = make_matches()
+    engine = RollingStatsEngine()
+    engine.seed(matches)
+
+    latest = matches.sort_values("date").groupby("team").tail(3)
+    for team, group in latest.groupby("team"):
+        np.testing.assert_allclose(engine.current(team), group[ROLLING_COLS].mean().to_numpy())
@@ -0,0 +1,238 @@
+"""
+Unit tests for the scrapers, run against saved fbref pages on a local HTTP server.
+"""
+import asyncio
+import os
+import shutil
+import threading
+import time
+from io import StringIO
+import pandas as pd
+import pytest
+import DataScraping
+import LeagueTableScraping
+from PageFetcher import HttpFetcher, FallbackFetcher, SeleniumFetcher, createFetcher
+from ScrapeScheduler import ScrapeScheduler, TokenBucket
+from PageCache import CachedFetcher, PageCache, PageNotCached
+
+LEAGUE_PATH = "/en/comps/9/Premier-League-Stats"
+FIXTURE_TEAMS = ["Arsenal", "Manchester City"]
+
+
+def throughCsv(frame):
+    # what the scraper writes and the import reads back
+    return pd.read_csv(StringIO(frame.to_csv(index=False)))
+
+
+class CannedFetcher:
+    """Stands in for the browser, returns the same page for every URL"""
+
+    def __init__(self, html):
+        self.html = html
+        self.urls = []
+
+    def fetch(self, url):
+        self.urls.append(url)
+        return self.html
+
+    def close(self):
+        pass
+
+
+class SlowFetcher:
+    """Takes `seconds` per page and counts how many pages are being fetched at once"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.in_flight = 0
+        self.most_in_flight = 0
+        self.lock = threading.Lock()
+
+    def fetch(self, url):
+        with self.lock:
+            self.in_flight += 1
+            self.most_in_flight = max(self.most_in_flight, self.in_flight)
+        time.sleep(self.seconds)
+        with self.lock:
+            self.in_flight -= 1
+        return url
+
+
+def test_scrape_league_over_http(fbref_server):
+    """Test the HTTP scraper reads every squad's stats and schedule like the Selenium one wrote them"""
+    with HttpFetcher() as fetcher:
+        scheduler = ScrapeScheduler(fetcher, rate=0, concurrency=2)
+        scraped = asyncio.run(DataScraping.scrapeLeague(scheduler, fbref_server.url + LEAGUE_PATH))
+    assert scraped["teams"] == FIXTURE_TEAMS
+
+    stats = pd.read_csv("WebScraper/stats.csv")
+    expected = pd.concat([
+        pd.concat([team[~team["Player"].str.endswith("Total")].head(4), team[team["Player"].str.endswith("Total")]])
+        for team in (stats[stats["Team"] == name] for name in FIXTURE_TEAMS)
+    ], ignore_index=True)
+    stats = throughCsv(DataScraping.cleanStats(pd.concat(scraped["stats"].values(), ignore_index=True)))
+    pd.testing.assert_frame_equal(stats, expected, check_dtype=False)
+
+    schedules = pd.read_csv("WebScraper/schedules_2025_2026.csv")
+    expected = pd.concat([
+        pd.concat([team[team["Result"].notna()].head(4), team[team["Result"].isna()].head(2)])
+        for team in (schedules[schedules["Team"] == name] for name in FIXTURE_TEAMS)
+    ], ignore_index=True)
+    pd.testing.assert_frame_equal(throughCsv(pd.concat(scraped["schedules"].values(), ignore_index=True)), expected, check_dtype=False)
+
+    # the league page, then a squad and a schedule page per team, over at most one keep-alive connection per slot
+    assert len(fbref_server.requests) == len(scheduler.latencies) == 1 + 2 * len(FIXTURE_TEAMS)
+    assert len({client for client, path, status in fbref_server.requests}) <= 2
+    assert scheduler.latencyReport()["errors"] == 0
+
+
+def test_scrape_league_table_over_http(fbref_server):
+    """Test the standings are the first stats table on the league page"""
+    with HttpFetcher() as fetcher:
+        table = LeagueTableScraping.scrapeLeagueTable(fetcher, fbref_server.url + LEAGUE_PATH)
+    expected = pd.read_csv("WebScraper/table.csv").head(len(FIXTURE_TEAMS))
+    pd.testing.assert_frame_equal(throughCsv(table), expected, check_dtype=False)
+    assert LeagueTableScraping.parseLeagueTable("<html><body><p>Checking your browser</p></body></html>") is None
+
+
+def test_selenium_is_only_a_fallback(fbref_server):
+    """Test the browser is asked only for pages the HTTP fetch could not read"""
+    browser = CannedFetcher('<table class="stats_table"><tr><td>from the browser</td></tr></table>')
+    fetcher = FallbackFetcher(HttpFetcher(), browser)
+
+    assert "Regular season Table" in fetcher.fetch(fbref_server.url + LEAGUE_PATH)
+    assert browser.urls == []
+    assert "from the browser" in fetcher.fetch(fbref_server.url + "/en/comps/9/missing")
+    assert browser.urls == [fbref_server.url + "/en/comps/9/missing"]
+    fetcher.close()
+
+    assert isinstance(createFetcher("http", selenium_fallback=False, cache=False), HttpFetcher)
+    # Chrome is only started by the first fetch
+    selenium = createFetcher("selenium")
+    assert isinstance(selenium, SeleniumFetcher) and selenium.driver is None
+    with pytest.raises(ValueError):
+        createFetcher("curl")
+
+
+def test_token_bucket_paces_requests_per_host():
+    """Test each host gets its own rate and a burst goes out without waiting"""
+    async def timed(urls, **options):
+        scheduler = ScrapeScheduler(SlowFetcher(0), concurrency=8, **options)
+        start = time.perf_counter()
+        await asyncio.gather(*(scheduler.fetch(url) for url in urls))
+        return time.perf_counter() - start
+
+    one_host = [f"http://a.test/{n}" for n in range(5)]
+    # five requests at 20 a second: the first straight away, the rest 50 ms apart
+    assert 0.18 < asyncio.run(timed(one_host, rate=20)) < 0.5
+    # the same pages split over two hosts wait for two buckets in parallel
+    two_hosts = [f"http://a.test/{n}" for n in range(3)] + [f"http://b.test/{n}" for n in range(2)]
+    assert asyncio.run(timed(two_hosts, rate=20)) < 0.15
+    assert asyncio.run(timed(one_host, rate=20, burst=5)) < 0.05
+
+
+def test_scheduler_bounds_concurrency_and_records_latency():
+    """Test no more than `concurrency` pages are fetched at once and every request's latency is kept"""
+    fetcher = SlowFetcher(0.05)
+    scheduler = ScrapeScheduler(fetcher, rate=0, concurrency=3)
+
+    async def fetchAll():
+        return await asyncio.gather(*(scheduler.fetch(f"http://a.test/{n}") for n in range(9)))
+
+    start = time.perf_counter()
+    assert asyncio.run(fetchAll()) == [f"http://a.test/{n}" for n in range(9)]
+    # three rounds of three pages rather than nine pages one after another
+    assert time.perf_counter() - start < 0.4
+    assert fetcher.most_in_flight == 3
+
+    report = scheduler.latencyReport()
+    assert report["requests"] == 9 and report["errors"] == 0
+    assert all(entry["seconds"] >= 0.05 for entry in scheduler.latencies)
+    assert report["p50"] >= 0.05 and report["max"] >= report["p95"] >= report["p50"]
+
+
+def test_token_bucket_without_limit():
+    """Test a rate of 0 never waits"""
+    bucket = TokenBucket(0)
+
+    async def acquireMany():
+        for _ in range(100):
+            await bucket.acquire()
+
+    start = time.perf_counter()
+    asyncio.run(acquireMany())
+    assert time.perf_counter() - start < 0.05
+
+
+def test_page_cache_revalidates_and_replays(fbref_server, tmp_path):
+    """Test a cached page is revalidated with a 304, a changed one is downloaded again and the cache replays offline"""
+    pages = tmp_path / "pages"
+    shutil.copytree(fbref_server.root, pages)
+    fbref_server.root = str(pages)
+    url = fbref_server.url + LEAGUE_PATH
+    cache = PageCache(str(tmp_path / "cache"))
+
+    with CachedFetcher(HttpFetcher(), cache) as fetcher:
+        first = fetcher.fetch(url)
+        # never parsed yet, so not unchanged
+        assert fetcher.outcomes[url] == "downloaded" and not fetcher.unchanged(url)
+        fetcher.markParsed([url])
+        assert fetcher.fetch(url) == first
+        assert fetcher.outcomes[url] == "not_modified" and fetcher.unchanged(url)
+        assert [status for client, path, status in fbref_server.requests] == [200, 304]
+        entry = cache.entry(url)
+        assert entry["etag"] and entry["last_modified"] and entry["fetched_at"]
+
+        league_page = pages / "en" / "comps" / "9" / "Premier-League-Stats.html"
+        league_page.write_text(first.replace("Regular season Table", "Regular season Table (updated)"), encoding="utf-8")
+        assert "(updated)" in fetcher.fetch(url)
+        assert fetcher.outcomes[url] == "downloaded" and not fetcher.unchanged(url)
+        fetcher.markParsed([url])
+    # the replaced body was pruned when the run closed
+    assert os.listdir(cache.pages) == [cache.entry(url)["hash"] + ".html"]
+
+    requests_before = len(fbref_server.requests)
+    replay = CachedFetcher(HttpFetcher(), cache, offline=True)
+    assert "(updated)" in replay.fetch(url)
+    # replayed pages are always parsed
+    assert replay.outcomes[url] == "replayed" and not replay.unchanged(url)
+    with pytest.raises(PageNotCached):
+        replay.fetch(fbref_server.url + "/en/comps/9/never-fetched")
+    assert len(fbref_server.requests) == requests_before
+
+
+def test_unchanged_pages_are_not_parsed_again(fbref_server, tmp_path):
+    """Test a second run with the same bodies parses nothing, even from a server without ETags"""
+    fbref_server.validators = False
+    with CachedFetcher(HttpFetcher(), PageCache(str(tmp_path))) as fetcher:
+        scheduler = ScrapeScheduler(fetcher, rate=0)
+        first = asyncio.run(DataScraping.scrapeLeague(scheduler, fbref_server.url + LEAGUE_PATH))
+        assert set(first["stats"]) == set(first["schedules"]) == set(FIXTURE_TEAMS)
+        scheduler.markParsed(first["parsed"]["stats"] + first["parsed"]["schedules"])
+
+        again = asyncio.run(DataScraping.scrapeLeague(ScrapeScheduler(fetcher, rate=0), fbref_server.url + LEAGUE_PATH))
+    # the bodies hash the same as the ones parsed, the CSVs and the database already have them
+    assert again["teams"] == FIXTURE_TEAMS
+    assert again["stats"] == {} and again["schedules"] == {}
+    assert all(status == 200 for client, path, status in fbref_server.requests)
+
+
+def test_merge_team_rows_keeps_teams_not_parsed(tmp_path):
+    """Test the teams parsed this run replace their rows and the other teams keep theirs, in table order"""
+    path = tmp_path / "stats.csv"
+    pd.DataFrame({"Player": ["a", "b", "c", "d"], "Gls": [1, 2, 3, 4], "Team": ["Arsenal", "Arsenal", "Chelsea", "Wolves"]}).to_csv(path, index=False)
+    fresh = pd.DataFrame({"Player": ["e"], "Gls": [5], "Team": ["Chelsea"]})
+
+    merged = DataScraping.mergeTeamRows(str(path), ["Chelsea", "Arsenal", "Everton"], {"Chelsea": fresh})
+    # Wolves left the table, Everton has no rows yet
+    assert merged[["Player", "Team"]].values.tolist() == [["e", "Chelsea"], ["a", "Arsenal"], ["b", "Arsenal"]]
+
+
+def test_scrape_only_named_teams(fbref_server):
+    """Test an incremental run fetches only the named teams' pages but still knows every team in the table"""
+    with HttpFetcher() as fetcher:
+        scraped = asyncio.run(DataScraping.scrapeLeague(ScrapeScheduler(fetcher, rate=0), fbref_server.url + LEAGUE_PATH, teams=["Manchester City"]))
+    assert scraped["teams"] == FIXTURE_TEAMS
+    assert list(scraped["stats"]) == list(scraped["schedules"]) == ["Manchester City"]
+    paths = [path for client, path, status in fbref_server.requests]
+    assert len(paths) == 3 and not any("Arsenal" in path for path in paths)
@@ -0,0 +1,85 @@
+"""
+Unit tests for the league standings computed from the match table.
+"""
+import pandas as pd
+from fastapi import status
+from Models.match import Match
+from Models.standing import Standing
+from Models.team import Team
+from Controllers.StandingsController import refreshStandings
+
+
+def test_standings_match_the_scraped_table(client, import_data):
+    """Test the latest snapshot agrees with fbref's league table and GET /standings?matchweek= reads older ones"""
+    import_data("/teams/import")
+    result = import_data("/matches/import")["result"]
+    # the scraped team table already agrees with the results, so no team row is rewritten
+    assert result["standings"]["from_matchweek"] == 1
+    assert result["standings"]["teams_updated"] == 0
+
+    response = client.get("/standings")
+    assert response.status_code == status.HTTP_200_OK
+    table = pd.read_csv("WebScraper/table.csv")
+    expected = list(table[["Rk", "Squad", "MP", "W", "D", "L", "GF", "GA", "Pts", "Last 5"]].itertuples(index=False, name=None))
+    assert [(s["rank"], s["team_name"], s["matchesPlayed"], s["wins"], s["draws"], s["losses"], s["goalsFor"],
+             s["goalsAgainst"], s["points"], s["last5Wins"]) for s in response.json()] == expected
+
+    first_week = client.get("/standings", params={"matchweek": 1}).json()
+    assert [s["rank"] for s in first_week] == list(range(1, 21))
+    assert all(s["matchesPlayed"] == 1 and s["last5Wins"] in ("W", "D", "L") for s in first_week)
+    assert client.get("/standings", params={"matchweek": 99}).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_standings_refresh_only_rewrites_later_matchweeks(client, import_data, db_session):
+    """Test a changed result rewrites the snapshots from its matchweek on and updates the team rows"""
+    import_data("/teams/import")
+    import_data("/matches/import")
+    first_weeks = [(s.matchweek, s.team_name, s.points) for s in db_session.query(Standing).filter(Standing.matchweek < 16)]
+
+    match = db_session.query(Match).filter(Match.round == "Matchweek 16", Match.result == "D").first()
+    match.result, match.gf = "W", match.gf + 1
+    db_session.commit()
+
+    changes = refreshStandings(db_session)
+    db_session.commit()
+    assert changes["from_matchweek"] == 16
+    assert changes["inserted"] == 0 and changes["deleted"] == 0
+    # the extra win can also move other teams' ranks
+    assert changes["teams_updated"] >= 1
+    assert [(s.matchweek, s.team_name, s.points) for s in db_session.query(Standing).filter(Standing.matchweek < 16)] == first_weeks
+
+    team = db_session.query(Team).filter(Team.name == match.team_name).one()
+    latest = db_session.query(Standing).filter(Standing.team_name == match.team_name).order_by(Standing.matchweek.desc()).first()
+    assert (team.points, team.wins, team.goalsFor) == (latest.points, latest.wins, latest.goalsFor)
+    # nothing left to do once the snapshots are current
+    assert refreshStandings(db_session)["from_matchweek"] is None
+
+
+def test_standings_not_found_before_any_import(client):
+    """Test GET /standings returns 404 while there are no snapshots"""
+    response = client.get("/standings")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_team_import_after_matches_keeps_computed_standings(client, import_data, db_session):
+    """Test importing table.csv after the matches leaves rank and points as the standings computed them"""
+    import_data("/teams/import")
+    import_data("/matches/import")
+
+    # a result changed since the table was scraped, so table.csv and the standings disagree
+    match = db_session.query(Match).filter(Match.round == "Matchweek 16", Match.result == "D").first()
+    match.result, match.gf = "W", match.gf + 1
+    db_session.commit()
+    refreshStandings(db_session)
+    db_session.commit()
+    latest = {s.team_name: s for s in db_session.query(Standing).filter(Standing.matchweek == db_session.query(Standing.matchweek).order_by(Standing.matchweek.desc()).limit(1).scalar_subquery())}
+
+    job = import_data("/teams/import")
+    assert job["status"] == "succeeded"
+
+    teams = {team["name"]: team for team in client.get("/teams/").json()}
+    for name, standing in latest.items():
+        assert (teams[name]["rank"], teams[name]["points"], teams[name]["wins"]) == (standing.rank, standing.points, standing.wins)
+    # the columns the standings don't compute still come from table.csv
+    table = pd.read_csv("WebScraper/table.csv").set_index("Squad")
+    assert teams[match.team_name]["expectedGoals"] == table.loc[match.team_name, "xG"]
@@ -0,0 +1,72 @@
+"""
+Compiled random forest benchmark
+Times sklearn's RandomForestClassifier.predict_proba (the path the predict
+endpoints used before) against the array compiled CompiledForest for
+rf_basic.pkl and rf_rolling.pkl, and checks both give the same probabilities.
+
+Run from anywhere: python MachineLearning/ForestBenchmark.py
+"""
+import os
+import time
+import warnings
+import joblib
+import numpy as np
+import pandas as pd
+from CompiledForest import compileForest, MAX_COMPILED_ROWS
+from RollingStats import rollingFrame
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+models_dir = os.path.join(script_dir, "models")
+REPEATS = 200
+BATCH_SIZES = [1, 2, 20, 380]  # one fixture, a home/away pair, a matchweek, a season
+
+
+def loadFeatures():
+    matches = pd.read_csv(os.path.join(script_dir, "matches.csv"), index_col=0)
+    matches["date"] = pd.to_datetime(matches["date"])
+    matches["h/a"] = matches["venue"].astype("category").cat.codes
+    matches["opp"] = matches["opponent"].astype("category").cat.codes
+    matches["hour"] = matches["time"].str.replace(":.+", "", regex=True).astype("int")
+    matches["day"] = matches["date"].dt.dayofweek
+    return rollingFrame(matches)
+
+
+def timeIt(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark(name, features):
+    rf = joblib.load(os.path.join(models_dir, f"{name}.pkl"))
+    predictors = list(rf.feature_names_in_)
+
+    start = time.perf_counter()
+    compiled = compileForest(rf)
+    compile_time = time.perf_counter() - start
+
+    X = features[predictors]
+    # check in chunks so every row goes through the compiled walk rather than the sklearn hand off
+    compiled_probs = np.concatenate([
+        compiled.predict_proba(X.iloc[start:start + MAX_COMPILED_ROWS].to_numpy())
+        for start in range(0, len(X), MAX_COMPILED_ROWS)
+    ])
+    difference = np.abs(rf.predict_proba(X) - compiled_probs).max()
+    print(f"\n{name}: {compiled.n_trees} trees, {compiled.n_nodes} nodes, depth {compiled.max_depth}")
+    print(f"   compiled in {compile_time * 1000:.1f} ms, max |difference| over {len(X)} rows: {difference:.2e}")
+
+    for size in BATCH_SIZES:
+        batch = X.iloc[:size]
+        array = batch.to_numpy()
+        repeats = max(5, REPEATS // size)
+        sklearn_time = timeIt(lambda: rf.predict_proba(batch), repeats)
+        compiled_time = timeIt(lambda: compiled.predict_proba(array), repeats)
+        print(f"   {size:5d} rows  sklearn {sklearn_time * 1000:8.3f} ms   compiled {compiled_time * 1000:8.3f} ms  ({sklearn_time / compiled_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore")
+    features = loadFeatures()
+    for name in ["rf_basic", "rf_rolling"]:
+        benchmark(name, features)
@@ -4,6 +4,8 @@ from sklearn.metrics import precision_score
 from sklearn.metrics import accuracy_score
 from sklearn.ensemble import RandomForestClassifier #importing machine learning for non linear data
 import os
+import joblib
+from RollingStats import rollingFrame, ROLLING_COLS, ROLLING_FEATURES # rolling averages shared with the backend
 script_dir = os.path.dirname(os.path.abspath(__file__))
 matches = pd.read_csv(os.path.join(script_dir, "matches.csv"), index_col = 0)
 
@@ -11,6 +13,10 @@ matches = pd.read_csv(os.path.join(script_dir, "matches.csv"), index_col = 0)
 matches["date"] = pd.to_datetime(matches["date"])
 matches["h/a"] = matches["venue"].astype("category").cat.codes # converting venue to a home (1) or away (0) number
 matches["opp"] = matches["opponent"].astype("category").cat.codes # converting opponents to a number
+
+# saving the opponent -> code mapping next to the models so the backend can look codes up directly
+opponent_codes = {name: code for code, name in enumerate(matches["opponent"].astype("category").cat.categories)}
+joblib.dump(opponent_codes, os.path.join(script_dir, "models", "opponent_codes.pkl"))
 matches["hour"] = matches["time"].str.replace(":.+", "", regex=True).astype("int") # converting hours to number in case a team plays better at a certain time
 matches["day"] = matches["date"].dt.dayofweek # converting day of week of game to a number
 matches["target"] = (matches["result"] == "W").astype("int") # setting a win to the value 1
@@ -33,22 +39,10 @@ precision_score(test["target"], preds)
 grouped_matches = matches.groupby("team") 
 group = grouped_matches.get_group("Manchester United").sort_values("date")
  
-def rolling_averages(group, cols, new_cols): ## function to take into consideration form of a team
-    group = group.sort_values("date") ## sorting games by date 
-    rolling_stats = group[cols].rolling(3, closed='left').mean()
-    group[new_cols] = rolling_stats
-    group = group.dropna(subset=new_cols) ##droping missing values and replacing with empty
-    return group 
-
-cols = ["gf", "ga", "sh", "sot", "dist", "fk", "pk", "pkatt"] 
-new_cols = [f"{c}_rolling" for c in cols] # creating new columns with rolling average values 
-
-rolling_averages(group, cols, new_cols) # calling function and generating average of last 3 games
-
-matches_rolling = matches.groupby("team").apply(lambda x: rolling_averages(x, cols, new_cols))
-matches_rolling = matches_rolling.droplevel('team') # dropping extra index level
+cols = ROLLING_COLS # ["gf", "ga", "sh", "sot", "dist", "fk", "pk", "pkatt"]
+new_cols = ROLLING_FEATURES # creating new columns with rolling average values 
 
-matches_rolling.index = range(matches_rolling.shape[0]) # adding new index
+matches_rolling = rollingFrame(matches) # rolling averages for every team, one row per match with a fresh index
 matches_rolling
 def make_predictions(data, predictors): # making the predictions
     train = data[data["date"] < '2022-01-01'] 
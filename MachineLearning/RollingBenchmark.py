@@ -0,0 +1,90 @@
+"""
+Rolling features benchmark
+Times the old groupby.apply(rolling_averages) pipeline against the vectorized
+rollingFrame() and the row by row RollingStatsEngine replay on matches.csv and
+on archive/final_dataset.csv, and checks they return the same values.
+
+Run from anywhere: python MachineLearning/RollingBenchmark.py
+"""
+import os
+import time
+import numpy as np
+import pandas as pd
+from RollingStats import rollingFrame, replayFrame, ROLLING_COLS
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+REPEATS = 5
+
+
+# the pipeline every script used before RollingStats.py
+def rolling_averages(group, cols, new_cols):
+    group = group.sort_values("date")
+    rolling_stats = group[cols].rolling(3, closed='left').mean()
+    group[new_cols] = rolling_stats
+    group = group.dropna(subset=new_cols)
+    return group
+
+def applyFrame(matches, cols):
+    new_cols = [f"{c}_rolling" for c in cols]
+    matches_rolling = matches.groupby("team").apply(lambda x: rolling_averages(x, cols, new_cols))
+    matches_rolling = matches_rolling.droplevel('team')
+    matches_rolling.index = range(matches_rolling.shape[0])
+    return matches_rolling
+
+
+def loadMatches():
+    matches = pd.read_csv(os.path.join(script_dir, "matches.csv"), index_col=0)
+    matches["date"] = pd.to_datetime(matches["date"])
+    return matches
+
+# final_dataset.csv has one row per fixture, split it into one row per team like matches.csv
+def loadArchive():
+    possible_paths = [
+        os.path.join(script_dir, "../archive/final_dataset.csv"),
+        os.path.join(script_dir, "../../archive/final_dataset.csv"),
+    ]
+    path = next((p for p in possible_paths if os.path.exists(p)), None)
+    if path is None:
+        return None
+    fixtures = pd.read_csv(path, index_col=0)
+    fixtures["date"] = pd.to_datetime(fixtures["Date"], format="mixed", dayfirst=True)  # mixes dd/mm/yy and dd/mm/yyyy
+    home = pd.DataFrame({"date": fixtures["date"], "team": fixtures["HomeTeam"], "gf": fixtures["FTHG"], "ga": fixtures["FTAG"]})
+    away = pd.DataFrame({"date": fixtures["date"], "team": fixtures["AwayTeam"], "gf": fixtures["FTAG"], "ga": fixtures["FTHG"]})
+    return pd.concat([home, away], ignore_index=True)
+
+
+def timeIt(fn):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark(name, matches, cols):
+    features = [f"{c}_rolling" for c in cols]
+    print(f"\n{name}: {len(matches)} rows, {matches['team'].nunique()} teams, stats {cols}")
+
+    apply_time, expected = timeIt(lambda: applyFrame(matches, cols))
+    vector_time, vectorized = timeIt(lambda: rollingFrame(matches, cols))
+    replay_time, replayed = timeIt(lambda: replayFrame(matches, cols))
+
+    # vectorized rows must be identical to the old pipeline, the replay sums in a different order
+    pd.testing.assert_frame_equal(vectorized, expected)
+    np.testing.assert_allclose(replayed[features], expected[features])
+
+    print(f"   groupby.apply(rolling_averages): {apply_time * 1000:8.2f} ms")
+    print(f"   rollingFrame (vectorized):       {vector_time * 1000:8.2f} ms  ({apply_time / vector_time:.1f}x)")
+    print(f"   replayFrame (ring buffers):      {replay_time * 1000:8.2f} ms  ({apply_time / replay_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    print(f"Best of {REPEATS} runs")
+    benchmark("matches.csv", loadMatches(), ROLLING_COLS)
+
+    archive = loadArchive()
+    if archive is None:
+        print("\narchive/final_dataset.csv not found, skipping")
+    else:
+        benchmark("archive/final_dataset.csv", archive, ["gf", "ga"])
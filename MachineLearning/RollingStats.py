@@ -0,0 +1,133 @@
+# Rolling stats engine shared by the training scripts and the prediction backend.
+# Every team keeps a fixed-size ring buffer of its last few matches so adding a new
+# result only touches that team's window instead of re-sorting its whole history.
+import numpy as np
+import pandas as pd
+
+# stats that get averaged over each team's previous matches
+ROLLING_COLS = ["gf", "ga", "sh", "sot", "dist", "fk", "pk", "pkatt"]
+ROLLING_FEATURES = [f"{c}_rolling" for c in ROLLING_COLS]
+DEFAULT_WINDOW = 3
+
+
+class RollingWindow:
+    """Ring buffer holding the last `size` rows of stats for one team"""
+
+    def __init__(self, size, width):
+        self.size = size
+        self.buffer = np.zeros((size, width))
+        self.position = 0  # slot the next row is written to
+        self.count = 0
+
+    def push(self, values):
+        self.buffer[self.position] = values
+        self.position = (self.position + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+    @property
+    def full(self):
+        return self.count == self.size
+
+    def mean(self):
+        """Mean of every stat over the window, or None until the window has filled up"""
+        if not self.full:
+            return None
+        # walk the buffer oldest to newest so sums add up in the same order as pandas
+        order = [(self.position + i) % self.size for i in range(self.size)]
+        return self.buffer[order].sum(axis=0) / self.size
+
+
+class RollingStatsEngine:
+    """
+    Keeps a RollingWindow per team and per stat in `cols`.
+
+    append() adds a completed match for a team in O(window) time and returns the
+    rolling averages that match would have had as a feature row, i.e. the mean of
+    the `window` matches before it (same as rolling(window, closed='left')).
+    current() returns the averages of the team's latest `window` matches.
+    """
+
+    def __init__(self, cols=ROLLING_COLS, window=DEFAULT_WINDOW):
+        self.cols = list(cols)
+        self.features = [f"{c}_rolling" for c in self.cols]
+        self.window = window
+        self._windows = {}
+
+    def _windowFor(self, team):
+        window = self._windows.get(team)
+        if window is None:
+            window = RollingWindow(self.window, len(self.cols))
+            self._windows[team] = window
+        return window
+
+    def append(self, team, values):
+        """Adds one match (stats in `cols` order) and returns its closed-left rolling row"""
+        window = self._windowFor(team)
+        before = window.mean()
+        window.push(np.asarray(values, dtype=float))
+        return before
+
+    def seed(self, matches):
+        """Fills every team's window with its latest matches from a frame with "team" and "date" """
+        ordered = matches.sort_values(["team", "date"], kind="mergesort")
+        latest = ordered.groupby("team", sort=False).tail(self.window)
+        for team, group in latest.groupby("team", sort=False):
+            window = self._windowFor(team)
+            for values in group[self.cols].to_numpy(dtype=float):
+                window.push(values)
+
+    def current(self, team):
+        window = self._windows.get(team)
+        return None if window is None else window.mean()
+
+    @property
+    def teams(self):
+        return list(self._windows)
+
+    def reset(self):
+        self._windows = {}
+
+
+def rollingFrame(matches, cols=ROLLING_COLS, window=DEFAULT_WINDOW):
+    """
+    Adds `<col>_rolling` columns to a frame of matches (needs "team" and "date")
+    holding the mean of each team's previous `window` matches.
+
+    Vectorized replacement for matches.groupby("team").apply(rolling_averages):
+    one stable sort by team and date plus a single grouped rolling pass, which
+    gives the same values as rolling(window, closed='left') per team. Rows
+    without a full window, or with missing stats in it, are dropped and the
+    rows come back grouped by team with a fresh index.
+    """
+    cols = list(cols)
+    features = [f"{c}_rolling" for c in cols]
+    ordered = matches.sort_values(["team", "date"], kind="mergesort")
+
+    # groups come back in the order they appear, which is the sorted order above
+    rolled = ordered.groupby("team", sort=False)[cols].rolling(window, closed="left").mean()
+    ordered[features] = rolled.to_numpy()
+
+    ordered = ordered.dropna(subset=features)
+    ordered.index = range(ordered.shape[0])
+    return ordered
+
+
+def replayFrame(matches, cols=ROLLING_COLS, window=DEFAULT_WINDOW):
+    """
+    Same output as rollingFrame() but built row by row through a
+    RollingStatsEngine, used to check the two stay in step.
+    """
+    engine = RollingStatsEngine(cols, window)
+    ordered = matches.sort_values(["team", "date"], kind="mergesort")
+
+    stats = ordered[engine.cols].to_numpy(dtype=float)
+    rolled = np.full(stats.shape, np.nan)
+    for i, team in enumerate(ordered["team"].to_numpy()):
+        row = engine.append(team, stats[i])
+        if row is not None:
+            rolled[i] = row
+
+    ordered[engine.features] = rolled
+    ordered = ordered.dropna(subset=engine.features)
+    ordered.index = range(ordered.shape[0])
+    return ordered